@@ -0,0 +1,92 @@
+"""Results archive: ingestion of several synthetic seasons and !pb / !trend query latency
+
+Run from the repository root: python -m benchmarks.bench_archive
+"""
+import random
+import statistics
+import tempfile
+import time
+
+from bubla.archive import ResultsArchive
+from bubla.stage_times import format_times
+
+SEASONS = 5
+RALLIES = 52  # weekly
+STAGES = 6
+DRIVERS = 2000
+FIELD = 800  # entries per rally
+VEHICLES = 40
+QUERIES = 200
+
+
+def synthetic_rally(rnd, drivers, vehicles):
+    entries = rnd.sample(drivers, FIELD)
+    totals = sorted(rnd.randrange(2_400_000, 7_200_000) for _ in entries)
+    return [{'rank': rank, 'name': name, 'vehicleName': rnd.choice(vehicles),
+             'isDnfEntry': rnd.random() < 0.03,
+             'stageTime': format_times([rnd.randrange(300_000, 900_000)])[0],
+             'totalTime': format_times([total])[0]}
+            for rank, (name, total) in enumerate(zip(entries, totals), start=1)]
+
+
+def ingest(archive, seed=1):
+    """:return: (rows, per rally append seconds)"""
+    rnd = random.Random(seed)
+    drivers = [f"driver{index:05d}" for index in range(DRIVERS)]
+    vehicles = [f"vehicle{index:02d}" for index in range(VEHICLES)]
+    stages = [f"stage{index:03d}" for index in range(STAGES * 10)]
+    rows = 0
+    timings = []
+    for season in range(SEASONS):
+        for rally in range(RALLIES):
+            results = synthetic_rally(rnd, drivers, vehicles)
+            stage = rnd.choice(stages)
+            started = time.perf_counter()
+            rows += archive.append_rally(str(2020 + season), f"rally{rally:02d}", results, stage)
+            timings.append(time.perf_counter() - started)
+    return rows, timings
+
+
+def query_latency(func, args):
+    timings = []
+    for arg in args:
+        started = time.perf_counter()
+        func(*arg)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def describe(timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    return f"median {statistics.median(timings) * 1000:6.2f}ms, p95 {p95 * 1000:6.2f}ms, max {timings[-1] * 1000:6.2f}ms"
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        archive = ResultsArchive(directory)
+        rows, append_timings = ingest(archive)
+        elapsed = sum(append_timings)
+        print(f"ingested {rows} rows ({SEASONS} seasons x {RALLIES} rallies x {FIELD} entries, totals + stage)"
+              f" in {elapsed:.2f}s, {rows / elapsed:,.0f} rows/s; per rally {describe(append_timings)}")
+
+        rnd = random.Random(2)
+        drivers = [f"driver{rnd.randrange(DRIVERS):05d}" for _ in range(QUERIES)]
+
+        # a fresh archive opens the files and builds the indexes on the first query
+        archive = ResultsArchive(directory)
+        started = time.perf_counter()
+        archive.personal_bests(drivers[0])
+        print(f"cold first query (memory maps + indexes): {(time.perf_counter() - started) * 1000:.1f}ms")
+
+        pb_stage = query_latency(archive.personal_bests, [(driver, f"stage{rnd.randrange(STAGES * 10):03d}")
+                                                          for driver in drivers])
+        pb_all = query_latency(archive.personal_bests, [(driver,) for driver in drivers])
+        trend = query_latency(archive.trend, [(driver,) for driver in drivers])
+        print(f"!pb <driver> <stage> x{QUERIES}: {describe(pb_stage)}")
+        print(f"!pb <driver>         x{QUERIES}: {describe(pb_all)}")
+        print(f"!trend <driver>      x{QUERIES}: {describe(trend)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Parse time and memory per 10k events: Event namedtuples (old fetch path) vs. CalendarEvent
+
+Run from the repository root: python -m benchmarks.bench_event_model
+"""
+import datetime
+import random
+import time
+import tracemalloc
+
+from google_calendar import Calendar, CalendarEvent
+
+COUNT = 10_000
+
+
+def synthetic_payload(count, seed=1):
+    rnd = random.Random(seed)
+    first = datetime.date(2020, 1, 1)
+    items = []
+    for i in range(count):
+        start = first + datetime.timedelta(days=rnd.randrange(0, 3650))
+        if i % 2:
+            start_field = {'date': start.isoformat()}
+            end_field = {'date': (start + datetime.timedelta(days=7)).isoformat()}
+        else:
+            start_field = {'dateTime': f"{start.isoformat()}T18:00:00+01:00"}
+            end_field = {'dateTime': f"{start.isoformat()}T21:30:00+01:00"}
+        items.append({'id': f"event{i}", 'summary': f"Rally {i % 52}", 'description': None,
+                      'start': start_field, 'end': end_field})
+    return items
+
+
+def parse_namedtuples(items):
+    now = datetime.datetime.utcnow().astimezone()
+    return [Calendar.make_event(item.get('summary'), item.get('description'),
+                                Calendar.parse_event_time(item['start']), Calendar.parse_event_time(item['end']), now)
+            for item in items]
+
+
+def parse_compact(items):
+    return [CalendarEvent.from_google(item) for item in items]
+
+
+def measure(name, parse, items):
+    started = time.perf_counter()
+    parse(items)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    result = parse(items)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    print(f"{name:>12}: {elapsed * 1000:8.2f}ms / {len(items)} events, {size / len(items):6.0f} B/event")
+
+
+def main():
+    items = synthetic_payload(COUNT)
+    measure('namedtuple', parse_namedtuples, items)
+    measure('compact', parse_compact, items)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Collision detection: linear scan (old find_events_collision) vs. IntervalIndex
+
+Run from the repository root: python -m benchmarks.bench_interval_index
+"""
+import random
+import timeit
+
+from utils.interval_index import IntervalIndex
+
+
+def synthetic_intervals(count, seed):
+    rnd = random.Random(seed)
+    intervals = []
+    for _ in range(count):
+        start = rnd.randrange(0, count * 100)
+        intervals.append((start, start + rnd.randrange(1, 300)))
+    return intervals
+
+
+def linear_overlaps(existing, start, end):
+    for existing_start, existing_end in existing:
+        if not (existing_start >= end or existing_end <= start):
+            return True
+    return False
+
+
+def main():
+    for count in (1_000, 5_000, 20_000):
+        existing = synthetic_intervals(count, seed=1)
+        queries = synthetic_intervals(1_000, seed=2)
+
+        linear = timeit.timeit(lambda: [linear_overlaps(existing, *query) for query in queries], number=1)
+        build = timeit.timeit(lambda: IntervalIndex(existing), number=1)
+        index = IntervalIndex(existing)
+        indexed = timeit.timeit(lambda: index.overlaps_many(queries), number=1)
+
+        assert [linear_overlaps(existing, *query) for query in queries] == index.overlaps_many(queries)
+        print(f"{count:>6} events x {len(queries)} queries: linear {linear * 1000:8.2f}ms, "
+              f"index build {build * 1000:6.2f}ms + query {indexed * 1000:6.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Results provider against the fake leaderboard server: cold, revalidated and cached fetches
+
+Run from the repository root: python -m benchmarks.bench_results_provider
+"""
+import asyncio
+import time
+
+from bubla.results import HttpResultsProvider
+from benchmarks.fake_results_server import FakeResultsServer
+
+
+async def timed(coro):
+    started = time.perf_counter()
+    result = await coro
+    return result, time.perf_counter() - started
+
+
+async def run(entries, latency, port):
+    server = FakeResultsServer(entries=entries, latency=latency, port=port)
+    await server.start()
+    try:
+        for concurrency in (1, 4, 8):
+            provider = HttpResultsProvider(server.url, concurrency=concurrency, page_size=100, max_age=0)
+            server.requests = server.not_modified = 0
+            rows, cold = await timed(provider.get_results('week1'))
+            _, revalidated = await timed(provider.get_results('week1'))
+            assert len(rows) == entries
+            print(f"{entries:>5} rows, concurrency {concurrency}: cold {cold * 1000:7.1f}ms,"
+                  f" revalidated {revalidated * 1000:7.1f}ms"
+                  f" ({server.not_modified}/{server.requests} requests answered 304)")
+            await provider.close()
+
+        provider = HttpResultsProvider(server.url, concurrency=4, max_age=60)
+        await provider.get_results('week1')
+        _, cached = await timed(provider.get_results('week1'))
+        print(f"{entries:>5} rows, within max_age: {cached * 1e6:.0f}us, no request")
+        await provider.close()
+    finally:
+        await server.stop()
+
+
+def main():
+    asyncio.run(run(entries=1000, latency=0.05, port=8089))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Stage times of 100k result rows: per row string parsing vs. the vectorized ResultSet
+
+Run from the repository root: python -m benchmarks.bench_stage_times
+"""
+import random
+import time
+
+from bubla.stage_times import ResultSet, format_times, parse_times
+
+COUNT = 100_000
+
+
+def synthetic_rows(count, seed=1):
+    rnd = random.Random(seed)
+    rows = []
+    for rank in range(1, count + 1):
+        stage = rnd.randrange(500_000, 900_000)
+        total = rnd.randrange(2_400_000, 7_200_000)
+        rows.append({'rank': rank, 'name': f"driver{rank:06d}", 'isDnfEntry': rnd.random() < 0.03,
+                     'stageTime': format_times([stage])[0], 'totalTime': format_times([total])[0]})
+    rnd.shuffle(rows)
+    return rows
+
+
+def parse_time_str(value):
+    """Per row parsing, as a string based implementation would do it"""
+    if not value or value == '--':
+        return None
+    parts = value.lstrip('+').split(':')
+    seconds, millis = parts[-1].split('.')
+    ms = int(seconds) * 1000 + int(millis) + int(parts[-2]) * 60_000
+    if len(parts) == 3:
+        ms += int(parts[0]) * 3_600_000
+    return ms
+
+
+def per_row(rows):
+    parsed = [(parse_time_str(row['totalTime']), parse_time_str(row['stageTime']), row) for row in rows]
+    finished = sorted((item for item in parsed if not item[2]['isDnfEntry']), key=lambda item: item[0])
+    dnf = [item for item in parsed if item[2]['isDnfEntry']]
+    leader = finished[0][0]
+    best_stage = min(item[1] for item in finished)
+    previous = leader
+    result = []
+    for total, stage, row in finished:
+        result.append((row['name'], total - leader, total - previous, stage - best_stage))
+        previous = total
+    return result + [(row['name'], None, None, None) for _, _, row in dnf]
+
+
+def best_of(func, repeat=3):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    rows = synthetic_rows(COUNT)
+    totals = [row['totalTime'] for row in rows]
+
+    str_parse = best_of(lambda: [parse_time_str(value) for value in totals])
+    vector_parse = best_of(lambda: parse_times(totals))
+    assert parse_times(totals).tolist() == [parse_time_str(value) for value in totals]
+
+    str_full = best_of(lambda: per_row(rows))
+    vector_full = best_of(lambda: ResultSet(rows))
+    render = best_of(lambda: ResultSet(rows).display_rows(['rank', 'name', 'totalTime', 'totalDiff', 'interval'], 30))
+
+    result_set = ResultSet(rows)
+    expected = per_row(rows)
+    assert [rows[index]['name'] for index in result_set.order.tolist()] == [item[0] for item in expected]
+    assert result_set.total_diff[:result_set.finishers].tolist() == [item[1] for item in expected
+                                                                      if item[1] is not None]
+
+    print(f"{COUNT} totals parsed: per row {str_parse * 1000:7.1f}ms, vectorized {vector_parse * 1000:6.1f}ms")
+    print(f"{COUNT} rows parsed, sorted, diffs: per row {str_full * 1000:7.1f}ms,"
+          f" ResultSet {vector_full * 1000:6.1f}ms, + top 30 rendered {render * 1000:6.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Championship standings: dict-based rows (render_standings path) vs. the NumPy StandingsEngine
+
+Both sides start from raw per event results and produce table rows; tabulate is left out.
+
+Run from the repository root: python -m benchmarks.bench_standings
+"""
+import random
+import time
+
+from bubla.standings import CLUB_POINTS, StandingsEngine
+
+
+def synthetic_season(drivers, events, seed=1):
+    rnd = random.Random(seed)
+    names = [f"driver{index:05d}" for index in range(drivers)]
+    season = []
+    for _ in range(events):
+        entrants = rnd.sample(names, k=int(drivers * 0.8))
+        season.append([{'rank': rank, 'name': name, 'isDnfEntry': rnd.random() < 0.05}
+                       for rank, name in enumerate(entrants, start=1)])
+    return season
+
+
+def dict_standings(season, points_table=CLUB_POINTS):
+    """Per driver dicts of event points, merged into rows as render_standings does"""
+    event_points = {}
+    for event, rows in enumerate(season):
+        for row in rows:
+            points = 0 if row['isDnfEntry'] or row['rank'] > len(points_table) else points_table[row['rank'] - 1]
+            event_points.setdefault(row['name'], {})[event] = points
+    data = [{'displayName': name, 'totalPoints': sum(points.values()),
+             'eventPoints': [{'eventIndex': event, 'points': points.get(event, 0)} for event in range(len(season))]}
+            for name, points in event_points.items()]
+    data.sort(key=lambda line: -line['totalPoints'])
+    results = []
+    for rank, line in enumerate(data, start=1):
+        line['rank'] = rank
+        eventpoints = {item['eventIndex']: item['points'] for item in line['eventPoints']}
+        line_result = {k: line[k] for k in ['rank', 'displayName', 'totalPoints']}
+        results.append(line_result | eventpoints)
+    return results
+
+
+def best_of(func, repeat=5):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    engine = StandingsEngine()
+    for drivers, events in ((100, 12), (1_000, 24), (5_000, 36)):
+        season = synthetic_season(drivers, events)
+        names, positions, dnf = engine.position_matrix(season)
+
+        by_dict = best_of(lambda: dict_standings(season))
+        full = best_of(lambda: engine.compute(season).table())
+        matrix = best_of(lambda: engine.position_matrix(season))
+        ranking = best_of(lambda: engine.rank(positions, dnf))
+
+        dict_totals = sorted(line['totalPoints'] for line in dict_standings(season))
+        assert dict_totals == sorted(engine.compute(season).totals.tolist())
+        print(f"{drivers:>5} drivers x {events} events: dicts {by_dict * 1000:7.2f}ms,"
+              f" engine {full * 1000:7.2f}ms (matrix build {matrix * 1000:6.2f}ms,"
+              f" points/countback/ranks {ranking * 1000:5.2f}ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Local stand-in for the club leaderboard HTTP source used by bubla.results.HttpResultsProvider
+
+Serves deterministic, real-shaped results and standings with pagination, ETag /
+Last-Modified validators and an artificial per request latency. Point the bot at it with
+"results_provider": "http", "results_url": "http://127.0.0.1:8088".
+
+Run from the repository root: python -m benchmarks.fake_results_server --entries 500
+"""
+import argparse
+import asyncio
+import email.utils
+import hashlib
+import json
+import random
+import time
+
+from aiohttp import web
+
+VEHICLES = ['ŠKODA Fabia R5', 'Ford Fiesta R5', 'Mitsubishi Space Star R5', 'Citroën C3 R5', 'Peugeot 208 T16 R5']
+
+
+def format_time(ms, sign=False):
+    hours, rest = divmod(ms, 3_600_000)
+    minutes, rest = divmod(rest, 60_000)
+    seconds, millis = divmod(rest, 1000)
+    text = f"{minutes:02d}:{seconds:02d}.{millis:03d}"
+    if hours:
+        text = f"{hours:02d}:{text}"
+    return f"+{text}" if sign else text
+
+
+def make_results(event_key, count):
+    rnd = random.Random(event_key)
+    drivers = []
+    for index in range(count):
+        dnf = rnd.random() < 0.05
+        stage = 1_800_000 if dnf else rnd.randrange(540_000, 780_000)
+        total = stage + rnd.randrange(2_000_000, 2_600_000) + (3_600_000 if dnf else 0)
+        drivers.append((total, stage, dnf, f"driver{index:05d}", rnd.choice(VEHICLES)))
+    drivers.sort()
+    leader_total, leader_stage = drivers[0][0], min(driver[1] for driver in drivers)
+    return [{'rank': rank, 'name': name, 'isVIP': False, 'isFounder': False, 'isPlayer': False, 'isDnfEntry': dnf,
+             'playerDiff': 0, 'vehicleName': vehicle, 'stageTime': format_time(stage),
+             'stageDiff': format_time(stage - leader_stage, sign=True) if stage != leader_stage else '--',
+             'totalTime': format_time(total),
+             'totalDiff': format_time(total - leader_total, sign=True) if rank > 1 else '--',
+             'nationality': 'eLngCzech'}
+            for rank, (total, stage, dnf, name, vehicle) in enumerate(drivers, start=1)]
+
+
+def make_standings(season, count, events=12, played=4):
+    rnd = random.Random(season)
+    rows = []
+    for index in range(count):
+        points = [rnd.randrange(0, 11) if event < played else 0 for event in range(events)]
+        rows.append({'isMe': False, 'nationality': 'eLngCzech', 'displayName': f"driver{index:05d}",
+                     'totalPoints': sum(points),
+                     'eventPoints': [{'eventIndex': event, 'points': value} for event, value in enumerate(points)]})
+    rows.sort(key=lambda row: -row['totalPoints'])
+    for rank, row in enumerate(rows, start=1):
+        row['rank'] = rank
+    return rows
+
+
+class FakeResultsServer:
+    def __init__(self, entries=500, latency=0.05, host='127.0.0.1', port=8088):
+        self.entries = entries
+        self.latency = latency
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.not_modified = 0
+        self.last_modified = email.utils.formatdate(time.time(), usegmt=True)
+        self._documents = {}
+        self._runner = None
+
+    def documents(self, kind, key):
+        if (kind, key) not in self._documents:
+            rows = make_results(key, self.entries) if kind == 'results' else make_standings(key, self.entries)
+            self._documents[(kind, key)] = rows
+        return self._documents[(kind, key)]
+
+    def touch(self, kind, key):
+        """Regenerate a document, as if new times were posted"""
+        self._documents.pop((kind, key), None)
+        self.entries += 1
+        self.last_modified = email.utils.formatdate(time.time(), usegmt=True)
+
+    async def handle(self, request, kind):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        rows = self.documents(kind, request.match_info['key'])
+        page = int(request.query.get('page', 1))
+        page_size = int(request.query.get('pageSize', 100))
+        page_count = max(1, -(-len(rows) // page_size))
+        body = json.dumps({'entries': rows[(page - 1) * page_size:page * page_size],
+                           'page': page, 'pageCount': page_count}).encode()
+        etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        headers = {'ETag': etag, 'Last-Modified': self.last_modified}
+        if request.headers.get('If-None-Match') == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=body, content_type='application/json', headers=headers)
+
+    async def results(self, request):
+        return await self.handle(request, 'results')
+
+    async def standings(self, request):
+        return await self.handle(request, 'standings')
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/events/{key}/results', self.results)
+        app.router.add_get('/championships/{key}/standings', self.standings)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        # port 0 binds a free port
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8088)
+    parser.add_argument('--entries', type=int, default=500, help="rows per event / championship")
+    parser.add_argument('--latency-ms', type=float, default=50, help="delay of every response")
+    return parser.parse_args()
+
+
+async def serve(args):
+    server = FakeResultsServer(args.entries, args.latency_ms / 1000, args.host, args.port)
+    await server.start()
+    print(f"serving {args.entries} entries on {server.url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == '__main__':
+    asyncio.run(serve(parse_args()))
@@ -1,2 +1,10 @@
-from .bubla import Bubla
-from . import cogs
\ No newline at end of file
+def __getattr__(name):
+    """Bubla is imported on first access, its class body reads the config file
+
+    Standalone modules (results, standings, stage_times, archive, ...) can be imported
+    without a config, e.g. by the benchmarks.
+    """
+    if name == 'Bubla':
+        from .bubla import Bubla
+        return Bubla
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
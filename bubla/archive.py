@@ -0,0 +1,267 @@
+import logging
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from .stage_times import MISSING, parse_times
+
+log = logging.getLogger(__name__)
+
+# stage name of whole rally (total time) records
+TOTAL = ''
+
+# column name -> dtype of its file
+COLUMNS = {
+    'event': np.int32,
+    'stage': np.int32,
+    'driver': np.int32,
+    'vehicle': np.int32,
+    'time_ms': np.int32,
+    'rank': np.int32,
+    'dnf': np.bool_,
+}
+# string dictionaries, column values are line numbers
+DICTIONARIES = {'event': 'events.txt', 'stage': 'stages.txt', 'driver': 'drivers.txt', 'vehicle': 'vehicles.txt'}
+
+PersonalBest = namedtuple('PersonalBest', ['season', 'stage', 'time_ms', 'event', 'vehicle'])
+TrendPoint = namedtuple('TrendPoint', ['season', 'event', 'rank', 'field', 'time_ms', 'gap_ms'])
+
+
+class StringDictionary:
+    """Append-only string <-> id mapping kept in a text file, one string per line"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.strings = []
+        self.ids = {}
+        if os.path.exists(filename):
+            with open(filename, encoding='utf-8') as f:
+                self.strings = f.read().split('\n')[:-1]
+            self.ids = {string: index for index, string in enumerate(self.strings)}
+        self._pending = []
+
+    def encode(self, string):
+        string = string.replace('\n', ' ')
+        index = self.ids.get(string)
+        if index is None:
+            index = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+            self._pending.append(string)
+        return index
+
+    def flush(self):
+        if self._pending:
+            with open(self.filename, 'a', encoding='utf-8') as f:
+                f.write(''.join(f"{string}\n" for string in self._pending))
+            self._pending = []
+
+
+class Season:
+    """Results of one season: one append-only file per column plus string dictionaries
+
+    Columns are read through read-only memory maps. Row lists per driver, vehicle and
+    stage (CSR style: rows sorted by key + offsets) are built on first use after an append.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.name = os.path.basename(directory)
+        os.makedirs(directory, exist_ok=True)
+        self.dictionaries = {column: StringDictionary(os.path.join(directory, filename))
+                             for column, filename in DICTIONARIES.items()}
+        self._columns = None
+        self._indexes = {}
+        self._repair()
+
+    def column_filename(self, column):
+        return os.path.join(self.directory, f"{column}.col")
+
+    def _repair(self):
+        """Cut every column to the shortest one, an interrupted append leaves them uneven"""
+        lengths = [os.path.getsize(self.column_filename(column)) // np.dtype(dtype).itemsize
+                   if os.path.exists(self.column_filename(column)) else 0
+                   for column, dtype in COLUMNS.items()]
+        rows = min(lengths)
+        for (column, dtype), length in zip(COLUMNS.items(), lengths):
+            if length != rows:
+                log.warning(f"archive {self.name}: {column} column cut from {length} to {rows} rows")
+                with open(self.column_filename(column), 'r+b') as f:
+                    f.truncate(rows * np.dtype(dtype).itemsize)
+
+    @property
+    def columns(self):
+        if self._columns is None:
+            self._columns = {}
+            for column, dtype in COLUMNS.items():
+                filename = self.column_filename(column)
+                if os.path.exists(filename) and os.path.getsize(filename):
+                    self._columns[column] = np.memmap(filename, dtype=dtype, mode='r')
+                else:
+                    self._columns[column] = np.empty(0, dtype=dtype)
+        return self._columns
+
+    def __len__(self):
+        return len(self.columns['time_ms'])
+
+    def append(self, event, stage, rows, time_field):
+        """Add the results of one stage (or the rally total with stage TOTAL)
+
+        :param rows: result rows (name, vehicleName, rank, isDnfEntry and `time_field`)
+        :return: number of rows appended
+        """
+        if not rows:
+            return 0
+        times = parse_times([row.get(time_field) for row in rows])
+        dnf = np.array([bool(row.get('isDnfEntry', False)) for row in rows]) | (times == MISSING)
+        data = {
+            'event': np.full(len(rows), self.dictionaries['event'].encode(event)),
+            'stage': np.full(len(rows), self.dictionaries['stage'].encode(stage)),
+            'driver': [self.dictionaries['driver'].encode(row['name']) for row in rows],
+            'vehicle': [self.dictionaries['vehicle'].encode(row.get('vehicleName') or '') for row in rows],
+            'time_ms': np.where(dnf, MISSING, times),
+            'rank': [row.get('rank', 0) for row in rows],
+            'dnf': dnf,
+        }
+        # dictionaries first, a column row never points past them
+        for dictionary in self.dictionaries.values():
+            dictionary.flush()
+        for column, dtype in COLUMNS.items():
+            with open(self.column_filename(column), 'ab') as f:
+                f.write(np.asarray(data[column], dtype=dtype).tobytes())
+        self._columns = None
+        self._indexes = {}
+        return len(rows)
+
+    def index(self, column):
+        """(row numbers sorted by the column value, offsets), rows of value v are order[offsets[v]:offsets[v + 1]]"""
+        if column not in self._indexes:
+            values = self.columns[column]
+            order = np.argsort(values, kind='stable')
+            counts = np.bincount(values, minlength=len(self.dictionaries[column].strings))
+            offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+            np.cumsum(counts, out=offsets[1:])
+            self._indexes[column] = (order, offsets)
+        return self._indexes[column]
+
+    def rows_of(self, column, string):
+        value = self.dictionaries[column].ids.get(string)
+        if value is None:
+            return np.empty(0, dtype=np.int64)
+        order, offsets = self.index(column)
+        return order[offsets[value]:offsets[value + 1]]
+
+    def personal_bests(self, driver, stage=None):
+        """Best time of the driver per stage (only `stage` when given), rally totals excluded"""
+        rows = self.rows_of('driver', driver)
+        if not len(rows):
+            return []
+        columns = self.columns
+        stages = columns['stage'][rows]
+        keep = ~columns['dnf'][rows] & (stages != self.dictionaries['stage'].ids.get(TOTAL, -1))
+        if stage is not None:
+            keep &= stages == self.dictionaries['stage'].ids.get(stage, -1)
+        rows, stages = rows[keep], stages[keep]
+        if not len(rows):
+            return []
+        # best row per stage: sort by (stage, time) and take the first of each stage
+        by_stage_time = np.lexsort((columns['time_ms'][rows], stages))
+        rows, stages = rows[by_stage_time], stages[by_stage_time]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = stages[1:] != stages[:-1]
+        strings = {column: self.dictionaries[column].strings for column in ('stage', 'event', 'vehicle')}
+        return [PersonalBest(self.name, strings['stage'][columns['stage'][row]], int(columns['time_ms'][row]),
+                             strings['event'][columns['event'][row]], strings['vehicle'][columns['vehicle'][row]])
+                for row in rows[first].tolist()]
+
+    def rally_summary(self):
+        """(field size, winner total time) per event, built with the indexes"""
+        if 'rally' not in self._indexes:
+            columns = self.columns
+            totals = self.rows_of('stage', TOTAL)
+            events = columns['event'][totals]
+            field = np.bincount(events, minlength=len(self.dictionaries['event'].strings))
+            finished = ~columns['dnf'][totals]
+            winner = np.full(len(field), np.iinfo(np.int32).max, dtype=np.int64)
+            np.minimum.at(winner, events[finished], columns['time_ms'][totals][finished])
+            self._indexes['rally'] = (field, winner)
+        return self._indexes['rally']
+
+    def trend(self, driver):
+        """Rally results of the driver in archive order: rank, field size and gap to the winner"""
+        rows = self.rows_of('driver', driver)
+        total_stage = self.dictionaries['stage'].ids.get(TOTAL)
+        if not len(rows) or total_stage is None:
+            return []
+        columns = self.columns
+        rows = rows[columns['stage'][rows] == total_stage]
+        field, winner = self.rally_summary()
+        events = self.dictionaries['event'].strings
+        result = []
+        for event, rank, time_ms, dnf in zip(columns['event'][rows].tolist(), columns['rank'][rows].tolist(),
+                                             columns['time_ms'][rows].tolist(), columns['dnf'][rows].tolist()):
+            if dnf:
+                result.append(TrendPoint(self.name, events[event], None, int(field[event]), None, None))
+            else:
+                result.append(TrendPoint(self.name, events[event], rank, int(field[event]), time_ms,
+                                         time_ms - int(winner[event])))
+        return result
+
+
+class ResultsArchive:
+    """Per season columnar archive of stage and rally results, see :class:`Season`
+
+    Safe to use from worker threads; appends and queries are serialized.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._seasons = {}
+        self._lock = threading.Lock()
+
+    def season(self, name):
+        season = self._seasons.get(name)
+        if season is None:
+            season = self._seasons[name] = Season(os.path.join(self.directory, name))
+        return season
+
+    def season_names(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory)
+                      if os.path.isdir(os.path.join(self.directory, name)))
+
+    def append(self, season, event, stage, rows, time_field='stageTime'):
+        with self._lock:
+            return self.season(season).append(event, stage, rows, time_field)
+
+    def append_rally(self, season, event, rows, stage=None):
+        """Archive rally totals and, when the stage is known, its stage times
+
+        An event already in the season is skipped, archiving the same rally twice is harmless.
+        """
+        with self._lock:
+            if event in self.season(season).dictionaries['event'].ids:
+                log.debug(f"{event} already archived in season {season}")
+                return 0
+            appended = self.season(season).append(event, TOTAL, rows, 'totalTime')
+            if stage:
+                appended += self.season(season).append(event, stage, rows, 'stageTime')
+        log.info(f"archived {appended} row(s) of {event} into season {season}")
+        return appended
+
+    def personal_bests(self, driver, stage=None):
+        """Best time per stage over all seasons"""
+        with self._lock:
+            bests = [best for name in self.season_names() for best in self.season(name).personal_bests(driver, stage)]
+        overall = {}
+        for best in bests:
+            if best.stage not in overall or best.time_ms < overall[best.stage].time_ms:
+                overall[best.stage] = best
+        return sorted(overall.values(), key=lambda best: best.stage)
+
+    def trend(self, driver, last=10):
+        with self._lock:
+            points = [point for name in self.season_names() for point in self.season(name).trend(driver)]
+        return points[-last:]
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+import time
+from collections import namedtuple
+
+log = logging.getLogger(__name__)
+
+Delivery = namedtuple('Delivery', ['channel', 'error', 'elapsed'])
+
+
+class BroadcastReport:
+    def __init__(self, deliveries, elapsed):
+        self.deliveries = deliveries
+        self.elapsed = elapsed
+
+    @property
+    def succeeded(self):
+        return [delivery for delivery in self.deliveries if delivery.error is None]
+
+    @property
+    def failed(self):
+        return [delivery for delivery in self.deliveries if delivery.error is not None]
+
+    def __str__(self):
+        return (f"broadcast to {len(self.deliveries)} channel(s) took {self.elapsed:.2f}s, "
+                f"{len(self.succeeded)} ok, {len(self.failed)} failed")
+
+
+async def broadcast(channels, messages, concurrency=5) -> BroadcastReport:
+    """Send the same messages to many channels concurrently
+
+    At most `concurrency` channels are served at once; messages within a channel keep
+    their order. discord.py's HTTP client queues requests on its per-route rate limit
+    buckets (and retries on 429), so the semaphore only bounds how much we ask for in
+    parallel. A failing channel does not stop the others.
+
+    :param channels: anything with an async `send`, usually discord.TextChannel
+    :param messages: list of message contents, already rendered
+    :param concurrency: max number of channels served in parallel
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def deliver(channel):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                for message in messages:
+                    await channel.send(message)
+            except Exception as e:
+                log.error(f"delivery to {channel} failed: {type(e).__name__}: {e}")
+                return Delivery(channel, e, time.perf_counter() - started)
+            return Delivery(channel, None, time.perf_counter() - started)
+
+    started = time.perf_counter()
+    deliveries = []
+    if messages:
+        deliveries = await asyncio.gather(*(deliver(channel) for channel in channels))
+    report = BroadcastReport(deliveries, time.perf_counter() - started)
+    log.info(str(report))
+    return report
@@ -1,18 +1,55 @@
+import asyncio
 import datetime
 import logging
 import random
-from utils import config
+import time
+from utils import config, loop_monitor
+from utils.metrics import MetricsServer, metrics
+from utils.render_cache import render_cache
+from utils.startup import startup_timer
+
+import google_calendar
+from google_calendar.CalendarEvent import date_to_epoch
 
 import discord
 from discord.ext import commands, tasks
 
-from . import cogs
+from . import results
+from .channel_registry import ChannelRegistry
+from .database import Database
 
 log = logging.getLogger(__name__)
 
 intents = discord.Intents.default()
 intents.message_content = True
 
+command_calls = metrics.counter('discord_commands_total', "Invoked commands", ['cog', 'command', 'status'])
+command_latency = metrics.histogram('discord_command_latency_seconds', "Command handling time", ['cog', 'command'])
+rest_calls = metrics.counter('discord_rest_calls_total', "Discord REST API calls", ['method', 'route', 'status'])
+rest_latency = metrics.histogram('discord_rest_latency_seconds', "Discord REST API call latency",
+                                 ['method', 'route'])
+
+
+def cache_stats():
+    """cache name -> (hits, misses, size)"""
+    date_cache = date_to_epoch.cache_info()
+    return {
+        'render': (render_cache.hits, render_cache.misses, len(render_cache)),
+        'date_to_epoch': (date_cache.hits, date_cache.misses, date_cache.currsize),
+    }
+
+
+metrics.gauge('cache_lookups', "Cache lookups by result", ['cache', 'result'], func=lambda: {
+    (name, result): count
+    for name, (hits, misses, _) in cache_stats().items()
+    for result, count in (('hit', hits), ('miss', misses))
+})
+metrics.gauge('cache_hit_ratio', "Share of cache lookups served from the cache", ['cache'], func=lambda: {
+    (name,): hits / (hits + misses) if hits + misses else 0.0 for name, (hits, misses, _) in cache_stats().items()
+})
+metrics.gauge('cache_entries', "Entries held by the cache", ['cache'],
+              func=lambda: {(name,): size for name, (_, _, size) in cache_stats().items()})
+
 
 class Bubla(commands.Bot):
     cogs_list = [
@@ -37,25 +74,112 @@ class Bubla(commands.Bot):
         """
         self.config = config
         self.prefix = config.DISCORD_COMMAND_PREFIX
-        self.database = None
+        self.database = Database(config.DATABASE_FILENAME)
+        self.calendar = google_calendar.AsyncCalendar.from_config(config)
+        self.event_store = google_calendar.EventStore(self.calendar,
+                                                      refresh_interval=config.CALENDAR_REFRESH_INTERVAL,
+                                                      fetch_limit=config.CALENDAR_FETCH_LIMIT,
+                                                      incremental=config.CALENDAR_INCREMENTAL_SYNC,
+                                                      database=self.database,
+                                                      snapshot_filename=config.CALENDAR_SNAPSHOT_FILENAME,
+                                                      upcoming_limit=config.CALENDAR_UPCOMING_LIMIT)
+        self.loop_lag = loop_monitor.LoopLagMonitor()
+        self.channel_registry = ChannelRegistry()
+        self.results = results.from_config(config)
+        # NumPy backed, built in setup_hook
+        self.archive = None
+        self.metrics = metrics
+        self.metrics_server = None
+        if config.METRICS_PORT:
+            self.metrics_server = MetricsServer(metrics, config.METRICS_HOST, config.METRICS_PORT)
+        self.before_invoke(self.track_command_start)
+        self.after_invoke(self.track_command_end)
+        self.instrument_http()
+        self.register_credential_metrics()
+
+    def register_credential_metrics(self) -> None:
+        """Background refreshes of the Google credentials, read from the manager at collection time"""
+        manager = self.calendar.calendar.credential_manager
+        metrics.gauge('google_credential_refreshes', "Credential refreshes by result", ['result'],
+                      func=lambda: {('ok',): manager.refresh_count, ('failed',): manager.refresh_failures})
+        metrics.gauge('google_credential_refresh_latency_seconds', "Duration of the last credential refresh",
+                      func=lambda: manager.last_refresh_latency or 0.0)
+        metrics.gauge('google_credential_next_refresh_seconds', "Time until the next background refresh",
+                      func=lambda: manager.seconds_until_refresh() or 0.0)
+
+    def instrument_http(self) -> None:
+        """Count and time every Discord REST call, per route template"""
+        request = self.http.request
+
+        async def instrumented_request(route, **kwargs):
+            started = time.perf_counter()
+            status = 'error'
+            try:
+                response = await request(route, **kwargs)
+                status = 'ok'
+                return response
+            except discord.HTTPException as e:
+                status = str(e.status)
+                raise
+            finally:
+                rest_calls.inc(method=route.method, route=route.path, status=status)
+                rest_latency.observe(time.perf_counter() - started, method=route.method, route=route.path)
+
+        self.http.request = instrumented_request
+
+    async def track_command_start(self, ctx: commands.Context) -> None:
+        ctx.invoke_started = time.perf_counter()
+
+    async def track_command_end(self, ctx: commands.Context) -> None:
+        cog = ctx.cog.qualified_name if ctx.cog else ''
+        command = ctx.command.qualified_name
+        command_calls.inc(cog=cog, command=command, status='error' if ctx.command_failed else 'ok')
+        command_latency.observe(time.perf_counter() - ctx.invoke_started, cog=cog, command=command)
+
+    async def load_cog(self, cog_name) -> None:
+        started = time.perf_counter()
+        try:
+            await self.load_extension(f"bubla.cogs.{cog_name}")
+            log.info(f"Cog {cog_name} loaded in {(time.perf_counter() - started) * 1000:.0f}ms")
+        except Exception as e:
+            exception = f"{type(e).__name__}: {e}"
+            log.error(f"failed to load {cog_name}\n{exception}")
 
     async def load_cogs(self) -> None:
-
-        for cog_name in self.cogs_list:
-            try:
-                await self.load_extension(f"bubla.cogs.{cog_name}")
-                log.info(f"Cog {cog_name} loaded")
-            except Exception as e:
-                exception = f"{type(e).__name__}: {e}"
-                log.error(f"failed to load {cog_name}\n{exception}")
+        # cogs do not depend on each other, their async setup (cog_load) runs concurrently
+        await asyncio.gather(*(self.load_cog(cog_name) for cog_name in self.cogs_list))
 
     async def setup_hook(self) -> None:
         log.info("-------------------")
-        await self.load_cogs()
+        with startup_timer.phase('restore'):
+            await self.database.open()
+            await self.event_store.restore()
+        with startup_timer.phase('cog load'):
+            from .archive import ResultsArchive
+            self.archive = ResultsArchive(config.ARCHIVE_DIRECTORY)
+            await self.load_cogs()
+        self.loop_lag.start()
+        self.calendar.start()
+        self.event_store.start()
         self.status_task.start()
         # self.timed_hello.start()
-
-    @tasks.loop(minutes=1.0)
+        if self.metrics_server is not None:
+            try:
+                await self.metrics_server.start()
+            except OSError as e:
+                log.error(f"metrics endpoint not started: {e}")
+        startup_timer.begin('gateway connect')
+
+    async def close(self) -> None:
+        self.event_store.stop()
+        self.calendar.close()
+        await self.results.close()
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        await super().close()
+        await self.database.close()
+
+    @tasks.loop(minutes=config.DISCORD_STATUS_INTERVAL)
     async def status_task(self) -> None:
         statuses = ["DiRT Rally", "Dirt Rally 2.0", "Richard Burns Rally", "EA WRC"]
         await self.change_presence(activity=discord.Game(random.choice(statuses)))
@@ -85,17 +209,28 @@ class Bubla(commands.Bot):
             return
         await self.process_commands(message)
 
-    async def get_reminder_channels(self) -> list[discord.TextChannel]:
-        guilds = self.fetch_guilds()
-        log.info(f"guilds: {guilds}")
-        reminder_channels = []
-        async for guild in guilds:
-            log.info(f"guild: {guild}")
-            guild_channels = await guild.fetch_channels()
-            log.info(f"guild_channels: {guild_channels}")
-            tmp_channels = [channel for channel in guild_channels
-                            if channel.name == config.DISCORD_REMINDER_CHANNEL_NAME]
-            reminder_channels += tmp_channels
-            log.info(f"tmp_channels: {tmp_channels}")
-        log.info(f"reminder_channels: {reminder_channels}")
+    async def on_ready(self) -> None:
+        self.channel_registry.rebuild(self.guilds)
+        if startup_timer.running('gateway connect'):
+            startup_timer.end('gateway connect')
+            log.info(startup_timer.report())
+
+    async def on_guild_join(self, guild: discord.Guild) -> None:
+        self.channel_registry.add_guild(guild)
+
+    async def on_guild_remove(self, guild: discord.Guild) -> None:
+        self.channel_registry.remove_guild(guild)
+
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel) -> None:
+        self.channel_registry.add(channel)
+
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel) -> None:
+        self.channel_registry.add(after)
+
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        self.channel_registry.remove(channel)
+
+    def get_reminder_channels(self) -> list[discord.TextChannel]:
+        reminder_channels = self.channel_registry.by_name(config.DISCORD_REMINDER_CHANNEL_NAME)
+        log.debug(f"{len(reminder_channels)} reminder channel(s)")
         return reminder_channels
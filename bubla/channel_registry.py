@@ -0,0 +1,57 @@
+import logging
+from collections import defaultdict
+
+import discord
+
+log = logging.getLogger(__name__)
+
+
+class ChannelRegistry:
+    """Text channels of all joined guilds indexed by name
+
+    Built from the gateway cache and kept current by the guild/channel events,
+    so lookups cost no REST calls.
+    """
+
+    def __init__(self):
+        self._by_name = defaultdict(dict)
+        self._names = {}
+
+    def rebuild(self, guilds):
+        self._by_name.clear()
+        self._names.clear()
+        for guild in guilds:
+            self.add_guild(guild)
+        log.info(f"channel registry built, {len(self._names)} text channel(s)")
+
+    def add_guild(self, guild: discord.Guild):
+        for channel in guild.text_channels:
+            self.add(channel)
+
+    def remove_guild(self, guild: discord.Guild):
+        for channel_id in [channel_id for channel_id, (guild_id, _) in self._names.items() if guild_id == guild.id]:
+            self._discard(channel_id)
+
+    def add(self, channel):
+        if not isinstance(channel, discord.TextChannel):
+            return
+        self._discard(channel.id)
+        self._names[channel.id] = (channel.guild.id, channel.name)
+        self._by_name[channel.name][channel.id] = channel
+
+    def remove(self, channel):
+        self._discard(channel.id)
+
+    def _discard(self, channel_id):
+        entry = self._names.pop(channel_id, None)
+        if entry is None:
+            return
+        _, name = entry
+        channels = self._by_name.get(name)
+        if channels is not None:
+            channels.pop(channel_id, None)
+            if not channels:
+                del self._by_name[name]
+
+    def by_name(self, name) -> list[discord.TextChannel]:
+        return list(self._by_name.get(name, {}).values())
@@ -1 +1 @@
-from . import general, rally_calendar
\ No newline at end of file
+"""Bot extensions, loaded by name with :meth:`bubla.Bubla.load_extension`"""
@@ -1,11 +1,15 @@
 import datetime
+import io
 import logging
+import threading
 
 import discord
 import tabulate
 
-import google_calendar
 from utils import config
+from utils.interval_index import IntervalIndex, scheduled_event_interval
+from utils.loop_monitor import SlowCallbackDetector
+from utils.profiler import AllocationTracer, SamplingProfiler
 from discord.ext import commands, tasks
 
 log = logging.getLogger(__name__)
@@ -14,12 +18,86 @@ log = logging.getLogger(__name__)
 class Dev(commands.Cog, name="dev"):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-        self.calendar = google_calendar.Calendar(config.CALENDAR_ID, config.CALENDAR_SECRET_FILENAME,
-                                                 config.CALENDAR_TOKEN_FILENAME)
+        self.calendar = bot.event_store
 
         self.start = datetime.datetime.strptime("2023-12-07", "%Y-%m-%d").astimezone()
         self.end = self.start + datetime.timedelta(days=3)
 
+        self.profiler = None
+        self.allocation_tracer = AllocationTracer()
+        self.slow_callbacks = SlowCallbackDetector()
+
+    async def cog_check(self, ctx: commands.Context) -> bool:
+        return await self.bot.is_owner(ctx.author)
+
+    async def cog_unload(self) -> None:
+        if self.profiler is not None:
+            self.profiler.stop()
+        self.slow_callbacks.stop()
+
+    @staticmethod
+    async def send_report(ctx, title, report, filename):
+        await ctx.send(title, file=discord.File(io.BytesIO(report.encode()), filename=filename))
+
+    @commands.command()
+    async def profile_start(self, ctx, interval_ms: float = 5.0, scope: str = 'loop'):
+        """Start the sampling profiler, scope 'loop' (event loop thread) or 'all' threads"""
+        if self.profiler is not None and self.profiler.running:
+            await ctx.send("Profiler already running.")
+            return
+        thread_ids = None if scope == 'all' else {threading.get_ident()}
+        self.profiler = SamplingProfiler(interval=interval_ms / 1000, thread_ids=thread_ids)
+        self.profiler.start()
+        await ctx.send(f"Profiler started, sampling {scope} every {interval_ms:g}ms.")
+
+    @commands.command()
+    async def profile_stop(self, ctx, top: int = 30):
+        """Stop the sampling profiler and send the hottest functions"""
+        if self.profiler is None or not self.profiler.running:
+            await ctx.send("Profiler is not running.")
+            return
+        await self.bot.loop.run_in_executor(None, self.profiler.stop)
+        await self.send_report(ctx, "Profile:", self.profiler.report(top), 'profile.txt')
+
+    @commands.command()
+    async def tracemalloc_start(self, ctx, frames: int = 1):
+        """Start tracing memory allocations"""
+        self.allocation_tracer.frames = frames
+        self.allocation_tracer.start()
+        await ctx.send(f"tracemalloc started, {frames} frame(s) per trace.")
+
+    @commands.command()
+    async def tracemalloc_stop(self, ctx, top: int = 30):
+        """Stop tracing memory allocations and send the top allocation sites"""
+        if not self.allocation_tracer.running:
+            await ctx.send("tracemalloc is not running.")
+            return
+        report = await self.bot.loop.run_in_executor(None, self.allocation_tracer.stop, top)
+        await self.send_report(ctx, "Allocations:", report, 'tracemalloc.txt')
+
+    @commands.command()
+    async def slow_callbacks_start(self, ctx, threshold_ms: float = 100.0):
+        """Detect callbacks blocking the event loop longer than the threshold (enables asyncio debug)"""
+        self.slow_callbacks.stop()
+        self.slow_callbacks.threshold = threshold_ms / 1000
+        self.slow_callbacks.start()
+        await ctx.send(f"Slow callback detection started, threshold {threshold_ms:g}ms.")
+
+    @commands.command()
+    async def slow_callbacks_stop(self, ctx):
+        """Stop slow callback detection and send what it found"""
+        self.slow_callbacks.stop()
+        await self.send_report(ctx, "Slow callbacks:", self.slow_callbacks.report(top=50), 'slow_callbacks.txt')
+
+    @commands.command()
+    async def looplag(self, ctx):
+        """Event loop lag and the worst slow callbacks seen so far"""
+        lines = [self.bot.loop_lag.report()]
+        if self.slow_callbacks.running or self.slow_callbacks.total:
+            lines.append(self.slow_callbacks.report())
+        report = '\n'.join(lines)
+        await ctx.send(f"```{report}```")
+
     async def make_event(self, ctx: commands.Context) -> None:
         guild = self.bot.get_guild(config.DISCORD_BOT_GUILD_ID)
         await guild.create_scheduled_event(
@@ -33,20 +111,11 @@ class Dev(commands.Cog, name="dev"):
 
         await ctx.send("Done")
 
-    def compare_event_timing(self, event, start, end):
-        if event.start_time >= end or event.end_time <= start:
-            return False
-        return True
-
     def find_events_collision(self, events, start, end):
-        log.info(f"searching for collision with {start}->{end}")
-        for event in events:
-            log.info(f"event:{event.name} {event.start_time} -> {event.end_time}")
-            if self.compare_event_timing(event, start, end):
-                log.info("collision")
-                return True
-        log.info("no collision found")
-        return False
+        index = IntervalIndex(events, key=scheduled_event_interval)
+        collisions = index.overlapping(start, end)
+        log.debug(f"{start}->{end} collides with {[event.name for event in collisions]}")
+        return bool(collisions)
 
     async def get_events(self, ctx: commands) -> None:
         guild = self.bot.get_guild(config.DISCORD_BOT_GUILD_ID)
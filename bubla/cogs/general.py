@@ -1,3 +1,5 @@
+import io
+
 import discord
 from discord import app_commands
 from discord.ext import commands
@@ -14,6 +16,16 @@ class General(commands.Cog, name="general"):
         """Greetings to you"""
         await ctx.send(f"Hello there, general {ctx.author}")
 
+    @commands.command()
+    @commands.is_owner()
+    async def stats(self, ctx):
+        """Runtime metrics: command latency, API calls, cache efficiency"""
+        report = '\n'.join([self.bot.metrics.summary(), self.bot.loop_lag.report()])
+        if len(report) > 1900:
+            await ctx.send("Runtime metrics:", file=discord.File(io.BytesIO(report.encode()), filename='stats.txt'))
+        else:
+            await ctx.send(f"```{report}```")
+
 
 async def setup(bot) -> None:
     await bot.add_cog(General(bot))
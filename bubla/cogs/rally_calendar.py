@@ -1,12 +1,16 @@
+import asyncio
 import datetime
 import logging
 
+import aiohttp
 import discord
 import tabulate
 
-import google_calendar
 from utils import config
-from discord.ext import commands, tasks
+from utils.render_cache import render_cache
+from .. import live_board, reconcile, results, scheduler, stage_times, standings
+from ..broadcast import BroadcastReport, broadcast
+from discord.ext import commands
 
 log = logging.getLogger(__name__)
 
@@ -14,28 +18,97 @@ log = logging.getLogger(__name__)
 class RallyCalendar(commands.Cog, name="rally_calendar"):
     def __init__(self, bot) -> None:
         self.bot = bot
-        self.calendar = google_calendar.Calendar(config.CALENDAR_ID, config.CALENDAR_SECRET_FILENAME,
-                                                 config.CALENDAR_TOKEN_FILENAME)
-
-        self.timed_reminder.start()
-        self.refresh_calendar.start()
-
-    def compare_event_timing(self, discord_event, calendar_event):
-        if discord_event.start_time >= calendar_event.end or discord_event.end_time <= calendar_event.start:
-            return False
-        return True
-
-    def find_events_collision(self, discord_events, calendar_event):
-        log.info(f"searching for collision with {calendar_event.start}->{calendar_event.end}")
-        for discord_event in discord_events:
-            log.info(f"event:{discord_event.name} {discord_event.start_time} -> {discord_event.end_time}")
-            if self.compare_event_timing(discord_event, calendar_event):
-                log.info("collision")
-                return True
-        log.info("no collision found")
-        return False
-
-    async def reminder_core(self, ctx):
+        self.calendar = bot.event_store
+        self.scheduler = scheduler.BoundaryScheduler(self.calendar, self.on_deadlines,
+                                                     config.DISCORD_EVENT_END_SOON_DAYS)
+        self.scheduler_task = None
+        self.reconciler = reconcile.Reconciler(reconcile.EventMapping(bot.database),
+                                               concurrency=config.DISCORD_EVENT_CONCURRENCY)
+        # (kind, key) -> rows last written to the database
+        self._stored_rows = {}
+        self.standings_engine = standings.StandingsEngine(config.STANDINGS_POINTS,
+                                                          drop_worst=config.STANDINGS_DROP_WORST,
+                                                          dnf_points=config.STANDINGS_DNF_POINTS)
+        self.live_boards = live_board.LiveBoards(bot, self.render_board, interval=config.LIVE_BOARD_INTERVAL,
+                                                 debounce=config.LIVE_BOARD_DEBOUNCE,
+                                                 min_interval=config.LIVE_BOARD_MIN_INTERVAL)
+
+    async def cog_load(self) -> None:
+        await self.reconciler.mapping.load()
+        await self.live_boards.load()
+        self.scheduler_task = asyncio.create_task(self.start_scheduler())
+
+    async def cog_unload(self) -> None:
+        if self.scheduler_task:
+            self.scheduler_task.cancel()
+        self.scheduler.stop()
+        self.live_boards.stop()
+
+    async def start_scheduler(self) -> None:
+        await self.bot.wait_until_ready()
+        try:
+            await self.calendar.ensure_loaded()
+        except Exception as e:
+            log.error(f"calendar not loaded, waiting for background refresh: {type(e).__name__}: {e}")
+        self.scheduler.start()
+        self.live_boards.start()
+
+    async def on_deadlines(self, deadlines):
+        """Rally started, is about to end or ended"""
+        # back to back rallies: one ends when the next starts, both are handled
+        ended = [deadline.event_id for deadline in deadlines if deadline.kind == scheduler.END]
+        if ended:
+            # before the reminder, the ended rally's results are still the current ones
+            await self.archive_results(ended)
+            await self.plan_next_events()
+        reminded = [deadline for deadline in deadlines if deadline.kind in (scheduler.START, scheduler.ENDS_SOON)]
+        if reminded:
+            await self.scheduled_reminder(reminded)
+
+    async def archive_results(self, event_ids):
+        """Keep the final results of ended rallies in the archive
+
+        The current results are those of the rally that just ended. Rows name their stage
+        in `stageName` when the source knows it, the rally name stands in for it otherwise.
+        """
+        events = {event.id: event for event in self.calendar.raw_events()}
+        for event_id in event_ids:
+            event = events.get(event_id)
+            if event is None:
+                log.warning(f"ended event {event_id} not in the calendar, results not archived")
+                continue
+            if self.bot.results.mock:
+                log.info(f"mock results of {event.summary} not archived")
+                continue
+            rows = await self.get_results()
+            name = f"{event.summary} ({event.end:%Y-%m-%d})"
+            stage = (rows[0].get('stageName') if rows else None) or event.summary
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self.bot.archive.append_rally, str(event.end.year), name, rows, stage)
+            except OSError as e:
+                log.error(f"results of {name} not archived: {e}")
+
+    async def cog_before_invoke(self, ctx) -> None:
+        await self.calendar.ensure_loaded()
+
+    async def scheduled_reminder(self, deadlines):
+        """Remind channels not yet reminded of these deadlines, e.g. before a restart"""
+        database = self.bot.database
+        reminded = None
+        for deadline in deadlines:
+            channel_ids = await database.reminded_channels(deadline.kind, deadline.event_id)
+            reminded = channel_ids if reminded is None else reminded & channel_ids
+        channels = [channel for channel in self.bot.get_reminder_channels() if channel.id not in reminded]
+        report = await self.reminder_core(channels)
+        if report is None:
+            return
+        delivered = [delivery.channel.id for delivery in report.succeeded]
+        for deadline in deadlines:
+            await database.record_reminders(delivered, deadline.kind, deadline.event_id)
+
+    async def reminder_core(self, channels):
+        """Compose the reminder once and deliver it to all `channels`"""
         log.debug("reminder()")
         events = self.calendar.get_events_current()
         if not events:
@@ -45,74 +118,67 @@ class RallyCalendar(commands.Cog, name="rally_calendar"):
         today = datetime.date.today()
         log.debug(event.start)
         log.debug(today)
-        message = []
+        messages = []
+        board_messages = []
+        planning = False
         if event.start.date() == today:
-            message = ["Just started today!!!!", self.calendar.format_events(events),
-                       "", "Previous week results:", preview(await self.get_leaderboard_message())]
-            ctx.send('\n'.join(message))
+            intro = ["Just started today!!!!", self.calendar.format_events(events), ""]
+            messages.append('\n'.join([*intro, "Previous week results:",
+                                        self.preview(await self.get_leaderboard_message())]))
+            # channels with a live leaderboard already show the table
+            board_messages.append('\n'.join([*intro, "Previous week results are in the pinned live board."]))
         else:
             log.info(f"event ends soon")
-            await self.rally_ends_soon(ctx)  # for notification message
-            calendar_events = self.calendar.get_events_next()  # for pre-planning new event
-
-            await self.plan_next_events(calendar_events)
-
-    async def plan_next_events(self, calendar_events):
-        if not calendar_events:
-            log.info("no events to be planned")
+            ends_soon = self.get_ends_soon_message()  # for notification message
+            if ends_soon:
+                messages.append(ends_soon)
+                board_messages.append(ends_soon)
+            planning = True
+
+        board_channel_ids = self.live_boards.channels(live_board.LEADERBOARD)
+        with_board = [channel for channel in channels if target_channel_id(channel) in board_channel_ids]
+        without_board = [channel for channel in channels if target_channel_id(channel) not in board_channel_ids]
+        reports = await asyncio.gather(
+            broadcast(without_board, messages, concurrency=config.DISCORD_BROADCAST_CONCURRENCY),
+            broadcast(with_board, board_messages, concurrency=config.DISCORD_BROADCAST_CONCURRENCY))
+        report = BroadcastReport([delivery for part in reports for delivery in part.deliveries],
+                                 max(part.elapsed for part in reports))
+        for delivery in report.failed:
+            log.warning(f"reminder not delivered to {delivery.channel}: {delivery.error}")
+
+        if planning:
+            await self.plan_next_events()
+        return report
+
+    async def plan_next_events(self):
+        """Create, update and delete Discord scheduled events to match the calendar"""
+        if self.calendar.refreshed_at is None:
+            log.info("calendar not loaded, planning skipped")
             return
-
-        log.info("planning next event")
-        guild = self.bot.get_guild(config.DISCORD_BOT_GUILD_ID)
-        discord_events = await guild.fetch_scheduled_events()
-        for calendar_event in calendar_events:
-            log.info(f"checking event {calendar_event.summary}")
-            if not self.find_events_collision(discord_events, calendar_event):
-                # create discord event
-                log.info(f"Creating event {calendar_event.summary}")
-                await guild.create_scheduled_event(
-                    name=calendar_event.summary,
-                    description=calendar_event.description,
-                    start_time=calendar_event.start,
-                    end_time=calendar_event.end,
-                    entity_type=discord.EntityType.external,
-                    privacy_level=discord.PrivacyLevel.guild_only,
-                    location="DiRT Rally 2.0"
-                )
-                continue
-            else:
-                log.info(f"event {calendar_event.summary} exists")
-
-    @tasks.loop(time=datetime.time(hour=config.CALENDAR_REFRESH_HOUR, minute=00, tzinfo=datetime.timezone.utc))
-    async def refresh_calendar(self):
-        await self.calendar.get_events_current()
-
-    @tasks.loop(time=datetime.time(hour=config.DISCORD_REMINDER_HOUR, minute=00, tzinfo=datetime.timezone.utc))
-    async def timed_reminder(self) -> None:
-        channels = await self.bot.get_reminder_channels()
-        for channel in channels:
-            await self.reminder_core(channel)
-        # channel = self.bot.get_channel(config.DISCORD_REMINDER_CHANNEL_ID)
-        # await self.reminder_core(channel)
+        guilds = [guild for guild in map(self.bot.get_guild, config.DISCORD_EVENT_GUILD_IDS) if guild is not None]
+        planned_events = self.calendar.raw_events_until(config.DISCORD_EVENT_START_SOON_DAYS)
+        # without incremental sync the store only holds the next events, absent ones are not gone
+        known_event_ids = {event.id for event in self.calendar.raw_events()} if self.calendar.complete else None
+        return await self.reconciler.reconcile(guilds, planned_events, known_event_ids, self.calendar.cancelled_ids)
 
     @commands.hybrid_command()
     async def reminder(self, ctx):
         """Manual call to initiate reminder functionality
 
-        This is done by timed event, it should not be necessary to use this manually.
+        This is done at rally boundaries, it should not be necessary to use this manually.
         """
-        await self.reminder_core(ctx)
+        # composing may take longer than an interaction may stay unanswered
+        await ctx.defer()
+        report = await self.reminder_core([ctx])
+        if report is None or not report.deliveries:
+            await ctx.send("No reminder due now.")
 
     @commands.hybrid_command()
     async def reminder2(self, ctx):
-        channels = await self.bot.get_reminder_channels()
-        for channel in channels:
-            await self.reminder_core(channel)
-
-
-    @timed_reminder.before_loop
-    async def before_timed_hello(self) -> None:
-        await self.bot.wait_until_ready()
+        """Manual call of the reminder for all reminder channels"""
+        report = await self.reminder_core(self.bot.get_reminder_channels())
+        if report:
+            await ctx.send(str(report))
 
     @commands.command()
     async def rally_now(self, ctx):
@@ -120,7 +186,7 @@ class RallyCalendar(commands.Cog, name="rally_calendar"):
         events = self.calendar.get_events_current()
         if not events:
             return ["No current rally events available."]
-        result = ["Current rally events:", self.calendar.format_events(events)]
+        result = ["Current rally events:", self.calendar.format_events(events), *self.stale_notice()]
         await ctx.send(format_message(result))
 
     @commands.command()
@@ -129,7 +195,7 @@ class RallyCalendar(commands.Cog, name="rally_calendar"):
         events = self.calendar.get_events_upcoming()
         if not events:
             return ["No upcoming rally events available."]
-        result = ["Upcoming rally events:", self.calendar.format_events(events)]
+        result = ["Upcoming rally events:", self.calendar.format_events(events), *self.stale_notice()]
         await ctx.send(format_message(result))
 
     @commands.command()
@@ -138,144 +204,163 @@ class RallyCalendar(commands.Cog, name="rally_calendar"):
         events = self.calendar.get_events_next()
         if not events:
             return ["No next rally events available."]
-        result = ["Next rally events:", self.calendar.format_events(events)]
+        result = ["Next rally events:", self.calendar.format_events(events), *self.stale_notice()]
+        await ctx.send(format_message(result))
+
+    @commands.command()
+    async def rally_week(self, ctx, date: str = None):
+        """Display rally events during the week of a YYYY-MM-DD date, this week by default"""
+        try:
+            day = datetime.date.fromisoformat(date) if date else datetime.date.today()
+        except ValueError:
+            await ctx.send(f"Invalid date {date}, use YYYY-MM-DD.")
+            return
+        start = datetime.datetime.combine(day - datetime.timedelta(days=day.weekday()), datetime.time()).astimezone()
+        events = await self.calendar.events_overlapping(start, start + datetime.timedelta(days=7))
+        if not events:
+            await ctx.send(f"No rally events in the week of {start:%Y-%m-%d}.")
+            return
+        result = [f"Rally events in the week of {start:%Y-%m-%d}:", self.calendar.format_events(events),
+                  *self.stale_notice()]
         await ctx.send(format_message(result))
 
     @commands.command()
     async def rally_ends_soon(self, ctx):
         """Display events that ends soon"""
+        message = self.get_ends_soon_message()
+        if not message:
+            return []
+        await ctx.send(message)
+
+    def get_ends_soon_message(self):
         events = self.calendar.get_events_end_soon()
         if not events:
+            return None
+        return format_message(["Rally events ends soon:", self.calendar.format_events(events), *self.stale_notice()])
+
+    def stale_notice(self):
+        if not self.calendar.stale:
             return []
-        result = ["Rally events ends soon:", self.calendar.format_events(events)]
-        await ctx.send(format_message(result))
+        return [f"*Calendar unreachable, showing data from {self.calendar.refreshed_at:%Y-%m-%d %H:%M}*"]
 
-    async def get_results(self):
-        return [
-            {'rank': 1, 'name': 'sykynxCZ', 'isVIP': False, 'isFounder': False, 'isPlayer': False, 'isDnfEntry': False,
-             'playerDiff': 0, 'vehicleName': 'Mitsubishi Space Star R5', 'stageTime': '09:29.276', 'stageDiff': '--',
-             'totalTime': '44:24.696', 'totalDiff': '--', 'nationality': 'eLngCzech'},
-            {'rank': 2, 'name': 'aranelek', 'isVIP': False, 'isFounder': False, 'isPlayer': True, 'isDnfEntry': False,
-             'playerDiff': 1, 'vehicleName': 'Ford Fiesta R5', 'stageTime': '10:00.872', 'stageDiff': '+00:31.596',
-             'totalTime': '46:21.601', 'totalDiff': '+01:56.905', 'nationality': 'eLngCzech'},
-            {'rank': 3, 'name': 'Maidens', 'isVIP': False, 'isFounder': False, 'isPlayer': False, 'isDnfEntry': False,
-             'playerDiff': -1, 'vehicleName': 'ŠKODA Fabia R5', 'stageTime': '12:06.080', 'stageDiff': '+02:36.804',
-             'totalTime': '47:50.198', 'totalDiff': '+03:25.502', 'nationality': 'eLngCzech'},
-            {'rank': 4, 'name': 'ThePlagueDoc24', 'isVIP': False, 'isFounder': False, 'isPlayer': False,
-             'isDnfEntry': False, 'playerDiff': 0, 'vehicleName': 'Ford Fiesta R5', 'stageTime': '10:52.032',
-             'stageDiff': '+01:22.756', 'totalTime': '48:57.641', 'totalDiff': '+04:32.945',
-             'nationality': 'eLngBritish'},
-            {'rank': 5, 'name': 'Risinek', 'isVIP': False, 'isFounder': False, 'isPlayer': False, 'isDnfEntry': False,
-             'playerDiff': 0, 'vehicleName': 'ŠKODA Fabia R5', 'stageTime': '09:46.415', 'stageDiff': '+00:17.139',
-             'totalTime': '49:43.359', 'totalDiff': '+05:18.663', 'nationality': 'eLngCzech'},
-            {'rank': 6, 'name': 'mischmo', 'isVIP': False, 'isFounder': False, 'isPlayer': False, 'isDnfEntry': False,
-             'playerDiff': 0, 'vehicleName': 'ŠKODA Fabia R5', 'stageTime': '10:51.945', 'stageDiff': '+01:22.669',
-             'totalTime': '52:00.002', 'totalDiff': '+07:35.306', 'nationality': 'eLngCzech'},
-            {'rank': 7, 'name': 'VohultoNeboUhni', 'isVIP': False, 'isFounder': False, 'isPlayer': False,
-             'isDnfEntry': True, 'playerDiff': 0, 'vehicleName': 'ŠKODA Fabia R5', 'stageTime': '30:00.000',
-             'stageDiff': '+20:30.724', 'totalTime': '01:59:09.272', 'totalDiff': '+01:14:44.576',
-             'nationality': 'eLngCzech'}]
+    async def get_results(self, event_key=results.CURRENT):
+        return await self.fetch_rows('results', event_key, self.bot.results.get_results,
+                                     self.bot.database.save_results, self.bot.database.load_results)
 
     async def get_headers(self):
-        return ['rank', 'name', 'vehicleName',
-                'totalTime', 'totalDiff']
-
-    async def get_standings(self):
-        return [{'rank': 1, 'isMe': False, 'nationality': 'eLngCzech', 'displayName': 'Maidens', 'totalPoints': 25,
-                 'eventPoints': [{'eventIndex': 0, 'points': 7}, {'eventIndex': 1, 'points': 4},
-                                 {'eventIndex': 2, 'points': 5}, {'eventIndex': 3, 'points': 9},
-                                 {'eventIndex': 4, 'points': 0}, {'eventIndex': 5, 'points': 0},
-                                 {'eventIndex': 6, 'points': 0}, {'eventIndex': 7, 'points': 0},
-                                 {'eventIndex': 8, 'points': 0}, {'eventIndex': 9, 'points': 0},
-                                 {'eventIndex': 10, 'points': 0}, {'eventIndex': 11, 'points': 0}]},
-                {'rank': 2, 'isMe': True, 'nationality': 'eLngCzech', 'displayName': 'aranelek', 'totalPoints': 21,
-                 'eventPoints': [{'eventIndex': 0, 'points': 3}, {'eventIndex': 1, 'points': 8},
-                                 {'eventIndex': 2, 'points': 7}, {'eventIndex': 3, 'points': 3},
-                                 {'eventIndex': 4, 'points': 0}, {'eventIndex': 5, 'points': 0},
-                                 {'eventIndex': 6, 'points': 0}, {'eventIndex': 7, 'points': 0},
-                                 {'eventIndex': 8, 'points': 0}, {'eventIndex': 9, 'points': 0},
-                                 {'eventIndex': 10, 'points': 0}, {'eventIndex': 11, 'points': 0}]},
-                {'rank': 3, 'isMe': False, 'nationality': 'eLngCzech', 'displayName': 'sykynxCZ', 'totalPoints': 17,
-                 'eventPoints': [{'eventIndex': 0, 'points': 5}, {'eventIndex': 1, 'points': 6},
-                                 {'eventIndex': 2, 'points': 1}, {'eventIndex': 3, 'points': 5},
-                                 {'eventIndex': 4, 'points': 0}, {'eventIndex': 5, 'points': 0},
-                                 {'eventIndex': 6, 'points': 0}, {'eventIndex': 7, 'points': 0},
-                                 {'eventIndex': 8, 'points': 0}, {'eventIndex': 9, 'points': 0},
-                                 {'eventIndex': 10, 'points': 0}, {'eventIndex': 11, 'points': 0}]},
-                {'rank': 4, 'isMe': False, 'nationality': 'eLngCzech', 'displayName': 'Risinek', 'totalPoints': 14,
-                 'eventPoints': [{'eventIndex': 0, 'points': 4}, {'eventIndex': 1, 'points': 5},
-                                 {'eventIndex': 2, 'points': 1}, {'eventIndex': 3, 'points': 4},
-                                 {'eventIndex': 4, 'points': 0}, {'eventIndex': 5, 'points': 0},
-                                 {'eventIndex': 6, 'points': 0}, {'eventIndex': 7, 'points': 0},
-                                 {'eventIndex': 8, 'points': 0}, {'eventIndex': 9, 'points': 0},
-                                 {'eventIndex': 10, 'points': 0}, {'eventIndex': 11, 'points': 0}]},
-                {'rank': 5, 'isMe': False, 'nationality': 'eLngCzech', 'displayName': 'SharpEye24', 'totalPoints': 12,
-                 'eventPoints': [{'eventIndex': 0, 'points': 0}, {'eventIndex': 1, 'points': 2},
-                                 {'eventIndex': 2, 'points': 4}, {'eventIndex': 3, 'points': 6},
-                                 {'eventIndex': 4, 'points': 0}, {'eventIndex': 5, 'points': 0},
-                                 {'eventIndex': 6, 'points': 0}, {'eventIndex': 7, 'points': 0},
-                                 {'eventIndex': 8, 'points': 0}, {'eventIndex': 9, 'points': 0},
-                                 {'eventIndex': 10, 'points': 0}, {'eventIndex': 11, 'points': 0}]},
-                {'rank': 6, 'isMe': False, 'nationality': 'eLngCzech', 'displayName': 'mischmo', 'totalPoints': 10,
-                 'eventPoints': [{'eventIndex': 0, 'points': 2}, {'eventIndex': 1, 'points': 3},
-                                 {'eventIndex': 2, 'points': 3}, {'eventIndex': 3, 'points': 2},
-                                 {'eventIndex': 4, 'points': 0}, {'eventIndex': 5, 'points': 0},
-                                 {'eventIndex': 6, 'points': 0}, {'eventIndex': 7, 'points': 0},
-                                 {'eventIndex': 8, 'points': 0}, {'eventIndex': 9, 'points': 0},
-                                 {'eventIndex': 10, 'points': 0}, {'eventIndex': 11, 'points': 0}]},
-                {'rank': 7, 'isMe': False, 'nationality': 'eLngCzech', 'displayName': 'nert', 'totalPoints': 5,
-                 'eventPoints': [{'eventIndex': 0, 'points': 1}, {'eventIndex': 1, 'points': 1},
-                                 {'eventIndex': 2, 'points': 2}, {'eventIndex': 3, 'points': 1},
-                                 {'eventIndex': 4, 'points': 0}, {'eventIndex': 5, 'points': 0},
-                                 {'eventIndex': 6, 'points': 0}, {'eventIndex': 7, 'points': 0},
-                                 {'eventIndex': 8, 'points': 0}, {'eventIndex': 9, 'points': 0},
-                                 {'eventIndex': 10, 'points': 0}, {'eventIndex': 11, 'points': 0}]},
-                {'rank': 8, 'isMe': False, 'nationality': 'eLngCzech', 'displayName': 'xholesov', 'totalPoints': 3,
-                 'eventPoints': [{'eventIndex': 0, 'points': 1}, {'eventIndex': 1, 'points': 1},
-                                 {'eventIndex': 2, 'points': 0}, {'eventIndex': 3, 'points': 1},
-                                 {'eventIndex': 4, 'points': 0}, {'eventIndex': 5, 'points': 0},
-                                 {'eventIndex': 6, 'points': 0}, {'eventIndex': 7, 'points': 0},
-                                 {'eventIndex': 8, 'points': 0}, {'eventIndex': 9, 'points': 0},
-                                 {'eventIndex': 10, 'points': 0}, {'eventIndex': 11, 'points': 0}]},
-                {'rank': 9, 'isMe': False, 'nationality': 'eLngCzech', 'displayName': 'VohultoNeboUhni',
-                 'totalPoints': 1, 'eventPoints': [{'eventIndex': 0, 'points': 0}, {'eventIndex': 1, 'points': 0},
-                                                   {'eventIndex': 2, 'points': 0}, {'eventIndex': 3, 'points': 1},
-                                                   {'eventIndex': 4, 'points': 0}, {'eventIndex': 5, 'points': 0},
-                                                   {'eventIndex': 6, 'points': 0}, {'eventIndex': 7, 'points': 0},
-                                                   {'eventIndex': 8, 'points': 0}, {'eventIndex': 9, 'points': 0},
-                                                   {'eventIndex': 10, 'points': 0}, {'eventIndex': 11, 'points': 0}]}]
+        return await self.bot.results.get_headers()
+
+    async def get_standings(self, season=results.CURRENT):
+        return await self.fetch_rows('standings', season, self.bot.results.get_standings,
+                                     self.bot.database.save_standings, self.bot.database.load_standings)
+
+    async def fetch_rows(self, kind, key, fetch, save, load):
+        """Rows from the results provider, stored in the database and served from it when the source is down"""
+        try:
+            rows = await fetch(key)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            log.error(f"{kind} {key} not fetched, using stored rows: {type(e).__name__}: {e}")
+            return await load(key)
+        if not self.bot.results.mock and rows is not self._stored_rows.get((kind, key)):
+            await save(key, rows)
+            self._stored_rows[(kind, key)] = rows
+        return rows
+
+    def preview(self, message):
+        return preview(message) if self.bot.results.mock else message
 
     @commands.command()
     async def leaderboard(self, ctx):
-        """STUB: this should display leaderboard for current live rally event"""
+        """Display leaderboard for current live rally event"""
         message = await self.get_leaderboard_message()
-        await ctx.send(preview(message))
+        await ctx.send(self.preview(message))
 
     async def get_leaderboard_message(self):
         results = await self.get_results()
         headers = await self.get_headers()
-        results = [{k: line[k] for k in headers} for line in results]
-        message = tabulate.tabulate(results, headers="keys")
-        return f"```{message}```"
+        key = render_cache.content_key('leaderboard', results, headers)
+        return render_cache.get_or_render(key, lambda: render_leaderboard(results, headers))
 
     @commands.command()
     async def standings(self, ctx):
-        """STUB: this should display current champion standings"""
+        """Display current champion standings"""
         message = await self.get_standings_message()
-        await ctx.send(preview(message))
+        await ctx.send(self.preview(message))
 
     async def get_standings_message(self):
+        if config.STANDINGS_EVENT_KEYS:
+            return await self.compute_standings_message(config.STANDINGS_EVENT_KEYS)
         data = await self.get_standings()
-        headers = ['rank', 'displayName', 'totalPoints']
-        results = []
-        for line in data:
-            eventpoints = line['eventPoints']
-            eventpoints = {line['eventIndex']: line['points'] for line in eventpoints}
-            line_result = {k: line[k] for k in headers}
+        key = render_cache.content_key('standings', data)
+        return render_cache.get_or_render(key, lambda: render_standings(data))
 
-            results.append(line_result | eventpoints)
-        message = tabulate.tabulate(results, headers="keys")
-        return f"```{message}```"
+    async def render_board(self, kind):
+        if kind == live_board.STANDINGS:
+            message = await self.get_standings_message()
+        else:
+            message = await self.get_leaderboard_message()
+        return self.preview(message)
+
+    @commands.group(invoke_without_command=True)
+    async def liveboard(self, ctx):
+        """Live boards of this channel, see liveboard start/stop"""
+        board = self.live_boards.boards.get(ctx.channel.id)
+        if board is None:
+            await ctx.send(f"No live board in this channel, start one with `{ctx.prefix}liveboard start`.")
+            return
+        edited = datetime.datetime.fromtimestamp(board.edited_at)
+        await ctx.send(f"Live {board.kind} board, last edited {edited:%Y-%m-%d %H:%M:%S}.")
+
+    @liveboard.command(name='start')
+    @commands.has_permissions(manage_messages=True)
+    async def liveboard_start(self, ctx, kind=live_board.LEADERBOARD):
+        """Pin a leaderboard or standings message edited in place when it changes"""
+        if kind not in live_board.KINDS:
+            await ctx.send(f"Unknown board {kind}, use one of: {', '.join(live_board.KINDS)}.")
+            return
+        await self.live_boards.create(ctx.channel, kind)
+
+    @liveboard.command(name='stop')
+    @commands.has_permissions(manage_messages=True)
+    async def liveboard_stop(self, ctx):
+        """Stop updating the live board of this channel and unpin it"""
+        board = await self.live_boards.remove(ctx.channel.id)
+        await ctx.send("Live board stopped." if board else "No live board in this channel.")
+
+    async def compute_standings_message(self, event_keys):
+        """Standings computed from the results of the season events"""
+        event_results = await asyncio.gather(*(self.get_results(event_key) for event_key in event_keys))
+        key = render_cache.content_key('computed_standings', event_results)
+        return render_cache.get_or_render(
+            key, lambda: render_standings_table(self.standings_engine.compute(event_results)))
+
+    @commands.command()
+    async def pb(self, ctx, driver, *, stage=None):
+        """Personal best stage times of a driver from the results archive
+
+        Quote driver names with spaces: !pb "Some Driver" Stage name
+        """
+        loop = asyncio.get_running_loop()
+        bests = await loop.run_in_executor(None, self.bot.archive.personal_bests, driver, stage)
+        if not bests:
+            await ctx.send(f"No archived {'results' if stage is None else stage + ' results'} of {driver}.")
+            return
+        await ctx.send(render_personal_bests(driver, bests))
+
+    @commands.command()
+    async def trend(self, ctx, *, driver):
+        """Rally results of a driver over the last archived rallies"""
+        loop = asyncio.get_running_loop()
+        points = await loop.run_in_executor(None, self.bot.archive.trend, driver)
+        if not points:
+            await ctx.send(f"No archived rallies of {driver}.")
+            return
+        await ctx.send(render_trend(driver, points))
+
+
+def target_channel_id(target):
+    """Channel id of a reminder target, a channel or a command context replying in one"""
+    return target.channel.id if isinstance(target, commands.Context) else target.id
 
 
 def preview(message):
@@ -285,6 +370,54 @@ def preview(message):
         "# 🚧 END OF PREVIEW REPOSNSE 🚧"
     ])
 
+def render_leaderboard(results, headers, limit=30):
+    # order, ranks and diffs come from the parsed times, not from the strings of the source
+    results = stage_times.ResultSet(results).display_rows(headers, limit)
+    message = tabulate.tabulate(results, headers="keys")
+    return f"```{message}```"
+
+
+def render_standings(data):
+    headers = ['rank', 'displayName', 'totalPoints']
+    results = []
+    for line in data:
+        # rows restored from the database carry no per event points
+        eventpoints = line.get('eventPoints', [])
+        eventpoints = {line['eventIndex']: line['points'] for line in eventpoints}
+        line_result = {k: line[k] for k in headers}
+
+        results.append(line_result | eventpoints)
+    message = tabulate.tabulate(results, headers="keys")
+    return f"```{message}```"
+
+
+def render_standings_table(season_standings, limit=30):
+    headers, rows = season_standings.table(limit)
+    message = tabulate.tabulate(rows, headers=headers)
+    return f"```{message}```"
+
+
+def render_personal_bests(driver, bests):
+    times = stage_times.format_times([best.time_ms for best in bests])
+    rows = [[best.stage, time, best.vehicle, best.event] for best, time in zip(bests, times)]
+    message = tabulate.tabulate(rows, headers=['stage', 'time', 'vehicle', 'rally'])
+    return f"Personal bests of {driver}:\n```{message}```"
+
+
+def render_trend(driver, points):
+    # DNF entries have no times, zeros keep the lists aligned and are not shown
+    times = stage_times.format_times([point.time_ms or 0 for point in points])
+    gaps = stage_times.format_times([point.gap_ms or 0 for point in points], sign=True)
+    rows = []
+    for point, time, gap in zip(points, times, gaps):
+        if point.time_ms is None:
+            rows.append([point.event, 'DNF', point.field, '', ''])
+        else:
+            rows.append([point.event, point.rank, point.field, time, '--' if point.gap_ms == 0 else gap])
+    message = tabulate.tabulate(rows, headers=['rally', 'rank', 'of', 'totalTime', 'totalDiff'])
+    return f"Last {len(points)} rallies of {driver}:\n```{message}```"
+
+
 def format_message(message):
     return '\n'.join(message)
 
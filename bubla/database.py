@@ -0,0 +1,226 @@
+import asyncio
+import concurrent.futures
+import functools
+import logging
+import os
+import sqlite3
+import time
+
+from google_calendar import CalendarEvent
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS calendar_events (
+    id TEXT PRIMARY KEY,
+    summary TEXT,
+    description TEXT,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER NOT NULL,
+    all_day INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS calendar_events_start ON calendar_events (start_ts, end_ts);
+CREATE INDEX IF NOT EXISTS calendar_events_end ON calendar_events (end_ts);
+CREATE TABLE IF NOT EXISTS discord_events (
+    guild_id INTEGER NOT NULL,
+    calendar_event_id TEXT NOT NULL,
+    discord_event_id INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, calendar_event_id)
+);
+CREATE TABLE IF NOT EXISTS sent_reminders (
+    channel_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    sent_at INTEGER NOT NULL,
+    PRIMARY KEY (channel_id, kind, event_id)
+);
+CREATE TABLE IF NOT EXISTS results (
+    event_key TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    vehicle TEXT,
+    stage_time TEXT,
+    total_time TEXT,
+    is_dnf INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (event_key, rank)
+);
+CREATE INDEX IF NOT EXISTS results_name ON results (name);
+CREATE TABLE IF NOT EXISTS standings (
+    season TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    total_points INTEGER NOT NULL,
+    PRIMARY KEY (season, rank)
+);
+CREATE TABLE IF NOT EXISTS live_boards (
+    channel_id INTEGER PRIMARY KEY,
+    message_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    content_hash TEXT,
+    edited_at REAL NOT NULL DEFAULT 0
+);
+"""
+
+
+class Database:
+    """SQLite store used from asyncio
+
+    sqlite3 calls block, so all of them run on one dedicated thread owning the
+    connection; the database is in WAL mode, so readers do not wait for writers.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='database')
+        self._connection = None
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args))
+
+    def _connect(self):
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.filename, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.executescript(SCHEMA)
+        connection.commit()
+        self._connection = connection
+        log.info(f"database {self.filename} opened")
+
+    async def open(self):
+        await self._run(self._connect)
+
+    async def close(self):
+        if self._connection is not None:
+            await self._run(self._connection.close)
+            self._connection = None
+        self.executor.shutdown(wait=True)
+
+    def _execute(self, sql, parameters=()):
+        with self._connection:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def _executemany(self, sql, rows):
+        with self._connection:
+            self._connection.executemany(sql, rows)
+
+    async def execute(self, sql, parameters=()):
+        return await self._run(self._execute, sql, parameters)
+
+    async def executemany(self, sql, rows):
+        await self._run(self._executemany, sql, rows)
+
+    # key/value state
+
+    async def get_state(self, key, default=None):
+        rows = await self.execute('SELECT value FROM state WHERE key = ?', (key,))
+        return rows[0][0] if rows else default
+
+    async def set_state(self, key, value):
+        await self.execute('INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)', (key, value))
+
+    # calendar events
+
+    @staticmethod
+    def _event_row(event):
+        return event.id, event.summary, event.description, event.start_ts, event.end_ts, int(event.all_day)
+
+    def _replace_calendar_events(self, events):
+        with self._connection:
+            self._connection.execute('DELETE FROM calendar_events')
+            self._connection.executemany('INSERT INTO calendar_events VALUES (?, ?, ?, ?, ?, ?)',
+                                         [self._event_row(event) for event in events])
+
+    async def replace_calendar_events(self, events):
+        await self._run(self._replace_calendar_events, events)
+
+    async def upsert_calendar_events(self, events):
+        await self.executemany('INSERT OR REPLACE INTO calendar_events VALUES (?, ?, ?, ?, ?, ?)',
+                               [self._event_row(event) for event in events])
+
+    async def delete_calendar_events(self, event_ids):
+        await self.executemany('DELETE FROM calendar_events WHERE id = ?', [(event_id,) for event_id in event_ids])
+
+    async def load_calendar_events(self):
+        rows = await self.execute('SELECT id, summary, description, start_ts, end_ts, all_day FROM calendar_events')
+        return [CalendarEvent(*row[:5], all_day=bool(row[5])) for row in rows]
+
+    async def events_overlapping(self, start_ts, end_ts):
+        """Calendar events overlapping [start_ts, end_ts), an index range scan"""
+        rows = await self.execute('SELECT id, summary, description, start_ts, end_ts, all_day FROM calendar_events'
+                                  ' WHERE start_ts < ? AND end_ts > ? ORDER BY start_ts', (end_ts, start_ts))
+        return [CalendarEvent(*row[:5], all_day=bool(row[5])) for row in rows]
+
+    # Discord scheduled event mapping
+
+    async def load_discord_events(self):
+        return await self.execute('SELECT guild_id, calendar_event_id, discord_event_id FROM discord_events')
+
+    async def save_discord_events(self, upserts, deletes):
+        def save():
+            with self._connection:
+                self._connection.executemany('INSERT OR REPLACE INTO discord_events VALUES (?, ?, ?)', upserts)
+                self._connection.executemany('DELETE FROM discord_events'
+                                             ' WHERE guild_id = ? AND calendar_event_id = ?', deletes)
+        await self._run(save)
+
+    # reminders
+
+    async def reminded_channels(self, kind, event_id):
+        rows = await self.execute('SELECT channel_id FROM sent_reminders WHERE kind = ? AND event_id = ?',
+                                  (kind, event_id))
+        return {channel_id for channel_id, in rows}
+
+    async def record_reminders(self, channel_ids, kind, event_id):
+        now = int(time.time())
+        await self.executemany('INSERT OR REPLACE INTO sent_reminders VALUES (?, ?, ?, ?)',
+                               [(channel_id, kind, event_id, now) for channel_id in channel_ids])
+
+    # results and standings
+
+    async def save_results(self, event_key, rows):
+        def save():
+            with self._connection:
+                self._connection.execute('DELETE FROM results WHERE event_key = ?', (event_key,))
+                self._connection.executemany('INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?)', [
+                    (event_key, row['rank'], row['name'], row.get('vehicleName'), row.get('stageTime'),
+                     row.get('totalTime'), int(row.get('isDnfEntry', False))) for row in rows])
+        await self._run(save)
+
+    async def load_results(self, event_key):
+        rows = await self.execute('SELECT rank, name, vehicle, stage_time, total_time, is_dnf FROM results'
+                                  ' WHERE event_key = ? ORDER BY rank', (event_key,))
+        return [{'rank': rank, 'name': name, 'vehicleName': vehicle, 'stageTime': stage_time,
+                 'totalTime': total_time, 'isDnfEntry': bool(is_dnf)}
+                for rank, name, vehicle, stage_time, total_time, is_dnf in rows]
+
+    async def save_standings(self, season, rows):
+        def save():
+            with self._connection:
+                self._connection.execute('DELETE FROM standings WHERE season = ?', (season,))
+                self._connection.executemany('INSERT INTO standings VALUES (?, ?, ?, ?)', [
+                    (season, row['rank'], row['displayName'], row['totalPoints']) for row in rows])
+        await self._run(save)
+
+    async def load_standings(self, season):
+        rows = await self.execute('SELECT rank, name, total_points FROM standings WHERE season = ? ORDER BY rank',
+                                  (season,))
+        return [{'rank': rank, 'displayName': name, 'totalPoints': total_points} for rank, name, total_points in rows]
+
+    # live boards
+
+    async def load_live_boards(self):
+        return await self.execute('SELECT channel_id, message_id, kind, content_hash, edited_at FROM live_boards')
+
+    async def save_live_board(self, channel_id, message_id, kind, content_hash, edited_at):
+        await self.execute('INSERT OR REPLACE INTO live_boards VALUES (?, ?, ?, ?, ?)',
+                           (channel_id, message_id, kind, content_hash, edited_at))
+
+    async def delete_live_board(self, channel_id):
+        await self.execute('DELETE FROM live_boards WHERE channel_id = ?', (channel_id,))
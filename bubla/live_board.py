@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import logging
+import time
+
+import discord
+
+from utils.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+LEADERBOARD = 'leaderboard'
+STANDINGS = 'standings'
+KINDS = (LEADERBOARD, STANDINGS)
+
+board_updates = metrics.counter('live_board_updates_total', "Live board refreshes by outcome", ['kind', 'result'])
+
+
+def content_hash(content):
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+
+
+class Board:
+    """One pinned message kept up to date in a channel"""
+
+    __slots__ = ('channel_id', 'message_id', 'kind', 'content_hash', 'edited_at', 'pending', 'task')
+
+    def __init__(self, channel_id, message_id, kind, content_hash=None, edited_at=0.0):
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.kind = kind
+        self.content_hash = content_hash
+        # wall clock of the last edit, persisted so a restart keeps the rate limit
+        self.edited_at = edited_at
+        # latest content waiting for the debounce window to close
+        self.pending = None
+        self.task = None
+
+    def __repr__(self):
+        return f"Board(channel_id={self.channel_id}, message_id={self.message_id}, kind={self.kind!r})"
+
+
+class LiveBoards:
+    """Pinned leaderboard/standings messages edited in place when their content changes
+
+    Every `interval` seconds each kind is rendered once and offered to its boards. A board
+    is edited only when the content hash differs from the last edit; contents offered
+    during the `debounce` window are coalesced into one edit of the latest one, and a
+    channel is edited at most once per `min_interval` seconds. Boards are persisted in
+    the database.
+    """
+
+    def __init__(self, bot, render, interval=60, debounce=5, min_interval=30, clock=time.time, sleep=asyncio.sleep):
+        """
+        :param render: coroutine function kind -> message content
+        """
+        self.bot = bot
+        self.database = bot.database
+        self.render = render
+        self.interval = interval
+        self.debounce = debounce
+        self.min_interval = min_interval
+        self.clock = clock
+        self.sleep = sleep
+        self.boards = {}
+        self._task = None
+
+    async def load(self):
+        self.boards = {channel_id: Board(channel_id, message_id, kind, hash_, edited_at)
+                       for channel_id, message_id, kind, hash_, edited_at in await self.database.load_live_boards()}
+        log.info(f"{len(self.boards)} live board(s) loaded")
+
+    def channels(self, kind):
+        return {board.channel_id for board in self.boards.values() if board.kind == kind}
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for board in self.boards.values():
+            if board.task is not None:
+                board.task.cancel()
+                board.task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                log.error(f"live board refresh failed: {type(e).__name__}: {e}")
+            await self.sleep(self.interval)
+
+    async def refresh(self):
+        """Render every kind with boards once and offer the content to its boards"""
+        for kind in {board.kind for board in self.boards.values()}:
+            content = await self.render(kind)
+            for board in [board for board in self.boards.values() if board.kind == kind]:
+                self.offer(board, content)
+
+    def offer(self, board, content):
+        """Schedule an edit of the board unless the content is already shown"""
+        hash_ = content_hash(content)
+        if board.pending is None and hash_ == board.content_hash:
+            board_updates.inc(kind=board.kind, result='unchanged')
+            return
+        board.pending = content
+        if board.task is None:
+            board.task = asyncio.create_task(self._flush(board))
+
+    async def _flush(self, board):
+        try:
+            wait = max(self.debounce, board.edited_at + self.min_interval - self.clock())
+            await self.sleep(wait)
+            content, board.pending = board.pending, None
+            hash_ = content_hash(content)
+            if hash_ == board.content_hash:
+                # changed and changed back within the window
+                board_updates.inc(kind=board.kind, result='unchanged')
+                return
+            await self.edit(board, content, hash_)
+        finally:
+            board.task = None
+        # offered while the edit was in flight
+        if board.pending is not None and self.boards.get(board.channel_id) is board:
+            board.task = asyncio.create_task(self._flush(board))
+
+    async def edit(self, board, content, hash_):
+        channel = self.bot.get_channel(board.channel_id)
+        if channel is None:
+            log.warning(f"live board channel {board.channel_id} not available, edit skipped")
+            board_updates.inc(kind=board.kind, result='failed')
+            return
+        try:
+            # a partial message edits without fetching the message first
+            await channel.get_partial_message(board.message_id).edit(content=content)
+        except discord.NotFound:
+            log.warning(f"live board message in {channel} was deleted, board removed")
+            board_updates.inc(kind=board.kind, result='failed')
+            await self.remove(board.channel_id)
+            return
+        except discord.HTTPException as e:
+            log.error(f"live board in {channel} not edited: {e}")
+            board_updates.inc(kind=board.kind, result='failed')
+            return
+        board.content_hash = hash_
+        board.edited_at = self.clock()
+        board_updates.inc(kind=board.kind, result='edited')
+        await self.database.save_live_board(board.channel_id, board.message_id, board.kind, board.content_hash,
+                                            board.edited_at)
+
+    async def create(self, channel, kind):
+        """Post and pin a board in the channel, replacing the board it had"""
+        await self.remove(channel.id)
+        content = await self.render(kind)
+        message = await channel.send(content)
+        try:
+            await message.pin(reason="live board")
+        except discord.HTTPException as e:
+            log.warning(f"live board in {channel} not pinned: {e}")
+        board = self.boards[channel.id] = Board(channel.id, message.id, kind, content_hash(content), self.clock())
+        await self.database.save_live_board(board.channel_id, board.message_id, board.kind, board.content_hash,
+                                            board.edited_at)
+        return board
+
+    async def remove(self, channel_id):
+        """Forget the channel's board and unpin its message, :return: the removed board or None"""
+        board = self.boards.pop(channel_id, None)
+        if board is None:
+            return None
+        if board.task is not None and board.task is not asyncio.current_task():
+            board.task.cancel()
+        await self.database.delete_live_board(channel_id)
+        channel = self.bot.get_channel(channel_id)
+        if channel is not None:
+            try:
+                await channel.get_partial_message(board.message_id).unpin(reason="live board stopped")
+            except discord.HTTPException as e:
+                log.debug(f"live board message in {channel} not unpinned: {e}")
+        return board
@@ -0,0 +1,185 @@
+import asyncio
+import datetime
+import logging
+import time
+from collections import namedtuple
+
+import discord
+
+from utils.interval_index import IntervalIndex, scheduled_event_interval
+
+log = logging.getLogger(__name__)
+
+CREATE = 'create'
+EDIT = 'edit'
+DELETE = 'delete'
+
+Action = namedtuple('Action', ['kind', 'guild', 'calendar_event_id', 'discord_event', 'fields'])
+
+
+class EventMapping:
+    """Calendar event id -> Discord scheduled event id mapping per guild, persisted in the database
+
+    Kept in memory for planning, changes are written back by :meth:`save`.
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self._data = {}
+        self._upserts = {}
+        self._deletes = set()
+
+    async def load(self):
+        self._data = {}
+        for guild_id, calendar_event_id, discord_event_id in await self.database.load_discord_events():
+            self._data.setdefault(guild_id, {})[calendar_event_id] = discord_event_id
+
+    def for_guild(self, guild_id) -> dict:
+        return dict(self._data.get(guild_id, {}))
+
+    def set(self, guild_id, calendar_event_id, discord_event_id):
+        self._data.setdefault(guild_id, {})[calendar_event_id] = discord_event_id
+        self._upserts[(guild_id, calendar_event_id)] = discord_event_id
+        self._deletes.discard((guild_id, calendar_event_id))
+
+    def remove(self, guild_id, calendar_event_id):
+        if self._data.get(guild_id, {}).pop(calendar_event_id, None) is not None:
+            self._upserts.pop((guild_id, calendar_event_id), None)
+            self._deletes.add((guild_id, calendar_event_id))
+
+    async def save(self):
+        if not self._upserts and not self._deletes:
+            return
+        upserts = [(guild_id, calendar_event_id, discord_event_id)
+                   for (guild_id, calendar_event_id), discord_event_id in self._upserts.items()]
+        deletes = list(self._deletes)
+        self._upserts = {}
+        self._deletes = set()
+        await self.database.save_discord_events(upserts, deletes)
+
+
+class Reconciler:
+    """Makes Discord scheduled events follow the rally calendar
+
+    Computes a minimal create/edit/delete plan per guild from the gateway cache and the
+    stored mapping, so a re-run without calendar changes performs no Discord writes.
+    """
+
+    def __init__(self, mapping: EventMapping, concurrency=3, location="DiRT Rally 2.0"):
+        self.mapping = mapping
+        self.concurrency = concurrency
+        self.location = location
+
+    @staticmethod
+    def desired_fields(calendar_event):
+        return {
+            'name': calendar_event.summary or '',
+            'description': calendar_event.description or '',
+            'start_time': calendar_event.start,
+            'end_time': calendar_event.end,
+        }
+
+    @staticmethod
+    def changed_fields(discord_event, fields):
+        changed = {}
+        if discord_event.name != fields['name']:
+            changed['name'] = fields['name']
+        if (discord_event.description or '') != fields['description']:
+            changed['description'] = fields['description']
+        # Discord does not allow moving an event that already started
+        if discord_event.status == discord.EventStatus.scheduled:
+            for key, current in (('start_time', discord_event.start_time), ('end_time', discord_event.end_time)):
+                if current is None or int(current.timestamp()) != int(fields[key].timestamp()):
+                    changed[key] = fields[key]
+        return changed
+
+    @staticmethod
+    def cancelled(calendar_event_id, known_event_ids, cancelled_event_ids):
+        if calendar_event_id in cancelled_event_ids:
+            return True
+        return known_event_ids is not None and calendar_event_id not in known_event_ids
+
+    def plan(self, guild, planned_events, known_event_ids=None, cancelled_event_ids=()):
+        """
+        :param guild: discord.Guild, its scheduled_events come from the gateway cache
+        :param planned_events: CalendarEvent records that should exist in Discord
+        :param known_event_ids: ids of all events still in the calendar, mapped events
+            missing from it were cancelled and get deleted; None when only a part of the
+            calendar is known, then only `cancelled_event_ids` are deleted
+        :param cancelled_event_ids: ids the calendar reported as cancelled
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        existing = {event.id: event for event in guild.scheduled_events}
+        mapped = self.mapping.for_guild(guild.id)
+        mapped_discord_ids = set(mapped.values())
+        unmapped = IntervalIndex([event for event in existing.values() if event.id not in mapped_discord_ids],
+                                 key=scheduled_event_interval)
+        actions = []
+        for calendar_event in planned_events:
+            fields = self.desired_fields(calendar_event)
+            discord_event = existing.get(mapped.get(calendar_event.id))
+            if discord_event is None:
+                # adopt an event created before the mapping existed
+                candidates = [event for event in unmapped.overlapping(fields['start_time'], fields['end_time'])
+                              if event.name == fields['name']]
+                if candidates:
+                    discord_event = candidates[0]
+                    self.mapping.set(guild.id, calendar_event.id, discord_event.id)
+                elif fields['start_time'] <= now:
+                    continue  # Discord only accepts new events starting in the future
+                else:
+                    actions.append(Action(CREATE, guild, calendar_event.id, None, fields))
+                    continue
+            changed = self.changed_fields(discord_event, fields)
+            if changed:
+                actions.append(Action(EDIT, guild, calendar_event.id, discord_event, changed))
+
+        for calendar_event_id, discord_event_id in mapped.items():
+            if not self.cancelled(calendar_event_id, known_event_ids, cancelled_event_ids):
+                continue
+            discord_event = existing.get(discord_event_id)
+            if discord_event is None:
+                self.mapping.remove(guild.id, calendar_event_id)
+            else:
+                actions.append(Action(DELETE, guild, calendar_event_id, discord_event, None))
+        return actions
+
+    async def apply_action(self, action):
+        if action.kind == CREATE:
+            discord_event = await action.guild.create_scheduled_event(
+                **action.fields,
+                entity_type=discord.EntityType.external,
+                privacy_level=discord.PrivacyLevel.guild_only,
+                location=self.location,
+            )
+            self.mapping.set(action.guild.id, action.calendar_event_id, discord_event.id)
+        elif action.kind == EDIT:
+            await action.discord_event.edit(**action.fields)
+        elif action.kind == DELETE:
+            await action.discord_event.delete()
+            self.mapping.remove(action.guild.id, action.calendar_event_id)
+        log.info(f"{action.kind} {action.guild.name}: {action.calendar_event_id} {action.fields or ''}")
+
+    async def apply(self, actions):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(action):
+            async with semaphore:
+                try:
+                    await self.apply_action(action)
+                except discord.HTTPException as e:
+                    log.error(f"{action.kind} of {action.calendar_event_id} in {action.guild.name} failed: {e}")
+                    return e
+
+        return await asyncio.gather(*(run(action) for action in actions))
+
+    async def reconcile(self, guilds, planned_events, known_event_ids=None, cancelled_event_ids=()):
+        started = time.perf_counter()
+        actions = []
+        for guild in guilds:
+            actions += self.plan(guild, planned_events, known_event_ids, cancelled_event_ids)
+        errors = [error for error in await self.apply(actions) if error is not None]
+        await self.mapping.save()
+        log.info(f"reconciled {len(guilds)} guild(s): {len(actions)} change(s), {len(errors)} failed"
+                 f" in {time.perf_counter() - started:.2f}s")
+        return actions
@@ -0,0 +1,265 @@
+import abc
+import asyncio
+import logging
+import time
+
+from utils.metrics import metrics
+
+log = logging.getLogger(__name__)
+
+# event key / season of the running club event
+CURRENT = 'current'
+
+HEADERS = ['rank', 'name', 'vehicleName', 'totalTime', 'totalDiff', 'interval']
+
+fetches = metrics.counter('results_fetches_total', "Results source page requests", ['kind', 'status'])
+fetch_latency = metrics.histogram('results_fetch_latency_seconds', "Results source page latency", ['kind'])
+
+
+class ResultsProvider(abc.ABC):
+    """Source of event results and championship standings
+
+    Rows use the club leaderboard shape: results have rank, name, vehicleName,
+    stageTime, totalTime, isDnfEntry, ...; standings have rank, displayName,
+    totalPoints and eventPoints.
+    """
+
+    mock = False
+
+    @abc.abstractmethod
+    async def get_results(self, event_key=CURRENT) -> list:
+        pass
+
+    async def get_headers(self) -> list:
+        return list(HEADERS)
+
+    @abc.abstractmethod
+    async def get_standings(self, season=CURRENT) -> list:
+        pass
+
+    async def close(self):
+        pass
+
+
+class MockResultsProvider(ResultsProvider):
+    """Static sample data"""
+
+    mock = True
+
+    async def get_results(self, event_key=CURRENT):
+        return [
+            {'rank': 1, 'name': 'sykynxCZ', 'isVIP': False, 'isFounder': False, 'isPlayer': False, 'isDnfEntry': False,
+             'playerDiff': 0, 'vehicleName': 'Mitsubishi Space Star R5', 'stageTime': '09:29.276', 'stageDiff': '--',
+             'totalTime': '44:24.696', 'totalDiff': '--', 'nationality': 'eLngCzech'},
+            {'rank': 2, 'name': 'aranelek', 'isVIP': False, 'isFounder': False, 'isPlayer': True, 'isDnfEntry': False,
+             'playerDiff': 1, 'vehicleName': 'Ford Fiesta R5', 'stageTime': '10:00.872', 'stageDiff': '+00:31.596',
+             'totalTime': '46:21.601', 'totalDiff': '+01:56.905', 'nationality': 'eLngCzech'},
+            {'rank': 3, 'name': 'Maidens', 'isVIP': False, 'isFounder': False, 'isPlayer': False, 'isDnfEntry': False,
+             'playerDiff': -1, 'vehicleName': 'ŠKODA Fabia R5', 'stageTime': '12:06.080', 'stageDiff': '+02:36.804',
+             'totalTime': '47:50.198', 'totalDiff': '+03:25.502', 'nationality': 'eLngCzech'},
+            {'rank': 4, 'name': 'ThePlagueDoc24', 'isVIP': False, 'isFounder': False, 'isPlayer': False,
+             'isDnfEntry': False, 'playerDiff': 0, 'vehicleName': 'Ford Fiesta R5', 'stageTime': '10:52.032',
+             'stageDiff': '+01:22.756', 'totalTime': '48:57.641', 'totalDiff': '+04:32.945',
+             'nationality': 'eLngBritish'},
+            {'rank': 5, 'name': 'Risinek', 'isVIP': False, 'isFounder': False, 'isPlayer': False, 'isDnfEntry': False,
+             'playerDiff': 0, 'vehicleName': 'ŠKODA Fabia R5', 'stageTime': '09:46.415', 'stageDiff': '+00:17.139',
+             'totalTime': '49:43.359', 'totalDiff': '+05:18.663', 'nationality': 'eLngCzech'},
+            {'rank': 6, 'name': 'mischmo', 'isVIP': False, 'isFounder': False, 'isPlayer': False, 'isDnfEntry': False,
+             'playerDiff': 0, 'vehicleName': 'ŠKODA Fabia R5', 'stageTime': '10:51.945', 'stageDiff': '+01:22.669',
+             'totalTime': '52:00.002', 'totalDiff': '+07:35.306', 'nationality': 'eLngCzech'},
+            {'rank': 7, 'name': 'VohultoNeboUhni', 'isVIP': False, 'isFounder': False, 'isPlayer': False,
+             'isDnfEntry': True, 'playerDiff': 0, 'vehicleName': 'ŠKODA Fabia R5', 'stageTime': '30:00.000',
+             'stageDiff': '+20:30.724', 'totalTime': '01:59:09.272', 'totalDiff': '+01:14:44.576',
+             'nationality': 'eLngCzech'}]
+
+    async def get_standings(self, season=CURRENT):
+        return [{'rank': 1, 'isMe': False, 'nationality': 'eLngCzech', 'displayName': 'Maidens', 'totalPoints': 25,
+                 'eventPoints': [{'eventIndex': 0, 'points': 7}, {'eventIndex': 1, 'points': 4},
+                                 {'eventIndex': 2, 'points': 5}, {'eventIndex': 3, 'points': 9},
+                                 {'eventIndex': 4, 'points': 0}, {'eventIndex': 5, 'points': 0},
+                                 {'eventIndex': 6, 'points': 0}, {'eventIndex': 7, 'points': 0},
+                                 {'eventIndex': 8, 'points': 0}, {'eventIndex': 9, 'points': 0},
+                                 {'eventIndex': 10, 'points': 0}, {'eventIndex': 11, 'points': 0}]},
+                {'rank': 2, 'isMe': True, 'nationality': 'eLngCzech', 'displayName': 'aranelek', 'totalPoints': 21,
+                 'eventPoints': [{'eventIndex': 0, 'points': 3}, {'eventIndex': 1, 'points': 8},
+                                 {'eventIndex': 2, 'points': 7}, {'eventIndex': 3, 'points': 3},
+                                 {'eventIndex': 4, 'points': 0}, {'eventIndex': 5, 'points': 0},
+                                 {'eventIndex': 6, 'points': 0}, {'eventIndex': 7, 'points': 0},
+                                 {'eventIndex': 8, 'points': 0}, {'eventIndex': 9, 'points': 0},
+                                 {'eventIndex': 10, 'points': 0}, {'eventIndex': 11, 'points': 0}]},
+                {'rank': 3, 'isMe': False, 'nationality': 'eLngCzech', 'displayName': 'sykynxCZ', 'totalPoints': 17,
+                 'eventPoints': [{'eventIndex': 0, 'points': 5}, {'eventIndex': 1, 'points': 6},
+                                 {'eventIndex': 2, 'points': 1}, {'eventIndex': 3, 'points': 5},
+                                 {'eventIndex': 4, 'points': 0}, {'eventIndex': 5, 'points': 0},
+                                 {'eventIndex': 6, 'points': 0}, {'eventIndex': 7, 'points': 0},
+                                 {'eventIndex': 8, 'points': 0}, {'eventIndex': 9, 'points': 0},
+                                 {'eventIndex': 10, 'points': 0}, {'eventIndex': 11, 'points': 0}]},
+                {'rank': 4, 'isMe': False, 'nationality': 'eLngCzech', 'displayName': 'Risinek', 'totalPoints': 14,
+                 'eventPoints': [{'eventIndex': 0, 'points': 4}, {'eventIndex': 1, 'points': 5},
+                                 {'eventIndex': 2, 'points': 1}, {'eventIndex': 3, 'points': 4},
+                                 {'eventIndex': 4, 'points': 0}, {'eventIndex': 5, 'points': 0},
+                                 {'eventIndex': 6, 'points': 0}, {'eventIndex': 7, 'points': 0},
+                                 {'eventIndex': 8, 'points': 0}, {'eventIndex': 9, 'points': 0},
+                                 {'eventIndex': 10, 'points': 0}, {'eventIndex': 11, 'points': 0}]},
+                {'rank': 5, 'isMe': False, 'nationality': 'eLngCzech', 'displayName': 'SharpEye24', 'totalPoints': 12,
+                 'eventPoints': [{'eventIndex': 0, 'points': 0}, {'eventIndex': 1, 'points': 2},
+                                 {'eventIndex': 2, 'points': 4}, {'eventIndex': 3, 'points': 6},
+                                 {'eventIndex': 4, 'points': 0}, {'eventIndex': 5, 'points': 0},
+                                 {'eventIndex': 6, 'points': 0}, {'eventIndex': 7, 'points': 0},
+                                 {'eventIndex': 8, 'points': 0}, {'eventIndex': 9, 'points': 0},
+                                 {'eventIndex': 10, 'points': 0}, {'eventIndex': 11, 'points': 0}]},
+                {'rank': 6, 'isMe': False, 'nationality': 'eLngCzech', 'displayName': 'mischmo', 'totalPoints': 10,
+                 'eventPoints': [{'eventIndex': 0, 'points': 2}, {'eventIndex': 1, 'points': 3},
+                                 {'eventIndex': 2, 'points': 3}, {'eventIndex': 3, 'points': 2},
+                                 {'eventIndex': 4, 'points': 0}, {'eventIndex': 5, 'points': 0},
+                                 {'eventIndex': 6, 'points': 0}, {'eventIndex': 7, 'points': 0},
+                                 {'eventIndex': 8, 'points': 0}, {'eventIndex': 9, 'points': 0},
+                                 {'eventIndex': 10, 'points': 0}, {'eventIndex': 11, 'points': 0}]},
+                {'rank': 7, 'isMe': False, 'nationality': 'eLngCzech', 'displayName': 'nert', 'totalPoints': 5,
+                 'eventPoints': [{'eventIndex': 0, 'points': 1}, {'eventIndex': 1, 'points': 1},
+                                 {'eventIndex': 2, 'points': 2}, {'eventIndex': 3, 'points': 1},
+                                 {'eventIndex': 4, 'points': 0}, {'eventIndex': 5, 'points': 0},
+                                 {'eventIndex': 6, 'points': 0}, {'eventIndex': 7, 'points': 0},
+                                 {'eventIndex': 8, 'points': 0}, {'eventIndex': 9, 'points': 0},
+                                 {'eventIndex': 10, 'points': 0}, {'eventIndex': 11, 'points': 0}]},
+                {'rank': 8, 'isMe': False, 'nationality': 'eLngCzech', 'displayName': 'xholesov', 'totalPoints': 3,
+                 'eventPoints': [{'eventIndex': 0, 'points': 1}, {'eventIndex': 1, 'points': 1},
+                                 {'eventIndex': 2, 'points': 0}, {'eventIndex': 3, 'points': 1},
+                                 {'eventIndex': 4, 'points': 0}, {'eventIndex': 5, 'points': 0},
+                                 {'eventIndex': 6, 'points': 0}, {'eventIndex': 7, 'points': 0},
+                                 {'eventIndex': 8, 'points': 0}, {'eventIndex': 9, 'points': 0},
+                                 {'eventIndex': 10, 'points': 0}, {'eventIndex': 11, 'points': 0}]},
+                {'rank': 9, 'isMe': False, 'nationality': 'eLngCzech', 'displayName': 'VohultoNeboUhni',
+                 'totalPoints': 1, 'eventPoints': [{'eventIndex': 0, 'points': 0}, {'eventIndex': 1, 'points': 0},
+                                                   {'eventIndex': 2, 'points': 0}, {'eventIndex': 3, 'points': 1},
+                                                   {'eventIndex': 4, 'points': 0}, {'eventIndex': 5, 'points': 0},
+                                                   {'eventIndex': 6, 'points': 0}, {'eventIndex': 7, 'points': 0},
+                                                   {'eventIndex': 8, 'points': 0}, {'eventIndex': 9, 'points': 0},
+                                                   {'eventIndex': 10, 'points': 0}, {'eventIndex': 11, 'points': 0}]}]
+
+
+class HttpResultsProvider(ResultsProvider):
+    """Club leaderboard HTTP source
+
+    Results and standings are paginated JSON documents (`entries`, `pageCount`);
+    the first page tells the page count, the rest is fetched concurrently, at most
+    `concurrency` requests at a time. Every page is revalidated with its ETag /
+    Last-Modified, so polling an unchanged event costs one 304 per page, and parsed
+    rows are kept per event for `max_age` seconds without any request.
+    """
+
+    def __init__(self, base_url, concurrency=4, page_size=100, max_age=60, timeout=30, session=None):
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = concurrency
+        self.page_size = page_size
+        self.max_age = max_age
+        self.timeout = timeout
+        self._session = session
+        self._own_session = session is None
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # url -> (etag, last modified, parsed page)
+        self._pages = {}
+        # (kind, key) -> (fetched at, rows)
+        self._rows = {}
+        self._locks = {}
+
+    @property
+    def session(self):
+        if self._session is None:
+            import aiohttp
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def close(self):
+        if self._own_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def url(self, kind, key):
+        if kind == 'standings':
+            return f"{self.base_url}/championships/{key}/standings"
+        return f"{self.base_url}/events/{key}/results"
+
+    def page_url(self, url, page):
+        return f"{url}?page={page}&pageSize={self.page_size}"
+
+    async def fetch_page(self, kind, url, page):
+        """Parsed page, from the validator cache when the server answers 304 Not Modified"""
+        page_url = self.page_url(url, page)
+        cached = self._pages.get(page_url)
+        headers = {}
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            async with self._semaphore, self.session.get(page_url, headers=headers) as response:
+                status = str(response.status)
+                if response.status == 304 and cached is not None:
+                    return cached[2]
+                response.raise_for_status()
+                data = await response.json()
+                self._pages[page_url] = (response.headers.get('ETag'), response.headers.get('Last-Modified'), data)
+                return data
+        finally:
+            fetches.inc(kind=kind, status=status)
+            fetch_latency.observe(time.perf_counter() - started, kind=kind)
+
+    async def iter_pages(self, kind, key):
+        """Pages of entries in order, later pages are requested concurrently while earlier ones are consumed
+
+        The first fetch learns the page count from page 1; revalidations request all the
+        known pages at once and only add requests when the count grew.
+        """
+        url = self.url(kind, key)
+        cached = self._pages.get(self.page_url(url, 1))
+        expected = cached[2].get('pageCount', 1) if cached is not None else 1
+        tasks = [asyncio.ensure_future(self.fetch_page(kind, url, page)) for page in range(1, expected + 1)]
+        try:
+            first = await tasks[0]
+            page_count = first.get('pageCount', 1)
+            tasks += [asyncio.ensure_future(self.fetch_page(kind, url, page))
+                      for page in range(expected + 1, page_count + 1)]
+            yield first.get('entries', [])
+            for task in tasks[1:page_count]:
+                yield (await task).get('entries', [])
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def get_rows(self, kind, key):
+        cached = self._rows.get((kind, key))
+        if cached is not None and time.monotonic() - cached[0] < self.max_age:
+            return cached[1]
+        # concurrent callers of the same event share one fetch
+        lock = self._locks.setdefault((kind, key), asyncio.Lock())
+        async with lock:
+            cached = self._rows.get((kind, key))
+            if cached is not None and time.monotonic() - cached[0] < self.max_age:
+                return cached[1]
+            started = time.perf_counter()
+            rows = []
+            async for entries in self.iter_pages(kind, key):
+                rows += entries
+            if cached is not None and cached[1] == rows:
+                rows = cached[1]  # unchanged, callers can tell by identity
+            self._rows[(kind, key)] = (time.monotonic(), rows)
+            log.debug(f"{kind} {key}: {len(rows)} row(s) in {(time.perf_counter() - started) * 1000:.0f}ms")
+            return rows
+
+    async def get_results(self, event_key=CURRENT):
+        return await self.get_rows('results', event_key)
+
+    async def get_standings(self, season=CURRENT):
+        return await self.get_rows('standings', season)
+
+
+def from_config(config):
+    if config.RESULTS_PROVIDER == 'http':
+        return HttpResultsProvider(config.RESULTS_URL, concurrency=config.RESULTS_CONCURRENCY,
+                                   page_size=config.RESULTS_PAGE_SIZE, max_age=config.RESULTS_MAX_AGE)
+    return MockResultsProvider()
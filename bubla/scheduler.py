@@ -0,0 +1,115 @@
+import asyncio
+import heapq
+import logging
+import time
+from collections import namedtuple
+
+log = logging.getLogger(__name__)
+
+Deadline = namedtuple('Deadline', ['when', 'kind', 'event_id'])
+
+START = 'start'
+ENDS_SOON = 'ends_soon'
+END = 'end'
+
+
+class BoundaryScheduler:
+    """Sleeps until the nearest rally boundary and hands it to `callback`
+
+    Deadlines (rally start, "ends soon" threshold, rally end) are computed from the
+    event store and kept in a min-heap; the scheduler wakes up only when one is due or
+    when the store content changes. Deadlines due at the same moment are delivered
+    together in one `callback(deadlines)` call.
+    """
+
+    def __init__(self, event_store, callback, end_soon_days, clock=time.time, sleep=asyncio.sleep):
+        """
+        :param event_store: google_calendar.EventStore
+        :param callback: coroutine function taking a list of due Deadline
+        :param end_soon_days: how many days before the end the "ends soon" deadline fires
+        :param clock: epoch seconds source, injectable for tests
+        :param sleep: coroutine function used for waiting, injectable for tests
+        """
+        self.event_store = event_store
+        self.callback = callback
+        self.end_soon_seconds = end_soon_days * 24 * 3600
+        self.clock = clock
+        self.sleep = sleep
+        self.wakeups = 0
+        # deadlines up to this time were delivered (or predate the start)
+        self.processed_until = None
+        self._heap = []
+        self._wake = asyncio.Event()
+        self._task = None
+
+    def compute_deadlines(self, after):
+        """Deadlines later than `after`, as a heap"""
+        deadlines = []
+        for event in self.event_store.raw_events():
+            for when, kind in ((event.start_ts, START),
+                               (event.end_ts - self.end_soon_seconds, ENDS_SOON),
+                               (event.end_ts, END)):
+                if when > after:
+                    deadlines.append(Deadline(when, kind, event.id))
+        heapq.heapify(deadlines)
+        return deadlines
+
+    def reschedule(self):
+        # not against the clock: deadlines fallen due while a callback runs are still to deliver
+        if self.processed_until is None:
+            self.processed_until = self.clock()
+        self._heap = self.compute_deadlines(self.processed_until)
+        self._wake.set()
+        if self._heap:
+            log.debug(f"next deadline {self._heap[0]}, {len(self._heap)} scheduled")
+
+    @property
+    def next_deadline(self):
+        return self._heap[0] if self._heap else None
+
+    def start(self):
+        self.event_store.add_listener(self.reschedule)
+        self.reschedule()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run(), name='boundary-scheduler')
+
+    def stop(self):
+        self.event_store.remove_listener(self.reschedule)
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def pop_due(self, now):
+        due = []
+        while self._heap and self._heap[0].when <= now:
+            due.append(heapq.heappop(self._heap))
+        return due
+
+    async def _wait(self, delay):
+        """Wait for `delay` seconds (forever when None) or until rescheduled"""
+        waiters = [asyncio.ensure_future(self._wake.wait())]
+        if delay is not None:
+            waiters.append(asyncio.ensure_future(self.sleep(delay)))
+        try:
+            await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    async def run(self):
+        while True:
+            self._wake.clear()
+            deadline = self.next_deadline
+            delay = None if deadline is None else max(0.0, deadline.when - self.clock())
+            if delay is None or delay > 0:
+                await self._wait(delay)
+            self.wakeups += 1
+            due = self.pop_due(self.clock())
+            if not due:
+                continue
+            self.processed_until = max(self.processed_until, due[-1].when)
+            log.info(f"deadline(s) reached: {due}")
+            try:
+                await self.callback(due)
+            except Exception as e:
+                log.error(f"deadline callback failed: {type(e).__name__}: {e}")
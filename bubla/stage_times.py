@@ -0,0 +1,146 @@
+import numpy as np
+
+# parsed value of an empty or malformed time
+MISSING = -1
+
+WIDTH = 13  # sign + HH:MM:SS.mmm
+# digit offsets from the end of the string and their weight in milliseconds
+_DIGITS = np.array([12, 11, 9, 8, 6, 5, 3, 2, 1])
+_WEIGHTS = np.array([36_000_000, 3_600_000, 600_000, 60_000, 10_000, 1000, 100, 10, 1], dtype=np.int64)
+# separator offsets from the end of the string, the first one only with hours
+_SEPARATORS = np.array([10, 7, 4])
+_SEPARATOR_CHARS = np.array([ord(':'), ord(':'), ord('.')], dtype=np.uint8)
+# minute and second tens digits (columns of _DIGITS), at most 5
+_TENS = [2, 4]
+
+
+def parse_times(values):
+    """Milliseconds of '[+|-][HH:]MM:SS.mmm' strings, in one vectorized pass
+
+    The strings are packed into a fixed-width uint8 matrix and the digits are read
+    at offsets from the end of each string, so hours are optional. Empty, '--',
+    None, over-long and malformed values (minutes or seconds over 59) give MISSING.
+
+    :return: np.int64 array
+    """
+    try:
+        # None becomes b'None', which does not parse; one spare byte catches over-long values,
+        # which numpy would otherwise cut to the width silently
+        raw = np.array(values, dtype=f'S{WIDTH + 1}')
+    except UnicodeEncodeError:
+        raw = np.array([value if value and value.isascii() else '' for value in values], dtype=f'S{WIDTH + 1}')
+    count = len(raw)
+    if count == 0:
+        return np.empty(0, dtype=np.int64)
+    padded = raw.view(np.uint8).reshape(count, WIDTH + 1)
+    too_long = padded[:, WIDTH] != 0
+    chars = padded[:, :WIDTH]
+    lengths = WIDTH - (chars == 0).sum(axis=1)
+    signed = (chars[:, 0] == ord('+')) | (chars[:, 0] == ord('-'))
+    digits_length = lengths - signed
+    has_hours = digits_length == 12
+
+    rows = np.arange(count)[:, None]
+    positions = lengths[:, None] - _DIGITS
+    digits = chars[rows, np.clip(positions, 0, WIDTH - 1)].astype(np.int64) - ord('0')
+    # hour digits of MM:SS.mmm strings do not exist
+    digits[:, :2] *= has_hours[:, None]
+
+    separators = chars[rows, np.clip(lengths[:, None] - _SEPARATORS, 0, WIDTH - 1)] == _SEPARATOR_CHARS
+    separators[:, 0] |= ~has_hours
+
+    valid = (digits_length == 9) | has_hours
+    valid &= ((digits >= 0) & (digits <= 9)).all(axis=1) & separators.all(axis=1)
+    valid &= (digits[:, _TENS] <= 5).all(axis=1) & ~too_long
+
+    times = digits @ _WEIGHTS
+    times[chars[:, 0] == ord('-')] *= -1
+    times[~valid] = MISSING
+    return times
+
+
+def format_times(times, sign=False):
+    """Display strings of millisecond values, MM:SS.mmm or HH:MM:SS.mmm when over an hour"""
+    times = np.asarray(times, dtype=np.int64)
+    negative = times < 0
+    hours, rest = np.divmod(np.abs(times), 3_600_000)
+    minutes, rest = np.divmod(rest, 60_000)
+    seconds, millis = np.divmod(rest, 1000)
+    result = []
+    for h, m, s, ms, neg in zip(hours.tolist(), minutes.tolist(), seconds.tolist(), millis.tolist(),
+                                negative.tolist()):
+        text = f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}" if h else f"{m:02d}:{s:02d}.{ms:03d}"
+        if sign:
+            text = ('-' if neg else '+') + text
+        result.append(text)
+    return result
+
+
+class ResultSet:
+    """Event results as millisecond arrays
+
+    Finishers are ordered by total time, DNF entries (and entries without a valid total)
+    follow in their original order. Diffs are computed from the times, the strings the
+    source sent are ignored.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.stage = parse_times([row.get('stageTime') for row in rows])
+        self.total = parse_times([row.get('totalTime') for row in rows])
+        self.dnf = np.array([bool(row.get('isDnfEntry', False)) for row in rows], dtype=bool)
+        self.dnf |= self.total == MISSING
+        finished = ~self.dnf
+        # DNF last, finishers by total time, stable for equal times
+        self.order = np.lexsort((np.where(finished, self.total, 0), ~finished))
+        self.finishers = int(finished.sum())
+
+        total = self.total[self.order]
+        stage = self.stage[self.order]
+        leader = total[0] if self.finishers else 0
+        finisher_stages = stage[:self.finishers][stage[:self.finishers] != MISSING]
+        best_stage = finisher_stages.min() if finisher_stages.size else 0
+        self.total_diff = total - leader
+        self.interval = np.diff(total, prepend=leader)
+        self.stage_diff = stage - best_stage
+
+    def __len__(self):
+        return len(self.rows)
+
+    def display_rows(self, headers, limit=None):
+        """Rows for rendering, re-ranked, with time columns formatted from the arrays"""
+        count = len(self) if limit is None else min(limit, len(self))
+        order = self.order[:count]
+        stage = self.stage[order]
+        columns = {
+            'stageTime': format_times(stage),
+            'stageDiff': format_times(self.stage_diff[:count], sign=True),
+            'totalTime': format_times(self.total[order]),
+            'totalDiff': format_times(self.total_diff[:count], sign=True),
+            'interval': format_times(self.interval[:count], sign=True),
+        }
+        # leaders show '--' instead of a zero diff
+        leaders = {
+            'stageDiff': (self.stage_diff[:count] == 0).tolist(),
+            'totalDiff': [position == 0 for position in range(count)],
+            'interval': [position == 0 for position in range(count)],
+        }
+        missing_stage = (stage == MISSING).tolist()
+        result = []
+        for position, index in enumerate(order.tolist()):
+            row = self.rows[index]
+            finished = position < self.finishers
+            line = {}
+            for header in headers:
+                if header == 'rank':
+                    line[header] = position + 1 if finished else 'DNF'
+                elif header not in columns:
+                    line[header] = row.get(header, '')
+                elif not finished or (header.startswith('stage') and missing_stage[position]):
+                    line[header] = ''
+                elif header in leaders and leaders[header][position]:
+                    line[header] = '--'
+                else:
+                    line[header] = columns[header][position]
+            result.append(line)
+        return result
@@ -0,0 +1,135 @@
+import numpy as np
+
+# points for 1st, 2nd, ... place of one event
+CLUB_POINTS = (10, 8, 6, 5, 4, 3, 2, 1)
+WRC_POINTS = (25, 18, 15, 12, 10, 8, 6, 4, 2, 1)
+
+
+class Standings:
+    """Championship standings computed by :class:`StandingsEngine`, rows ordered by rank
+
+    :ivar names: driver names
+    :ivar points: driver x event points matrix
+    :ivar totals: counted points, after dropping the worst results
+    :ivar ranks: championship rank, drivers tied on points and countback share it
+    :ivar rank_changes: ranks gained since the standings before the last event, 0 for new drivers
+    """
+
+    def __init__(self, names, points, totals, ranks, rank_changes):
+        self.names = names
+        self.points = points
+        self.totals = totals
+        self.ranks = ranks
+        self.rank_changes = rank_changes
+
+    def __len__(self):
+        return len(self.names)
+
+    def table(self, limit=None):
+        """(headers, rows) ready for tabulate"""
+        count = len(self) if limit is None else min(limit, len(self))
+        headers = ['rank', '+/-', 'displayName', 'totalPoints', *range(self.points.shape[1])]
+        changes = [f"{change:+d}" if change else '' for change in self.rank_changes[:count].tolist()]
+        rows = [[rank, change, name, total, *points] for rank, change, name, total, points in
+                zip(self.ranks[:count].tolist(), changes, self.names[:count], self.totals[:count].tolist(),
+                    self.points[:count].tolist())]
+        return headers, rows
+
+    def as_rows(self):
+        """Rows in the club standings shape (rank, displayName, totalPoints, eventPoints)"""
+        return [{'rank': rank, 'displayName': name, 'totalPoints': total, 'rankChange': change,
+                 'eventPoints': [{'eventIndex': index, 'points': value} for index, value in enumerate(points)]}
+                for rank, name, total, change, points in
+                zip(self.ranks.tolist(), self.names, self.totals.tolist(), self.rank_changes.tolist(),
+                    self.points.tolist())]
+
+
+class StandingsEngine:
+    """Championship standings from raw per event results
+
+    Results are turned into a driver x event matrix of finishing positions, from which
+    points, totals with the worst `drop_worst` results dropped, countback tie-breaks (most
+    wins, then most 2nd places, ...) and rank changes are computed with array operations.
+    """
+
+    def __init__(self, points_table=CLUB_POINTS, drop_worst=0, dnf_points=0):
+        self.points_table = np.asarray(points_table, dtype=np.int32)
+        self.drop_worst = drop_worst
+        self.dnf_points = dnf_points
+
+    @staticmethod
+    def position_matrix(event_results):
+        """
+        :param event_results: per event list of result rows (rank, name, isDnfEntry)
+        :return: (names, positions, dnf) where positions is a driver x event int32 matrix,
+            0 meaning the driver did not take part, and dnf a boolean matrix
+        """
+        counts = [len(rows) for rows in event_results]
+        flat = [row for rows in event_results for row in rows]
+        names = list(dict.fromkeys([row['name'] for row in flat]))
+        ids = {name: driver for driver, name in enumerate(names)}
+        driver_ids = np.fromiter(map(ids.__getitem__, [row['name'] for row in flat]), dtype=np.intp, count=len(flat))
+        event_ids = np.repeat(np.arange(len(event_results)), counts)
+        shape = (len(names), len(event_results))
+        positions = np.zeros(shape, dtype=np.int32)
+        dnf = np.zeros(shape, dtype=bool)
+        positions[driver_ids, event_ids] = [row['rank'] for row in flat]
+        dnf[driver_ids, event_ids] = [row.get('isDnfEntry', False) for row in flat]
+        return names, positions, dnf
+
+    def event_points(self, positions, dnf):
+        """driver x event points: table lookup by position, nothing outside the table"""
+        table = np.zeros(max(len(self.points_table), int(positions.max(initial=0))) + 1, dtype=np.int32)
+        table[1:len(self.points_table) + 1] = self.points_table
+        points = table[positions]
+        points[dnf] = self.dnf_points
+        return points
+
+    def counted_totals(self, points):
+        totals = points.sum(axis=1)
+        drop = min(self.drop_worst, points.shape[1] - 1)
+        if drop > 0:
+            totals -= np.partition(points, drop - 1, axis=1)[:, :drop].sum(axis=1)
+        return totals
+
+    def countback(self, positions, dnf):
+        """driver x place counts of scoring finishes, column 0 holds the wins"""
+        places = len(self.points_table)
+        scored = (positions >= 1) & (positions <= places) & ~dnf
+        drivers = np.nonzero(scored)[0]
+        counts = np.bincount(drivers * places + positions[scored] - 1, minlength=positions.shape[0] * places)
+        return counts.reshape(positions.shape[0], places)
+
+    def rank(self, positions, dnf):
+        """(order, points, totals, ranks) of drivers: by totals, then countback; full ties share a rank
+
+        `points` and `totals` are per driver, `ranks` follow `order`.
+        """
+        points = self.event_points(positions, dnf)
+        totals = self.counted_totals(points)
+        counts = self.countback(positions, dnf)
+        # np.lexsort sorts by the last key first
+        keys = np.column_stack([totals, counts])
+        order = np.lexsort(tuple(-keys[:, column] for column in reversed(range(keys.shape[1]))))
+        sorted_keys = keys[order]
+        new_rank = np.ones(len(order), dtype=bool)
+        new_rank[1:] = (sorted_keys[1:] != sorted_keys[:-1]).any(axis=1)
+        # rank of a tied driver is the position of the first driver of the tie
+        ranks_sorted = np.maximum.accumulate(np.where(new_rank, np.arange(1, len(order) + 1), 0))
+        return order, points, totals, ranks_sorted
+
+    def compute(self, event_results):
+        names, positions, dnf = self.position_matrix(event_results)
+        order, points, totals, ranks = self.rank(positions, dnf)
+
+        rank_changes = np.zeros(len(names), dtype=np.int32)
+        if positions.shape[1] > 1:
+            previous = positions[:, :-1]
+            previous_order, _, _, previous_ranks = self.rank(previous, dnf[:, :-1])
+            rank_by_driver = np.empty(len(names), dtype=np.int32)
+            rank_by_driver[previous_order] = previous_ranks
+            took_part = (previous > 0).any(axis=1)
+            rank_changes = np.where(took_part[order], rank_by_driver[order] - ranks, 0)
+
+        return Standings([names[driver] for driver in order.tolist()], points[order], totals[order],
+                         ranks, rank_changes)
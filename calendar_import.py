@@ -1,50 +1,94 @@
+import argparse
 import csv
+import itertools
 import logging
-import pprint
 import datetime
-from collections import namedtuple, OrderedDict
+import sys
+import time
+from collections import namedtuple
 
 import tabulate
 
 from google_calendar import Calendar
+from utils.interval_index import IntervalIndex
 from utils import config, logger_settings
-from googleapiclient.discovery import build
 
-logging.root.setLevel(logging.NOTSET)
-logger_settings.config_console_logger(level=logging.NOTSET)
 log = logging.getLogger(__name__)
 
-log.info("asdf")
-CSV_FILENAME = 'data/DiRT Rally 2.0 planner - 23Q4csv.csv'
+CSV_COLUMNS = 10
+CHUNK_SIZE = 50
 
 rally_event = namedtuple('RallyEvent', 'event start end location distance stages')
 stage_event = namedtuple('StageEvent', 'ss stage length condition service')
 
 
+class ImportStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.rows = 0
+        self.invalid_rows = 0
+        self.rallies = 0
+        self.created = 0
+
+    def report(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return (f"{self.rows} rows ({self.invalid_rows} invalid), {self.rallies} rallies, {self.created} created"
+                f" in {elapsed:.2f}s: {self.rows / elapsed:.1f} rows/s, {self.rallies / elapsed:.1f} rallies/s")
+
+
 def load_csv(filename):
-    with open(filename) as csvfile:
-        csvdata = csv.reader(csvfile, delimiter=',')
-        return list(csvdata)
+    """Stream rows of a season CSV, header included"""
+    with open(filename, newline='') as csvfile:
+        yield from csv.reader(csvfile, delimiter=',')
+
+
+def validate_rows(csvdata, filename='', stats=None):
+    """Pass through well-formed rows, skip (and log) the broken ones"""
+    csv_iterator = iter(csvdata)
+    header = next(csv_iterator, None)
+    if header is not None:
+        yield header
+    for line_number, line in enumerate(csv_iterator, start=2):
+        if stats:
+            stats.rows += 1
+        if len(line) < CSV_COLUMNS or not line[0]:
+            log.warning(f"{filename}:{line_number} skipped, malformed row {line}")
+            if stats:
+                stats.invalid_rows += 1
+            continue
+        try:
+            for date_field in line[1:3]:
+                if date_field:
+                    datetime.date.fromisoformat(date_field)
+        except ValueError:
+            log.warning(f"{filename}:{line_number} skipped, invalid date in {line[1:3]}")
+            if stats:
+                stats.invalid_rows += 1
+            continue
+        yield line
 
 
 def compile_rally_data_from_csv(csvdata):
-    rally_data = OrderedDict()
+    """Group stage rows into rallies, yielding each rally once its rows are consumed
+
+    Rows of one rally are expected to be consecutive.
+    """
     csv_iterator = iter(csvdata)
-    next(csv_iterator)  # skip header
+    next(csv_iterator, None)  # skip header
+    current_rally = None
     for line in csv_iterator:
         line_rally = rally_event(line[0], line[1], line[2], line[3], line[4], [])
         line_stage = stage_event(line[5], line[6], line[7], line[8], line[9])
 
-        rally_number = line_rally.event
-
-        if rally_number not in rally_data:
-            rally_data[rally_number] = line_rally
-
-        line_rally = rally_data[rally_number]
+        if current_rally is None or current_rally.event != line_rally.event:
+            if current_rally is not None:
+                yield current_rally
+            current_rally = line_rally
 
         if line_stage.stage:
-            line_rally.stages.append(line_stage)
-    return rally_data
+            current_rally.stages.append(line_stage)
+    if current_rally is not None:
+        yield current_rally
 
 
 def prepare_calendar_event(line_rally_event):
@@ -64,13 +108,87 @@ def format_stage_text(rally_stages: [stage_event]):
     return text
 
 
-def create_events(rally_data):
+def event_date_interval(calendar_event):
+    return (Calendar.parse_event_time(calendar_event['start']).date(),
+            Calendar.parse_event_time(calendar_event['end']).date())
+
+
+def plan_missing_events(rallies, existing_events):
+    """Rallies from the CSV that have no overlapping event in the calendar yet"""
+    index = IntervalIndex(existing_events, key=event_date_interval)
+    missing = []
+    for line in rallies:
+        start = datetime.date.fromisoformat(line.start)
+        end = datetime.date.fromisoformat(line.end)
+        if not index.overlaps(start, end):
+            missing.append(line)
+    return missing
+
+
+def create_events(calendar, rallies, dry_run=False):
+    """Create calendar events for rallies not in the calendar yet
+
+    :return: number of created (or, with dry_run, planned) events
+    """
+    if not rallies:
+        return 0
+    range_start = min(line.start for line in rallies)
+    range_end = max(line.end for line in rallies)
+    existing_events = calendar.list_events_range(range_start, range_end)
+    missing = plan_missing_events(rallies, existing_events)
+
+    log.info(f"{len(rallies)} rallies, {len(existing_events)} calendar event(s) in {range_start}..{range_end},"
+             f" {len(missing)} to be created")
+    if missing:
+        print(tabulate.tabulate([[line.event, line.location, line.start, line.end] for line in missing],
+                                headers=['create', 'location', 'start', 'end']))
+    if dry_run or not missing:
+        return len(missing)
+    failed = calendar.create_events_batch([prepare_calendar_event(line) for line in missing])
+    return len(missing) - len(failed)
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def import_file(calendar, filename, stats, dry_run=False, chunk_size=CHUNK_SIZE):
+    rallies = compile_rally_data_from_csv(validate_rows(load_csv(filename), filename, stats))
+    for chunk in chunks(rallies, chunk_size):
+        stats.rallies += len(chunk)
+        stats.created += create_events(calendar, chunk, dry_run=dry_run)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Import rally season CSV files into the rally calendar")
+    parser.add_argument('filenames', nargs='+', metavar='CSV', help="season CSV file(s)")
+    parser.add_argument('--dry-run', action='store_true', help="only print events that would be created")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help=f"rallies diffed and inserted per round-trip (default {CHUNK_SIZE})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.root.setLevel(logging.NOTSET)
+    logger_settings.config_console_logger(level=logging.INFO)
+
     calendar = Calendar(config.CALENDAR_ID, config.CALENDAR_SECRET_FILENAME, config.CALENDAR_TOKEN_FILENAME)
-    for line in rally_data.values():
-        event = prepare_calendar_event(line)
-        if not calendar.event_exists(line.start, line.end):
-            calendar.create_event(event)
-
-csvdata = load_csv(CSV_FILENAME)
-rally_data = compile_rally_data_from_csv(csvdata)
-create_events(rally_data)
+    total = ImportStats()
+    for filename in args.filenames:
+        stats = ImportStats()
+        import_file(calendar, filename, stats, dry_run=args.dry_run, chunk_size=args.chunk_size)
+        log.info(f"{filename}: {stats.report()}")
+        total.rows += stats.rows
+        total.invalid_rows += stats.invalid_rows
+        total.rallies += stats.rallies
+        total.created += stats.created
+    if len(args.filenames) > 1:
+        log.info(f"total: {total.report()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
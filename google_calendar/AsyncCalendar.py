@@ -0,0 +1,80 @@
+import asyncio
+import concurrent.futures
+import functools
+import logging
+import time
+
+from utils.metrics import metrics
+
+from .Calendar import Calendar
+
+log = logging.getLogger(__name__)
+
+api_calls = metrics.counter('google_api_calls_total', "Google Calendar API calls", ['method', 'status'])
+api_latency = metrics.histogram('google_api_latency_seconds', "Google Calendar API call latency", ['method'])
+
+
+class AsyncCalendar:
+    """Non-blocking facade over :class:`Calendar`
+
+    googleapiclient/httplib2 calls are blocking, so every API call is pushed into a small,
+    bounded thread pool and awaited from the event loop. Pure helpers (formatting etc.)
+    are delegated to the wrapped calendar directly.
+    """
+
+    def __init__(self, calendar: Calendar, max_workers=2):
+        self.calendar = calendar
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers,
+                                                              thread_name_prefix='calendar')
+
+    @classmethod
+    def from_config(cls, config, max_workers=2):
+        calendar = Calendar(config.CALENDAR_ID, config.CALENDAR_SECRET_FILENAME, config.CALENDAR_TOKEN_FILENAME)
+        return cls(calendar, max_workers=max_workers)
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            result = await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+            status = 'ok'
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            api_calls.inc(method=func.__name__, status=status)
+            api_latency.observe(elapsed, method=func.__name__)
+            log.debug(f"{func.__name__}() took {elapsed * 1000:.1f}ms")
+
+    def start(self):
+        """Keep the credentials fresh in the background"""
+        if self.calendar.own_service:
+            self.calendar.credential_manager.start(self.executor)
+
+    def stop(self):
+        self.calendar.credential_manager.stop()
+
+    async def get_service(self):
+        return await self._run(self.calendar.get_service)
+
+    async def create_event(self, event):
+        return await self._run(self.calendar.create_event, event)
+
+    async def list_events(self, event_limit=5, date_start=None):
+        return await self._run(self.calendar.list_events, event_limit, date_start)
+
+    async def sync_events(self, sync_token=None):
+        return await self._run(self.calendar.sync_events, sync_token)
+
+    async def get_events(self, event_limit=5, date_start=None):
+        return await self._run(self.calendar.get_events, event_limit, date_start)
+
+    async def event_exists(self, date_start, date_end):
+        return await self._run(self.calendar.event_exists, date_start, date_end)
+
+    def format_events(self, events):
+        return self.calendar.format_events(events)
+
+    def close(self):
+        self.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,18 +1,16 @@
 import datetime
 import logging
 import os.path
-import pprint
-import cachetools
+import threading
 from collections import namedtuple
 
 from utils import config
+from utils.render_cache import render_cache
 
-import markdownify
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+from .CredentialManager import CredentialManager
+
+# googleapiclient, httplib2 and google-auth are imported on first API use, they make up
+# most of the bot's import time and commands are served from the event store anyway
 
 # If modifying these scopes, delete the file calendar_token.json.
 SCOPES = [
@@ -20,46 +18,68 @@ SCOPES = [
     'https://www.googleapis.com/auth/calendar.events'
 ]
 
+SYNC_PAGE_SIZE = 250
+# Google limits the number of calls in one batch request
+BATCH_SIZE = 50
+HTTP_TIMEOUT = 30
+
 Event = namedtuple('Event', ['summary', 'start', 'end', 'active', 'upcoming', 'remains', 'starts_in', 'description'])
 
 log = logging.getLogger(__name__)
 
 
+class SyncTokenExpired(Exception):
+    """The stored syncToken is no longer valid (410 Gone), a full sync is needed"""
+
+
 class Calendar:
 
-    def __init__(self, calendar_id, credentials_filename, token_filename):
+    def __init__(self, calendar_id, credentials_filename, token_filename, service=None):
         self.calendar_id = calendar_id
         self.credentials_filename = credentials_filename
         self.token_filename = token_filename
+        # pre-built service (or a local stand-in for the API), skips authentication
+        self.service = service
+        self.own_service = service is None
+        self.credential_manager = CredentialManager(credentials_filename, token_filename, SCOPES)
+        self._service_lock = threading.Lock()
+        # httplib2.Http is not thread-safe, every worker thread keeps its own keep-alive connection
+        self._local = threading.local()
 
     def authenticate(self):
-        creds = None
-        # The file calendar_token.json stores the user's access and refresh tokens, and is
-        # created automatically when the authorization flow completes for the first
-        # time.
-        if os.path.exists(self.token_filename):
-            creds = Credentials.from_authorized_user_file(self.token_filename, SCOPES)
-        # If there are no (valid) credentials available, let the user log in.
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(self.credentials_filename, SCOPES)
-                creds = flow.run_local_server(port=0)
-            # Save the credentials for the next run
-            with open(self.token_filename, 'w') as token:
-                token.write(creds.to_json())
-        return creds
-
-    @cachetools.cached(cachetools.TTLCache(maxsize=100, ttl=60))
+        return self.credential_manager.load()
+
     def get_service(self):
-        try:
-            creds = self.authenticate()
-            service = build('calendar', 'v3', credentials=creds)
-            return service
-        except HttpError as error:
-            log.error(error)
-            raise error
+        """Long-lived service object, built once from the discovery document bundled with googleapiclient"""
+        if self.service is not None:
+            return self.service
+        with self._service_lock:
+            if self.service is None:
+                from googleapiclient.discovery import build
+                self.service = build('calendar', 'v3', credentials=self.authenticate(),
+                                     static_discovery=True, cache_discovery=False)
+                log.debug("calendar service built")
+        return self.service
+
+    def http(self):
+        """Authorized keep-alive connection of the calling thread
+
+        Requests are executed with this instead of the service's shared http. Credentials
+        come from the credential manager, which refreshes them in the background.
+        """
+        if not self.own_service:
+            return None  # injected service, use its own transport
+        credentials = self.credential_manager.credentials
+        http = getattr(self._local, 'http', None)
+        if http is None:
+            import google_auth_httplib2
+            import httplib2
+            http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+            self._local.http = http
+        elif http.credentials is not credentials:
+            # refreshed in the background, keep the connection and swap the credentials
+            http.credentials = credentials
+        return http
 
     @staticmethod
     def get_event_template(summary, description, start, end):
@@ -80,11 +100,59 @@ class Calendar:
     def create_event(self, event):
         service = self.get_service()
         events = service.events()
-        event_obj = events.insert(calendarId=config.CALENDAR_ID, body=event).execute()
+        event_obj = events.insert(calendarId=self.calendar_id, body=event).execute(http=self.http())
         log.debug(f"Event created {event_obj.get('htmlLink')}")
 
-    @cachetools.cached(cachetools.TTLCache(100, 600))
-    def get_events(self, event_limit=5, date_start=None):
+    def create_events_batch(self, events):
+        """Insert many events using batch HTTP requests, BATCH_SIZE inserts per round-trip
+
+        :return: list of (event, error) for the inserts that failed
+        """
+        service = self.get_service()
+        failed = []
+        for chunk_start in range(0, len(events), BATCH_SIZE):
+            chunk = events[chunk_start:chunk_start + BATCH_SIZE]
+
+            def callback(request_id, response, exception, chunk=chunk):
+                event = chunk[int(request_id)]
+                if exception is not None:
+                    log.error(f"Event {event.get('summary')} not created: {exception}")
+                    failed.append((event, exception))
+                else:
+                    log.debug(f"Event created {response.get('htmlLink')}")
+
+            batch = service.new_batch_http_request(callback=callback)
+            for idx, event in enumerate(chunk):
+                batch.add(service.events().insert(calendarId=self.calendar_id, body=event), request_id=str(idx))
+            batch.execute(http=self.http())
+        log.info(f"{len(events) - len(failed)}/{len(events)} event(s) created")
+        return failed
+
+    def list_events_range(self, date_start, date_end):
+        """Raw events.list items of all events overlapping date_start..date_end (ISO dates)"""
+        from googleapiclient.errors import HttpError
+        service = self.get_service()
+        date_start_spec = datetime.datetime.fromisoformat(date_start).isoformat() + 'Z'
+        date_end_spec = datetime.datetime.fromisoformat(date_end).isoformat() + 'Z'
+        items = []
+        page_token = None
+        while True:
+            try:
+                events_result = service.events().list(calendarId=self.calendar_id, timeMin=date_start_spec,
+                                                      timeMax=date_end_spec, maxResults=SYNC_PAGE_SIZE,
+                                                      singleEvents=True, orderBy='startTime',
+                                                      pageToken=page_token).execute(http=self.http())
+            except HttpError as error:
+                log.error('An error occurred: %s' % error)
+                raise error
+            items += events_result.get('items', [])
+            page_token = events_result.get('nextPageToken')
+            if not page_token:
+                return items
+
+    def list_events(self, event_limit=5, date_start=None):
+        """Raw events.list items from the calendar, ordered by start time"""
+        from googleapiclient.errors import HttpError
         try:
             service = self.get_service()
 
@@ -97,44 +165,80 @@ class Calendar:
                 date_start_spec = datetime.datetime.fromisoformat(date_start).isoformat() + 'Z'
                 date_end_spec = datetime.datetime.fromisoformat(date_start) + datetime.timedelta(days=1)
                 date_end_spec = date_end_spec.isoformat() + 'Z'
-            # print('Getting the upcoming 10 events')
             events_result = service.events().list(calendarId=self.calendar_id, timeMin=date_start_spec,
                                                   timeMax=date_end_spec,
                                                   maxResults=event_limit, singleEvents=True,
-                                                  orderBy='startTime').execute()
+                                                  orderBy='startTime').execute(http=self.http())
             events = events_result.get('items', [])
             if not events:
-                print('No upcoming events found.')
-                return
-
-            results = []
-            # Prints the start and name of the next 10 events
-            for event in events:
-                # pprint.pprint(event)
-                start = datetime.datetime.strptime(event['start'].get('date'), '%Y-%m-%d').astimezone()
-                end = datetime.datetime.strptime(event['end'].get('date'), '%Y-%m-%d').astimezone()
-                date_start_spec = datetime.datetime.utcnow().astimezone()
-                active = start < date_start_spec < end
-                upcoming = date_start_spec < start
-                remains = end - date_start_spec
-                starts_in = start - date_start_spec
-                results.append(Event(
-                    summary=event.get('summary'),
-                    start=start,
-                    end=end,
-                    active=active,
-                    upcoming=upcoming,
-                    remains=remains,
-                    starts_in=starts_in,
-                    description=event.get('description'),
-                ))
-            return results
+                log.debug('No upcoming events found.')
+            return events
 
         except HttpError as error:
             log.error('An error occurred: %s' % error)
             raise error
 
+    def sync_events(self, sync_token=None):
+        """Full (no token) or incremental (with token) listing of the calendar
+
+        Returns the changed items, cancelled events included with status 'cancelled',
+        and the nextSyncToken for the following call.
+
+        :raises SyncTokenExpired: when the API rejects the token with 410 Gone
+        """
+        from googleapiclient.errors import HttpError
+        service = self.get_service()
+        items = []
+        page_token = None
+        while True:
+            try:
+                events_result = service.events().list(calendarId=self.calendar_id, singleEvents=True,
+                                                      maxResults=SYNC_PAGE_SIZE, syncToken=sync_token,
+                                                      pageToken=page_token).execute(http=self.http())
+            except HttpError as error:
+                if error.resp.status == 410:
+                    log.info("sync token expired, full sync required")
+                    raise SyncTokenExpired() from error
+                log.error('An error occurred: %s' % error)
+                raise error
+            items += events_result.get('items', [])
+            page_token = events_result.get('nextPageToken')
+            if not page_token:
+                break
+        log.debug(f"{'incremental' if sync_token else 'full'} sync returned {len(items)} item(s)")
+        return items, events_result.get('nextSyncToken')
+
+    def get_events(self, event_limit=5, date_start=None):
+        now = datetime.datetime.utcnow().astimezone()
+        results = []
+        for event in self.list_events(event_limit, date_start):
+            start = self.parse_event_time(event['start'])
+            end = self.parse_event_time(event['end'])
+            results.append(self.make_event(event.get('summary'), event.get('description'), start, end, now))
+        return results
+
+    @staticmethod
+    def parse_event_time(event_time):
+        if 'date' in event_time:
+            return datetime.datetime.strptime(event_time['date'], '%Y-%m-%d').astimezone()
+        return datetime.datetime.fromisoformat(event_time['dateTime']).astimezone()
+
+    @staticmethod
+    def make_event(summary, description, start, end, now):
+        """Event view with the time-relative fields computed against `now`"""
+        return Event(
+            summary=summary,
+            start=start,
+            end=end,
+            active=start < now < end,
+            upcoming=now < start,
+            remains=end - now,
+            starts_in=start - now,
+            description=description,
+        )
+
     def event_exists(self, date_start, date_end):
+        from googleapiclient.errors import HttpError
         log.debug(f"event_exists() called {date_start}->{date_end}")
         try:
             service = self.get_service()
@@ -147,39 +251,18 @@ class Calendar:
             events_result = service.events().list(calendarId=self.calendar_id, timeMin=date_start_spec,
                                                   timeMax=date_end_spec,
                                                   maxResults=1, singleEvents=True,
-                                                  orderBy='startTime').execute()
+                                                  orderBy='startTime').execute(http=self.http())
             events = events_result.get('items', [])
-            print(events)
+            log.debug(f"event_exists() found {events}")
             if not events:
                 log.debug('No upcoming events found.')
                 return False
         except HttpError as error:
-            print('An error occurred: %s' % error)
+            log.error('An error occurred: %s' % error)
             raise error
         log.debug("event exists")
         return True
 
-    def get_events_current(self):
-        events = self.get_events()
-        return [event for event in events if event.active]
-
-    def get_events_upcoming(self):
-        events = self.get_events()
-        return [event for event in events if event.upcoming]
-
-    def get_events_end_soon(self):
-        events = self.get_events_current()
-        return [event for event in events if event.remains.days <= config.DISCORD_EVENT_END_SOON_DAYS]
-
-    def get_events_next(self):
-        events = self.get_events_upcoming()
-        return [event for event in events if event.starts_in.days <= config.DISCORD_EVENT_START_SOON_DAYS]
-
-    def get_event_started_today(self):
-        events = self.get_events_upcoming()
-        today_date = datetime.datetime.utcnow().date()
-        return [event for event in events if event.start.date() == today_date]
-
     def format_time_field(self, time_field):
         result = ''
         if time_field.days > 0:
@@ -211,6 +294,13 @@ class Calendar:
         return result
 
     def format_events(self, events):
+        # output only changes when an event or its displayed remaining/starts-in value changes
+        key = render_cache.content_key('events', *[
+            (event.summary, event.description, event.start, event.end, event.active, event.upcoming,
+             event.starts_in.days, self.get_event_timing(event)) for event in events])
+        return render_cache.get_or_render(key, lambda: self._format_events(events))
+
+    def _format_events(self, events):
         result = []
         for event in events:
             semaphore = self.get_semaphore(event)
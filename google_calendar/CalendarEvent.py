@@ -0,0 +1,64 @@
+import datetime
+import functools
+import sys
+import time
+
+
+@functools.lru_cache(maxsize=1024)
+def date_to_epoch(date):
+    """Local midnight of an ISO 'YYYY-MM-DD' date as epoch seconds"""
+    year, month, day = int(date[0:4]), int(date[5:7]), int(date[8:10])
+    return int(time.mktime((year, month, day, 0, 0, 0, 0, 0, -1)))
+
+
+def datetime_to_epoch(date_time):
+    """RFC 3339 'dateTime' as epoch seconds"""
+    return int(datetime.datetime.fromisoformat(date_time).timestamp())
+
+
+def parse_event_time(event_time):
+    """(epoch seconds, all day) of a Google event start/end field"""
+    date = event_time.get('date')
+    if date is not None:
+        return date_to_epoch(date), True
+    return datetime_to_epoch(event_time['dateTime']), False
+
+
+class CalendarEvent:
+    """Compact calendar event, times are epoch seconds
+
+    Parsed once from the Google payload; datetimes are only built when asked for.
+    """
+    __slots__ = ('id', 'summary', 'description', 'start_ts', 'end_ts', 'all_day')
+
+    def __init__(self, id, summary, description, start_ts, end_ts, all_day=False):
+        self.id = id
+        self.summary = summary
+        self.description = description
+        self.start_ts = start_ts
+        self.end_ts = end_ts
+        self.all_day = all_day
+
+    @classmethod
+    def from_google(cls, raw):
+        start_ts, all_day = parse_event_time(raw['start'])
+        end_ts, _ = parse_event_time(raw['end'])
+        summary = raw.get('summary')
+        return cls(raw.get('id'), sys.intern(summary) if summary else summary, raw.get('description'),
+                   start_ts, end_ts, all_day)
+
+    @property
+    def start(self):
+        return datetime.datetime.fromtimestamp(self.start_ts).astimezone()
+
+    @property
+    def end(self):
+        return datetime.datetime.fromtimestamp(self.end_ts).astimezone()
+
+    def __eq__(self, other):
+        if not isinstance(other, CalendarEvent):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self):
+        return f"CalendarEvent(id={self.id!r}, summary={self.summary!r}, start_ts={self.start_ts}, end_ts={self.end_ts})"
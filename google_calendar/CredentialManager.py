@@ -0,0 +1,133 @@
+import asyncio
+import datetime
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class CredentialManager:
+    """Keeps OAuth credentials valid ahead of time
+
+    A background task refreshes the token `refresh_margin` seconds before it expires and
+    swaps in the new credentials object, so callers just read :attr:`credentials`
+    without locking and never pay the OAuth round-trip on the hot path.
+    """
+
+    def __init__(self, credentials_filename, token_filename, scopes, refresh_margin=300, retry_interval=60):
+        self.credentials_filename = credentials_filename
+        self.token_filename = token_filename
+        self.scopes = scopes
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self.credentials = None
+        self.refresh_count = 0
+        self.refresh_failures = 0
+        self.last_refresh_latency = None
+        self.last_error = None
+        self._refresh_lock = threading.Lock()
+        self._task = None
+
+    def load(self):
+        """Current credentials, loading (or interactively obtaining) them on first use"""
+        if self.credentials is not None:
+            return self.credentials
+        with self._refresh_lock:
+            if self.credentials is not None:
+                return self.credentials
+            from google.auth.transport.requests import Request
+            from google.oauth2.credentials import Credentials
+            from google_auth_oauthlib.flow import InstalledAppFlow
+
+            creds = None
+            # The file calendar_token.json stores the user's access and refresh tokens, and is
+            # created automatically when the authorization flow completes for the first
+            # time.
+            if os.path.exists(self.token_filename):
+                creds = Credentials.from_authorized_user_file(self.token_filename, self.scopes)
+            # If there are no (valid) credentials available, let the user log in.
+            if not creds or not creds.valid:
+                if creds and creds.expired and creds.refresh_token:
+                    creds.refresh(Request())
+                else:
+                    flow = InstalledAppFlow.from_client_secrets_file(self.credentials_filename, self.scopes)
+                    creds = flow.run_local_server(port=0)
+                self.save(creds)
+            self.credentials = creds
+        return self.credentials
+
+    def refresh(self):
+        """Refresh a copy of the credentials and swap it in, blocking"""
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+
+        with self._refresh_lock:
+            started = time.perf_counter()
+            try:
+                creds = Credentials.from_authorized_user_info(json.loads(self.credentials.to_json()), self.scopes)
+                creds.refresh(Request())
+                self.save(creds)
+            except Exception as e:
+                self.refresh_failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                self.last_refresh_latency = time.perf_counter() - started
+            self.credentials = creds
+            self.refresh_count += 1
+            log.info(f"credentials refreshed in {self.last_refresh_latency * 1000:.0f}ms, valid until {creds.expiry}")
+        return creds
+
+    def save(self, creds):
+        """Write the token file atomically, readers never see a half-written file"""
+        directory = os.path.dirname(os.path.abspath(self.token_filename))
+        fd, tmp_filename = tempfile.mkstemp(dir=directory, prefix='.token-')
+        try:
+            with os.fdopen(fd, 'w') as token:
+                token.write(creds.to_json())
+            os.replace(tmp_filename, self.token_filename)
+        except BaseException:
+            os.unlink(tmp_filename)
+            raise
+
+    def seconds_until_refresh(self):
+        expiry = self.credentials.expiry if self.credentials else None
+        if expiry is None:
+            return None
+        # google-auth keeps expiry as naive UTC
+        remaining = expiry - datetime.datetime.utcnow()
+        return max(0.0, remaining.total_seconds() - self.refresh_margin)
+
+    def start(self, executor=None):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._refresh_loop(executor),
+                                                                name='credential-refresh')
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _refresh_loop(self, executor):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(executor, self.load)
+        while True:
+            delay = self.seconds_until_refresh()
+            if delay is None:
+                log.info("credentials do not expire, background refresh stopped")
+                return
+            await asyncio.sleep(delay)
+            try:
+                await loop.run_in_executor(executor, self.refresh)
+            except Exception as e:
+                log.error(f"credentials refresh failed: {type(e).__name__}: {e}")
+                await asyncio.sleep(self.retry_interval)
+
+    def report(self):
+        latency = f"{self.last_refresh_latency * 1000:.0f}ms" if self.last_refresh_latency is not None else "n/a"
+        return (f"credentials: {self.refresh_count} refresh(es), {self.refresh_failures} failure(s), "
+                f"last latency {latency}, expiry {self.credentials.expiry if self.credentials else None}")
@@ -0,0 +1,282 @@
+import array
+import asyncio
+import bisect
+import datetime
+import logging
+import struct
+import time
+
+from utils import config
+from utils.interval_index import IntervalIndex
+
+from .Calendar import Calendar, SyncTokenExpired
+from .CalendarEvent import CalendarEvent
+from .Snapshot import read_snapshot, write_snapshot
+
+log = logging.getLogger(__name__)
+
+
+class EventStore:
+    """Process-wide, in-memory copy of the rally calendar
+
+    Raw events are kept sorted by start time; the time-relative fields of
+    :class:`google_calendar.Event` (active, remains, ...) are computed at query time,
+    so answers stay correct between refreshes. Refreshing runs in the background and
+    queries never touch the API.
+
+    When a refresh fails the store keeps serving what it has and reports itself
+    :attr:`stale` until the API answers again.
+    """
+
+    def __init__(self, calendar, refresh_interval=600, fetch_limit=50, incremental=True, database=None,
+                 snapshot_filename=None, upcoming_limit=5):
+        self.calendar = calendar
+        self.database = database
+        self.snapshot_filename = snapshot_filename
+        self.refresh_interval = refresh_interval
+        self.fetch_limit = fetch_limit
+        self.incremental = incremental
+        # upcoming queries are shown in one Discord message
+        self.upcoming_limit = upcoming_limit
+        self.sync_token = None
+        self.refreshed_at = None
+        self.last_error = None
+        self._by_id = {}
+        # ids seen with status 'cancelled' in a sync, whether or not the store held them
+        self.cancelled_ids = set()
+        self._events = []
+        self._starts = array.array('q')
+        self._index = IntervalIndex()
+        self._task = None
+        self._lock = asyncio.Lock()
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """`listener()` is called after every refresh"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._refresh_loop(), name='event-store-refresh')
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                log.error(f"calendar refresh failed: {type(e).__name__}: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def refresh(self):
+        async with self._lock:
+            try:
+                if self.incremental:
+                    full, upserted, deleted = await self._sync()
+                else:
+                    raw_events = await self.calendar.list_events(self.fetch_limit)
+                    full, upserted, deleted = True, *self.load(raw_events)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                raise
+            self.last_error = None
+            self.refreshed_at = datetime.datetime.utcnow().astimezone()
+            log.info(f"event store refreshed, {len(self._events)} event(s)")
+            if self.database is not None:
+                await self._persist(full, upserted, deleted)
+            if self.snapshot_filename is not None:
+                await self._write_snapshot()
+        for listener in self._listeners:
+            listener()
+
+    async def ensure_loaded(self):
+        if self.refreshed_at is None:
+            await self.refresh()
+
+    @property
+    def stale(self):
+        """The last refresh failed, events come from an earlier refresh or the snapshot"""
+        return self.last_error is not None and self.refreshed_at is not None
+
+    @property
+    def complete(self):
+        """The store holds the whole calendar, not only the `fetch_limit` upcoming events
+
+        Only then is an event missing from it known to be gone.
+        """
+        return self.incremental and self.refreshed_at is not None
+
+    async def _sync(self):
+        """:return: (full sync, upserted events, deleted ids)"""
+        full = self.sync_token is None
+        try:
+            items, sync_token = await self.calendar.sync_events(self.sync_token)
+        except SyncTokenExpired:
+            self.sync_token = None
+            items, sync_token = await self.calendar.sync_events()
+            full = True
+        upserted, deleted = self.load(items) if full else self.apply_changes(items)
+        self.sync_token = sync_token
+        return full, upserted, deleted
+
+    async def _persist(self, full, upserted, deleted):
+        if full:
+            await self.database.replace_calendar_events(self._events)
+        else:
+            await self.database.upsert_calendar_events(upserted)
+            await self.database.delete_calendar_events(deleted)
+        await self.database.set_state('calendar_sync_token', self.sync_token)
+        await self.database.set_state('calendar_refreshed_at', str(self.refreshed_at.timestamp()))
+
+    async def _write_snapshot(self):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            await loop.run_in_executor(None, write_snapshot, self.snapshot_filename, list(self._events),
+                                       self.refreshed_at.timestamp(), self.sync_token)
+        except OSError as e:
+            log.error(f"snapshot {self.snapshot_filename} not written: {e}")
+            return
+        log.debug(f"snapshot written in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    async def restore(self):
+        """Warm start from the snapshot, or the database when there is none
+
+        The next refresh continues from the restored sync token.
+        """
+        if await self.restore_snapshot():
+            return
+        if self.database is None:
+            return
+        events = await self.database.load_calendar_events()
+        refreshed_at = await self.database.get_state('calendar_refreshed_at')
+        if refreshed_at is None:
+            return
+        async with self._lock:
+            self._by_id = {event.id: event for event in events}
+            self._reindex()
+            if self.incremental:
+                self.sync_token = await self.database.get_state('calendar_sync_token')
+            self.refreshed_at = datetime.datetime.fromtimestamp(float(refreshed_at)).astimezone()
+        log.info(f"event store restored, {len(events)} event(s) from {self.refreshed_at}")
+
+    async def restore_snapshot(self):
+        if self.snapshot_filename is None:
+            return False
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            snapshot = await loop.run_in_executor(None, read_snapshot, self.snapshot_filename)
+        except (OSError, ValueError, struct.error) as e:
+            log.error(f"snapshot {self.snapshot_filename} not readable: {type(e).__name__}: {e}")
+            return False
+        if snapshot is None:
+            return False
+        events, refreshed_at, sync_token = snapshot
+        async with self._lock:
+            self._by_id = {event.id: event for event in events}
+            self._reindex()
+            if self.incremental:
+                self.sync_token = sync_token
+            self.refreshed_at = datetime.datetime.fromtimestamp(refreshed_at).astimezone()
+        log.info(f"event store restored from snapshot, {len(events)} event(s) from {self.refreshed_at}"
+                 f" in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return True
+
+    def load(self, raw_events):
+        """Replace the whole content of the store"""
+        self._by_id = {}
+        return self.apply_changes(raw_events)
+
+    def apply_changes(self, raw_events):
+        """Upsert changed events and drop cancelled ones
+
+        :return: (upserted events, deleted ids)
+        """
+        upserted = []
+        deleted = []
+        for raw in raw_events:
+            if raw.get('status') == 'cancelled':
+                self._by_id.pop(raw.get('id'), None)
+                self.cancelled_ids.add(raw.get('id'))
+                deleted.append(raw.get('id'))
+            else:
+                event = CalendarEvent.from_google(raw)
+                self._by_id[event.id] = event
+                self.cancelled_ids.discard(event.id)
+                upserted.append(event)
+        self._reindex()
+        return upserted, deleted
+
+    def _reindex(self):
+        events = sorted(self._by_id.values(), key=lambda event: event.start_ts)
+        self._events = events
+        self._starts = array.array('q', [event.start_ts for event in events])
+        self._index = IntervalIndex(events, key=lambda event: (event.start_ts, event.end_ts))
+
+    @staticmethod
+    def now():
+        return datetime.datetime.utcnow().astimezone()
+
+    def raw_events(self):
+        """All stored CalendarEvent records, sorted by start"""
+        return list(self._events)
+
+    def raw_events_until(self, days, now=None):
+        """CalendarEvent records not ended yet and starting within `days`"""
+        now_ts = (now or self.now()).timestamp()
+        horizon = now_ts + days * 24 * 3600
+        return [event for event in self._events[:bisect.bisect_right(self._starts, horizon)] if event.end_ts > now_ts]
+
+    def _view(self, events, now):
+        return [Calendar.make_event(event.summary, event.description, event.start, event.end, now)
+                for event in events]
+
+    def get_events(self, now=None):
+        now = now or self.now()
+        now_ts = now.timestamp()
+        return self._view([event for event in self._events if event.end_ts > now_ts], now)
+
+    def get_events_current(self, now=None):
+        now = now or self.now()
+        now_ts = now.timestamp()
+        return self._view(self._index.overlapping(now_ts, now_ts), now)
+
+    def get_events_upcoming(self, now=None, limit=None):
+        """First `limit` (default :attr:`upcoming_limit`) events starting after now"""
+        now = now or self.now()
+        first = bisect.bisect_right(self._starts, now.timestamp())
+        return self._view(self._events[first:first + (limit or self.upcoming_limit)], now)
+
+    async def events_overlapping(self, start, end, now=None):
+        """Events overlapping [start, end), an indexed database query when the store has a database"""
+        now = now or self.now()
+        if self.database is None:
+            events = self._index.overlapping(start.timestamp(), end.timestamp())
+        else:
+            events = await self.database.events_overlapping(int(start.timestamp()), int(end.timestamp()))
+        return self._view(events, now)
+
+    def get_events_end_soon(self, now=None):
+        events = self.get_events_current(now)
+        return [event for event in events if event.remains.days <= config.DISCORD_EVENT_END_SOON_DAYS]
+
+    def get_events_next(self, now=None):
+        events = self.get_events_upcoming(now)
+        return [event for event in events if event.starts_in.days <= config.DISCORD_EVENT_START_SOON_DAYS]
+
+    def get_event_started_today(self, now=None):
+        events = self.get_events_current(now)
+        today_date = datetime.date.today()
+        return [event for event in events if event.start.date() == today_date]
+
+    def format_events(self, events):
+        return self.calendar.format_events(events)
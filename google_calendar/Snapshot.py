@@ -0,0 +1,70 @@
+import logging
+import mmap
+import os
+import struct
+import tempfile
+
+from .CalendarEvent import CalendarEvent
+
+log = logging.getLogger(__name__)
+
+MAGIC = b'BUBLACAL'
+VERSION = 1
+# magic, version, event count, refreshed at (epoch), sync token length
+HEADER = struct.Struct('<8sHIdH')
+# start, end, all day, id / summary / description lengths
+RECORD = struct.Struct('<qq?HHI')
+
+
+def _encode(text):
+    return text.encode('utf-8') if text is not None else b''
+
+
+def write_snapshot(filename, events, refreshed_at, sync_token=None):
+    """Write the calendar state to `filename` atomically
+
+    :param events: CalendarEvent records
+    :param refreshed_at: epoch seconds of the refresh the state comes from
+    """
+    token = _encode(sync_token)
+    chunks = [HEADER.pack(MAGIC, VERSION, len(events), refreshed_at, len(token)), token]
+    for event in events:
+        event_id, summary, description = _encode(event.id), _encode(event.summary), _encode(event.description)
+        chunks.append(RECORD.pack(event.start_ts, event.end_ts, event.all_day,
+                                  len(event_id), len(summary), len(description)))
+        chunks += [event_id, summary, description]
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_filename = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b''.join(chunks))
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        os.unlink(tmp_filename)
+        raise
+
+
+def read_snapshot(filename):
+    """(events, refreshed_at, sync_token) from a snapshot, None when missing or unreadable"""
+    if not os.path.exists(filename) or os.path.getsize(filename) < HEADER.size:
+        return None
+    with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        magic, version, count, refreshed_at, token_length = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            log.warning(f"snapshot {filename} has unknown format, ignored")
+            return None
+        offset = HEADER.size
+        sync_token = data[offset:offset + token_length].decode('utf-8') or None
+        offset += token_length
+        events = []
+        for _ in range(count):
+            start_ts, end_ts, all_day, id_length, summary_length, description_length = RECORD.unpack_from(data, offset)
+            offset += RECORD.size
+            fields = []
+            for length in (id_length, summary_length, description_length):
+                fields.append(data[offset:offset + length].decode('utf-8') or None)
+                offset += length
+            events.append(CalendarEvent(*fields, start_ts, end_ts, all_day))
+    return events, refreshed_at, sync_token
@@ -1 +1,5 @@
-from .Calendar import Calendar, Event
\ No newline at end of file
+from .Calendar import Calendar, Event, SyncTokenExpired
+from .AsyncCalendar import AsyncCalendar
+from .CalendarEvent import CalendarEvent
+from .CredentialManager import CredentialManager
+from .EventStore import EventStore
\ No newline at end of file
@@ -1,11 +1,20 @@
 import logging
 
-from bubla import bubla
 import utils
+from utils.startup import startup_timer
 
-utils.logger_settings.config_console_logger(level=logging.DEBUG)
+with startup_timer.phase('config'):
+    utils.config.load()
+    token = utils.config.load_discord_secret(utils.config.DISCORD_BOT_SECRET_FILENAME)
 
-token = utils.config.load_discord_secret(utils.config.DISCORD_BOT_SECRET_FILENAME)
+utils.logger_settings.config_queue_logger(level=logging.DEBUG,
+                                          json_format=utils.config.LOG_JSON,
+                                          queue_size=utils.config.LOG_QUEUE_SIZE,
+                                          rate_limit=utils.config.LOG_RATE_LIMIT,
+                                          rate_period=utils.config.LOG_RATE_PERIOD)
+
+with startup_timer.phase('import'):
+    from bubla import bubla
 
 logger = logging.getLogger(__name__)
 
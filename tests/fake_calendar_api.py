@@ -0,0 +1,124 @@
+"""In-memory stand-in for the Google Calendar API service, passed to Calendar(service=...)"""
+import datetime
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+
+def http_error(status):
+    return HttpError(httplib2.Response({'status': status}), b'{}')
+
+
+def event_time(event_time):
+    if 'date' in event_time:
+        return datetime.datetime.fromisoformat(event_time['date']).replace(tzinfo=datetime.timezone.utc)
+    return datetime.datetime.fromisoformat(event_time['dateTime'])
+
+
+def all_day(event_id, summary, start, end):
+    return {'id': event_id, 'status': 'confirmed', 'summary': summary, 'description': '',
+            'start': {'date': start}, 'end': {'date': end}}
+
+
+class FakeRequest:
+    def __init__(self, func):
+        self.func = func
+
+    def execute(self, http=None):
+        return self.func()
+
+
+class FakeBatch:
+    def __init__(self, api, callback):
+        self.api = api
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        self.requests.append((request_id, request))
+
+    def execute(self, http=None):
+        self.api.batches.append(len(self.requests))
+        for request_id, request in self.requests:
+            try:
+                response = request.execute()
+            except HttpError as e:
+                self.callback(request_id, None, e)
+            else:
+                self.callback(request_id, response, None)
+
+
+class FakeEvents:
+    def __init__(self, api):
+        self.api = api
+
+    def list(self, **kwargs):
+        self.api.list_calls.append(kwargs)
+        return FakeRequest(lambda: self.api.list(**kwargs))
+
+    def insert(self, calendarId, body):
+        return FakeRequest(lambda: self.api.insert(body))
+
+
+class FakeCalendarApi:
+    """Events, their change log and the calls made
+
+    Sync tokens are positions in the change log; tokens in :attr:`expired` answer 410 Gone.
+    Inserts of events whose summary is in :attr:`failing` answer 400.
+    """
+
+    def __init__(self, events=(), page_size=None):
+        self.page_size = page_size
+        self.events_by_id = {}
+        self.changes = []
+        self.expired = set()
+        self.failing = set()
+        self.list_calls = []
+        self.batches = []
+        for event in events:
+            self.put(event)
+
+    def events(self):
+        return FakeEvents(self)
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback)
+
+    def put(self, event):
+        self.events_by_id[event['id']] = event
+        self.changes.append(event)
+
+    def cancel(self, event_id):
+        del self.events_by_id[event_id]
+        self.changes.append({'id': event_id, 'status': 'cancelled'})
+
+    def sync_token(self):
+        return f"sync-{len(self.changes)}"
+
+    def insert(self, body):
+        if body.get('summary') in self.failing:
+            raise http_error(400)
+        event = dict(body, id=f"created{len(self.changes)}", status='confirmed')
+        self.put(event)
+        return dict(event, htmlLink=f"https://calendar.example/{event['id']}")
+
+    def list(self, syncToken=None, pageToken=None, maxResults=250, timeMin=None, timeMax=None, **kwargs):
+        if syncToken is not None:
+            if syncToken in self.expired:
+                raise http_error(410)
+            # latest change of every event since the token
+            items = list({item['id']: item for item in self.changes[int(syncToken.split('-')[1]):]}.values())
+        else:
+            items = sorted(self.events_by_id.values(), key=lambda event: event_time(event['start']))
+            if timeMin is not None:
+                items = [event for event in items if event_time(event['end']) > datetime.datetime.fromisoformat(timeMin)]
+            if timeMax is not None:
+                items = [event for event in items if event_time(event['start']) < datetime.datetime.fromisoformat(timeMax)]
+        offset = int(pageToken or 0)
+        limit = self.page_size or maxResults
+        result = {'items': items[offset:offset + limit]}
+        if offset + limit < len(items):
+            result['nextPageToken'] = str(offset + limit)
+        else:
+            result['nextSyncToken'] = self.sync_token()
+        return result
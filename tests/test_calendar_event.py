@@ -0,0 +1,83 @@
+import datetime
+import time
+
+import pytest
+
+from google_calendar.CalendarEvent import CalendarEvent, date_to_epoch, parse_event_time
+
+PRAGUE = datetime.timezone(datetime.timedelta(hours=1))
+
+
+@pytest.fixture(autouse=True)
+def prague_time(monkeypatch):
+    """All-day dates are local midnights, pin the local time zone"""
+    monkeypatch.setenv('TZ', 'Europe/Prague')
+    time.tzset()
+    date_to_epoch.cache_clear()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+    date_to_epoch.cache_clear()
+
+
+def epoch(*args, tz=PRAGUE):
+    return int(datetime.datetime(*args, tzinfo=tz).timestamp())
+
+
+def test_timed_event():
+    event = CalendarEvent.from_google({
+        'id': 'timed', 'summary': 'Rally Monte Carlo', 'description': 'stages',
+        'start': {'dateTime': '2023-12-07T18:00:00+01:00', 'timeZone': 'Europe/Prague'},
+        'end': {'dateTime': '2023-12-10T20:30:00Z'},
+    })
+    assert event.id == 'timed'
+    assert event.summary == 'Rally Monte Carlo'
+    assert event.description == 'stages'
+    assert not event.all_day
+    assert event.start_ts == epoch(2023, 12, 7, 18)
+    assert event.end_ts == epoch(2023, 12, 10, 20, 30, tz=datetime.timezone.utc)
+    assert event.start == datetime.datetime(2023, 12, 7, 18, tzinfo=PRAGUE)
+
+
+def test_all_day_event():
+    event = CalendarEvent.from_google({
+        'id': 'all-day', 'summary': 'Rally Sweden',
+        'start': {'date': '2023-12-07'},
+        'end': {'date': '2023-12-10'},
+    })
+    assert event.all_day
+    assert event.description is None
+    assert event.start_ts == epoch(2023, 12, 7)
+    assert event.start.date() == datetime.date(2023, 12, 7)
+
+
+def test_all_day_end_is_exclusive():
+    # Google's end date of an all-day event is the day after its last day
+    event = CalendarEvent.from_google({'id': 'one-day', 'start': {'date': '2023-12-07'}, 'end': {'date': '2023-12-08'}})
+    assert event.end_ts - event.start_ts == 24 * 3600
+    assert event.end.date() == datetime.date(2023, 12, 8)
+    last_second = epoch(2023, 12, 7, 23, 59, 59)
+    assert event.start_ts <= last_second < event.end_ts
+    assert not event.start_ts <= epoch(2023, 12, 8) < event.end_ts
+
+
+def test_all_day_dates_are_local_midnights_across_dst():
+    # clocks go back on 2023-10-29 in Prague, that day has 25 hours
+    event = CalendarEvent.from_google({'id': 'dst', 'start': {'date': '2023-10-28'}, 'end': {'date': '2023-10-30'}})
+    cest = datetime.timezone(datetime.timedelta(hours=2))
+    assert event.start_ts == epoch(2023, 10, 28, tz=cest)
+    assert event.end_ts == epoch(2023, 10, 30)
+    assert event.end_ts - event.start_ts == 49 * 3600
+
+
+def test_parse_event_time_kinds():
+    assert parse_event_time({'date': '2023-12-07'}) == (epoch(2023, 12, 7), True)
+    assert parse_event_time({'dateTime': '2023-12-07T10:00:00+01:00'}) == (epoch(2023, 12, 7, 10), False)
+
+
+def test_summary_interned():
+    raw = {'id': 'a', 'summary': ''.join(['Rally', ' ', 'Finland']), 'start': {'date': '2023-12-07'},
+           'end': {'date': '2023-12-08'}}
+    first = CalendarEvent.from_google(raw)
+    second = CalendarEvent.from_google(dict(raw, summary=''.join(['Rally ', 'Finland'])))
+    assert first.summary is second.summary
@@ -0,0 +1,92 @@
+import calendar_import
+from calendar_import import rally_event, stage_event
+from google_calendar import Calendar
+from google_calendar.Calendar import BATCH_SIZE
+
+from .fake_calendar_api import FakeCalendarApi, all_day
+
+
+def rally(name, start, end):
+    return rally_event(name, start, end, 'Finland', '100 km', [stage_event('1', 'Ouninpohja', '33 km', 'dry', '')])
+
+
+def calendar(api):
+    return Calendar('rallies', 'credentials.json', 'token.json', service=api)
+
+
+def test_plan_missing_events_skips_overlapping_rallies():
+    existing = [all_day('a', "Rally A", '2024-03-01', '2024-03-04'),
+                all_day('b', "Rally B", '2024-03-10', '2024-03-11')]
+    rallies = [rally("A", '2024-03-02', '2024-03-03'),
+               rally("before A", '2024-02-27', '2024-03-01'),
+               rally("after A", '2024-03-04', '2024-03-06'),
+               rally("over B", '2024-03-08', '2024-03-12')]
+
+    missing = calendar_import.plan_missing_events(rallies, existing)
+
+    assert [line.event for line in missing] == ["before A", "after A"]
+
+
+def test_create_events_dry_run_only_plans():
+    api = FakeCalendarApi([all_day('a', "A Finland", '2024-03-01', '2024-03-03')])
+    rallies = [rally("A", '2024-03-01', '2024-03-03'), rally("B", '2024-03-05', '2024-03-07')]
+
+    assert calendar_import.create_events(calendar(api), rallies, dry_run=True) == 1
+    assert api.batches == []
+    assert list(api.events_by_id) == ['a']
+
+
+def test_create_events_inserts_missing_rallies():
+    api = FakeCalendarApi([all_day('a', "A Finland", '2024-03-01', '2024-03-03')])
+    rallies = [rally("A", '2024-03-01', '2024-03-03'), rally("B", '2024-03-05', '2024-03-07')]
+
+    assert calendar_import.create_events(calendar(api), rallies) == 1
+    created = [event for event in api.events_by_id.values() if event['id'] != 'a']
+    assert [(event['summary'], event['start'], event['end']) for event in created] == [
+        ("B Finland", {'date': '2024-03-05', 'timezone': 'Europe/Prague'},
+         {'date': '2024-03-07', 'timezone': 'Europe/Prague'})]
+    # already created, a second run finds it in the calendar
+    assert calendar_import.create_events(calendar(api), rallies) == 0
+
+
+def test_create_events_batch_chunks_calls():
+    api = FakeCalendarApi()
+    events = [Calendar.get_event_template(f"rally {index}", '', '2024-03-01', '2024-03-02')
+              for index in range(2 * BATCH_SIZE + 1)]
+
+    assert calendar(api).create_events_batch(events) == []
+    assert api.batches == [BATCH_SIZE, BATCH_SIZE, 1]
+    assert len(api.events_by_id) == len(events)
+
+
+def test_create_events_batch_reports_failed_items():
+    api = FakeCalendarApi()
+    api.failing = {"rally 3", f"rally {BATCH_SIZE + 1}"}
+    events = [Calendar.get_event_template(f"rally {index}", '', '2024-03-01', '2024-03-02')
+              for index in range(BATCH_SIZE + 2)]
+
+    failed = calendar(api).create_events_batch(events)
+
+    assert [(event['summary'], error.resp.status) for event, error in failed] == [
+        ("rally 3", 400), (f"rally {BATCH_SIZE + 1}", 400)]
+    assert len(api.events_by_id) == len(events) - 2
+
+
+def test_create_events_counts_only_created_events():
+    api = FakeCalendarApi()
+    api.failing = {"B Finland"}
+    rallies = [rally("A", '2024-03-01', '2024-03-03'), rally("B", '2024-03-05', '2024-03-07')]
+
+    assert calendar_import.create_events(calendar(api), rallies) == 1
+
+
+def test_list_events_range_follows_pages():
+    api = FakeCalendarApi([all_day(f"e{day:02d}", f"rally {day}", f"2024-03-{day:02d}", f"2024-03-{day + 1:02d}")
+                           for day in range(1, 28)], page_size=10)
+
+    items = calendar(api).list_events_range('2024-03-05', '2024-03-26')
+
+    assert [item['id'] for item in items] == [f"e{day:02d}" for day in range(5, 26)]
+    assert [call['pageToken'] for call in api.list_calls] == [None, '10', '20']
+    assert {(call['timeMin'], call['timeMax']) for call in api.list_calls} == {
+        ('2024-03-05T00:00:00Z', '2024-03-26T00:00:00Z')}
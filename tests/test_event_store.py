@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from google_calendar import Calendar
+from google_calendar.AsyncCalendar import AsyncCalendar
+from google_calendar.Calendar import SyncTokenExpired
+from google_calendar.EventStore import EventStore
+
+from .fake_calendar_api import FakeCalendarApi, all_day
+
+
+def rallies(count):
+    return [all_day(f"e{day:02d}", f"rally {day}", f"2024-03-{day:02d}", f"2024-03-{day + 1:02d}")
+            for day in range(1, count + 1)]
+
+
+def run_with_store(api, test):
+    async def main():
+        calendar = AsyncCalendar(Calendar('rallies', 'credentials.json', 'token.json', service=api))
+        try:
+            await test(EventStore(calendar))
+        finally:
+            calendar.close()
+    asyncio.run(main())
+
+
+def test_full_sync_follows_pages():
+    api = FakeCalendarApi(rallies(25), page_size=10)
+    calendar = Calendar('rallies', 'credentials.json', 'token.json', service=api)
+
+    items, sync_token = calendar.sync_events()
+
+    assert [item['id'] for item in items] == [f"e{day:02d}" for day in range(1, 26)]
+    assert [call['pageToken'] for call in api.list_calls] == [None, '10', '20']
+    assert sync_token == api.sync_token()
+
+
+def test_expired_sync_token_raises():
+    api = FakeCalendarApi(rallies(2))
+    api.expired.add('sync-1')
+
+    with pytest.raises(SyncTokenExpired):
+        Calendar('rallies', 'credentials.json', 'token.json', service=api).sync_events('sync-1')
+
+
+def test_incremental_sync_applies_upserts_and_cancellations():
+    api = FakeCalendarApi(rallies(3))
+
+    async def test(store):
+        await store.refresh()
+        assert [event.id for event in store.raw_events()] == ['e01', 'e02', 'e03']
+        first_token = store.sync_token
+
+        api.put(dict(api.events_by_id['e02'], summary="rally 2 moved"))
+        api.put(all_day('e10', "rally 10", '2024-03-10', '2024-03-11'))
+        api.cancel('e01')
+        full, upserted, deleted = await store._sync()
+
+        assert not full
+        assert api.list_calls[-1]['syncToken'] == first_token
+        assert sorted(event.id for event in upserted) == ['e02', 'e10']
+        assert deleted == ['e01']
+        assert store.cancelled_ids == {'e01'}
+        assert store.complete
+        assert [(event.id, event.summary) for event in store.raw_events()] == [
+            ('e02', "rally 2 moved"), ('e03', "rally 3"), ('e10', "rally 10")]
+        assert store.sync_token == api.sync_token()
+
+    run_with_store(api, test)
+
+
+def test_expired_sync_token_falls_back_to_full_sync():
+    api = FakeCalendarApi(rallies(3))
+
+    async def test(store):
+        await store.refresh()
+        api.expired.add(store.sync_token)
+        api.cancel('e01')
+        api.put(all_day('e10', "rally 10", '2024-03-10', '2024-03-11'))
+
+        full, upserted, deleted = await store._sync()
+
+        assert full
+        assert [call.get('syncToken') for call in api.list_calls] == [None, 'sync-3', None]
+        assert deleted == []
+        assert [event.id for event in store.raw_events()] == ['e02', 'e03', 'e10']
+        assert store.sync_token == api.sync_token()
+
+    run_with_store(api, test)
+
+
+def test_fetch_limited_store_is_not_complete():
+    api = FakeCalendarApi(rallies(3))
+
+    async def test(store):
+        store.incremental = False
+        await store.refresh()
+        assert not store.complete
+
+    run_with_store(api, test)
@@ -0,0 +1,146 @@
+import asyncio
+import types
+
+from bubla.live_board import LEADERBOARD, LiveBoards, content_hash
+
+from .test_scheduler import FakeClock, run, settle
+
+CHANNEL = 10
+MESSAGE = 20
+
+
+class FakeDatabase:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.saved = []
+
+    async def load_live_boards(self):
+        return self.rows
+
+    async def save_live_board(self, channel_id, message_id, kind, hash_, edited_at):
+        self.saved.append((channel_id, edited_at))
+
+    async def delete_live_board(self, channel_id):
+        pass
+
+
+class FakeChannel:
+    """Records (time, content) of every message edit, an edit waits for `gate` when set"""
+
+    def __init__(self, clock):
+        self.id = CHANNEL
+        self.clock = clock
+        self.edits = []
+        self.gate = None
+
+    def get_partial_message(self, message_id):
+        async def edit(content):
+            if self.gate is not None:
+                await self.gate.wait()
+            self.edits.append((self.clock.now, content))
+        return types.SimpleNamespace(edit=edit)
+
+
+def live_boards(clock, edited_at=-1000.0, content_hash_=None, debounce=5, min_interval=30):
+    channel = FakeChannel(clock)
+    database = FakeDatabase([(CHANNEL, MESSAGE, LEADERBOARD, content_hash_, edited_at)])
+    bot = types.SimpleNamespace(database=database, get_channel=lambda channel_id: channel)
+
+    async def render(kind):
+        return ''
+
+    boards = LiveBoards(bot, render, debounce=debounce, min_interval=min_interval, clock=clock, sleep=clock.sleep)
+    return boards, channel
+
+
+def test_offers_within_debounce_make_one_edit():
+    async def test():
+        clock = FakeClock()
+        boards, channel = live_boards(clock)
+        await boards.load()
+        board = boards.boards[CHANNEL]
+
+        boards.offer(board, 'first')
+        await settle()
+        await clock.advance(2)
+        boards.offer(board, 'second')
+        await clock.advance(2)
+        assert channel.edits == []
+        await clock.advance(1)
+        assert channel.edits == [(5, 'second')]
+        assert board.content_hash == content_hash('second')
+        assert boards.database.saved == [(CHANNEL, 5)]
+
+        # same content again, nothing scheduled
+        boards.offer(board, 'second')
+        assert board.task is None
+        boards.stop()
+
+    run(test)
+
+
+def test_changed_and_changed_back_is_not_edited():
+    async def test():
+        clock = FakeClock()
+        boards, channel = live_boards(clock, content_hash_=content_hash('shown'))
+        await boards.load()
+        board = boards.boards[CHANNEL]
+
+        boards.offer(board, 'changed')
+        await settle()
+        await clock.advance(1)
+        boards.offer(board, 'shown')
+        await clock.advance(10)
+        assert channel.edits == []
+        assert board.pending is None and board.task is None
+        boards.stop()
+
+    run(test)
+
+
+def test_min_interval_counts_from_persisted_edit():
+    async def test():
+        # restarted 10s after the last edit
+        clock = FakeClock(110)
+        boards, channel = live_boards(clock, edited_at=100)
+        await boards.load()
+        board = boards.boards[CHANNEL]
+
+        boards.offer(board, 'new')
+        await settle()
+        await clock.advance(19)
+        assert channel.edits == []
+        await clock.advance(1)
+        assert channel.edits == [(130, 'new')]
+        boards.stop()
+
+    run(test)
+
+
+def test_offer_during_edit_is_flushed_after_it():
+    async def test():
+        clock = FakeClock()
+        boards, channel = live_boards(clock)
+        await boards.load()
+        board = boards.boards[CHANNEL]
+        channel.gate = asyncio.Event()
+
+        boards.offer(board, 'first')
+        await settle()
+        await clock.advance(5)
+        # the edit of 'first' is in flight
+        assert channel.edits == [] and board.pending is None
+        boards.offer(board, 'second')
+        channel.gate.set()
+        await settle()
+        assert channel.edits == [(5, 'first')]
+        assert board.task is not None
+
+        await clock.advance(29)
+        assert channel.edits == [(5, 'first')]
+        await clock.advance(1)
+        assert channel.edits == [(5, 'first'), (35, 'second')]
+        boards.stop()
+
+    run(test)
+
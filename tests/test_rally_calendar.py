@@ -0,0 +1,67 @@
+import asyncio
+import types
+
+from bubla import scheduler
+from bubla.cogs.rally_calendar import RallyCalendar
+
+
+def make_cog():
+    calls = []
+
+    async def archive_results(event_ids):
+        calls.append(('archive', event_ids))
+
+    async def plan_next_events():
+        calls.append(('plan',))
+
+    async def scheduled_reminder(deadlines):
+        calls.append(('remind', [deadline.kind for deadline in deadlines]))
+
+    cog = types.SimpleNamespace(archive_results=archive_results, plan_next_events=plan_next_events,
+                                scheduled_reminder=scheduled_reminder)
+    return cog, calls
+
+
+def test_end_and_start_in_one_batch():
+    cog, calls = make_cog()
+    # back to back rallies: A ends when B starts
+    deadlines = [scheduler.Deadline(1000, scheduler.END, 'rally-a'),
+                 scheduler.Deadline(1000, scheduler.START, 'rally-b')]
+    asyncio.run(RallyCalendar.on_deadlines(cog, deadlines))
+    assert calls == [('archive', ['rally-a']), ('plan',), ('remind', [scheduler.START])]
+
+
+def test_end_only():
+    cog, calls = make_cog()
+    asyncio.run(RallyCalendar.on_deadlines(cog, [scheduler.Deadline(1000, scheduler.END, 'rally-a')]))
+    assert calls == [('archive', ['rally-a']), ('plan',)]
+
+
+def test_start_only():
+    cog, calls = make_cog()
+    asyncio.run(RallyCalendar.on_deadlines(cog, [scheduler.Deadline(1000, scheduler.START, 'rally-b')]))
+    assert calls == [('remind', [scheduler.START])]
+
+
+class FakeContext:
+    def __init__(self):
+        self.deferred = False
+        self.sent = []
+
+    async def defer(self):
+        self.deferred = True
+
+    async def send(self, content):
+        self.sent.append(content)
+
+
+def test_reminder_answers_without_events():
+    async def reminder_core(channels):
+        assert channels == [ctx]
+        return None
+
+    ctx = FakeContext()
+    cog = types.SimpleNamespace(reminder_core=reminder_core)
+    asyncio.run(RallyCalendar.reminder.callback(cog, ctx))
+    assert ctx.deferred
+    assert ctx.sent == ["No reminder due now."]
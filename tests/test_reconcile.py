@@ -0,0 +1,181 @@
+import asyncio
+import datetime
+import time
+
+import discord
+
+from bubla.reconcile import CREATE, DELETE, EDIT, EventMapping, Reconciler
+from google_calendar.CalendarEvent import CalendarEvent
+
+DAY = 24 * 3600
+# whole seconds in the future, Discord only accepts new events starting later
+BASE = int(time.time()) // DAY * DAY + 10 * DAY
+
+
+def calendar_event(event_id, summary, start_day, end_day):
+    return CalendarEvent(event_id, summary, f"{summary} stages", BASE + start_day * DAY, BASE + end_day * DAY)
+
+
+class FakeDiscordEvent:
+    def __init__(self, guild, event_id, name, description, start_time, end_time):
+        self.guild = guild
+        self.id = event_id
+        self.name = name
+        self.description = description
+        self.start_time = start_time
+        self.end_time = end_time
+        self.status = discord.EventStatus.scheduled
+
+    async def edit(self, **fields):
+        self.guild.writes.append(('edit', self.id, sorted(fields)))
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+    async def delete(self):
+        self.guild.writes.append(('delete', self.id))
+        self.guild.events.pop(self.id)
+
+
+class FakeGuild:
+    def __init__(self, guild_id=1):
+        self.id = guild_id
+        self.name = f"guild{guild_id}"
+        self.events = {}
+        self.writes = []
+
+    @property
+    def scheduled_events(self):
+        return list(self.events.values())
+
+    def add(self, name, description, start_time, end_time):
+        event = FakeDiscordEvent(self, 1000 + len(self.events), name, description, start_time, end_time)
+        self.events[event.id] = event
+        return event
+
+    async def create_scheduled_event(self, name, description, start_time, end_time, **kwargs):
+        event = self.add(name, description, start_time, end_time)
+        self.writes.append(('create', event.id))
+        return event
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.rows = {}
+
+    async def load_discord_events(self):
+        return [(guild_id, calendar_event_id, discord_event_id)
+                for (guild_id, calendar_event_id), discord_event_id in self.rows.items()]
+
+    async def save_discord_events(self, upserts, deletes):
+        for guild_id, calendar_event_id, discord_event_id in upserts:
+            self.rows[(guild_id, calendar_event_id)] = discord_event_id
+        for key in deletes:
+            self.rows.pop(key, None)
+
+
+def reconciler():
+    return Reconciler(EventMapping(FakeDatabase()))
+
+
+def kinds(actions):
+    return [(action.kind, action.calendar_event_id) for action in actions]
+
+
+def test_create_then_rerun_writes_nothing():
+    guild = FakeGuild()
+    events = [calendar_event('a', "Rally A", 0, 2), calendar_event('b', "Rally B", 3, 5)]
+    subject = reconciler()
+
+    actions = asyncio.run(subject.reconcile([guild], events, {'a', 'b'}))
+
+    assert kinds(actions) == [(CREATE, 'a'), (CREATE, 'b')]
+    assert sorted((event.name, int(event.start_time.timestamp())) for event in guild.scheduled_events) == [
+        ("Rally A", BASE), ("Rally B", BASE + 3 * DAY)]
+    assert subject.mapping.database.rows == {(1, 'a'): 1000, (1, 'b'): 1001}
+
+    guild.writes = []
+    assert asyncio.run(subject.reconcile([guild], events, {'a', 'b'})) == []
+    assert guild.writes == []
+
+
+def test_started_events_are_not_created():
+    guild = FakeGuild()
+    started = CalendarEvent('a', "Rally A", '', int(time.time()) - DAY, BASE)
+
+    assert reconciler().plan(guild, [started], {'a'}) == []
+
+
+def test_edit_only_changed_fields():
+    guild = FakeGuild()
+    subject = reconciler()
+    event = calendar_event('a', "Rally A", 0, 2)
+    asyncio.run(subject.reconcile([guild], [event], {'a'}))
+    guild.writes = []
+
+    moved = calendar_event('a', "Rally A", 0, 3)
+    actions = subject.plan(guild, [moved], {'a'})
+
+    assert kinds(actions) == [(EDIT, 'a')]
+    assert list(actions[0].fields) == ['end_time']
+    asyncio.run(subject.apply(actions))
+    assert guild.writes == [('edit', 1000, ['end_time'])]
+    assert subject.plan(guild, [moved], {'a'}) == []
+
+
+def test_adopt_unmapped_event_with_same_name():
+    guild = FakeGuild()
+    event = calendar_event('a', "Rally A", 0, 2)
+    fields = Reconciler.desired_fields(event)
+    existing = guild.add(fields['name'], fields['description'], fields['start_time'], fields['end_time'])
+    subject = reconciler()
+
+    assert subject.plan(guild, [event], {'a'}) == []
+    assert subject.mapping.for_guild(guild.id) == {'a': existing.id}
+
+
+def test_delete_cancelled_events_of_a_full_calendar():
+    guild = FakeGuild()
+    subject = reconciler()
+    events = [calendar_event('a', "Rally A", 0, 2), calendar_event('b', "Rally B", 3, 5)]
+    asyncio.run(subject.reconcile([guild], events, {'a', 'b'}))
+    guild.writes = []
+
+    actions = asyncio.run(subject.reconcile([guild], events[1:], {'b'}))
+
+    assert kinds(actions) == [(DELETE, 'a')]
+    assert guild.writes == [('delete', 1000)]
+    assert subject.mapping.database.rows == {(1, 'b'): 1001}
+    assert asyncio.run(subject.reconcile([guild], events[1:], {'b'})) == []
+
+
+def test_partial_calendar_deletes_only_reported_cancellations():
+    guild = FakeGuild()
+    subject = reconciler()
+    events = [calendar_event('a', "Rally A", 0, 2), calendar_event('b', "Rally B", 3, 5)]
+    asyncio.run(subject.reconcile([guild], events, {'a', 'b'}))
+
+    # 'a' fell out of the fetched window, that alone does not cancel it
+    assert subject.plan(guild, events[1:], None) == []
+    assert kinds(subject.plan(guild, events[1:], None, {'a'})) == [(DELETE, 'a')]
+
+
+def test_mapping_of_event_deleted_in_discord_is_dropped():
+    guild = FakeGuild()
+    subject = reconciler()
+    events = [calendar_event('a', "Rally A", 0, 2)]
+    asyncio.run(subject.reconcile([guild], events, {'a'}))
+    guild.events.clear()
+
+    assert subject.plan(guild, [], set()) == []
+    assert subject.mapping.for_guild(guild.id) == {}
+
+
+def test_same_times_in_other_timezone_are_unchanged():
+    guild = FakeGuild()
+    subject = reconciler()
+    event = calendar_event('a', "Rally A", 0, 2)
+    asyncio.run(subject.reconcile([guild], [event], {'a'}))
+    discord_event = guild.events[1000]
+    discord_event.start_time = discord_event.start_time.astimezone(datetime.timezone.utc)
+
+    assert subject.plan(guild, [event], {'a'}) == []
@@ -0,0 +1,123 @@
+import asyncio
+import types
+
+import pytest
+
+from benchmarks.fake_results_server import FakeResultsServer
+from bubla.cogs.rally_calendar import RallyCalendar
+from bubla.results import CURRENT, HttpResultsProvider, ResultsProvider
+
+
+def run_with_server(test, entries=250, **provider_options):
+    async def main():
+        server = FakeResultsServer(entries=entries, latency=0, port=0)
+        await server.start()
+        provider = HttpResultsProvider(server.url, page_size=100, **provider_options)
+        try:
+            await test(server, provider)
+        finally:
+            await provider.close()
+            await server.stop()
+    asyncio.run(main())
+
+
+def test_pages_are_joined_in_order():
+    async def test(server, provider):
+        rows = await provider.get_results('rally1')
+        assert rows == server.documents('results', 'rally1')
+        assert [row['rank'] for row in rows] == list(range(1, 251))
+        assert server.requests == 3
+
+        standings = await provider.get_standings('2024')
+        assert standings == server.documents('standings', '2024')
+
+    run_with_server(test)
+
+
+def test_rows_are_cached_for_max_age():
+    async def test(server, provider):
+        rows = await provider.get_results('rally1')
+        assert await provider.get_results('rally1') is rows
+        assert server.requests == 3
+
+    run_with_server(test, max_age=60)
+
+
+def test_unchanged_pages_are_revalidated_with_etag():
+    async def test(server, provider):
+        rows = await provider.get_results('rally1')
+        again = await provider.get_results('rally1')
+        assert again is rows
+        assert (server.requests, server.not_modified) == (6, 3)
+
+        # one more entry adds a page
+        server.entries = 300
+        server.touch('results', 'rally1')
+        changed = await provider.get_results('rally1')
+        assert changed == server.documents('results', 'rally1')
+        assert len(changed) == 301
+
+    run_with_server(test, max_age=0)
+
+
+def test_concurrent_callers_share_one_fetch():
+    async def test(server, provider):
+        first, second = await asyncio.gather(provider.get_results('rally1'), provider.get_results('rally1'))
+        assert first is second
+        assert server.requests == 3
+
+    run_with_server(test)
+
+
+def stored_rows_cog(provider):
+    database = {}
+
+    async def save(key, rows):
+        database[key] = rows
+
+    async def load(key):
+        return database.get(key, [])
+
+    cog = types.SimpleNamespace(bot=types.SimpleNamespace(results=provider), _stored_rows={})
+    return cog, database, save, load
+
+
+def test_stored_rows_are_served_when_the_source_is_down():
+    async def test(server, provider):
+        cog, database, save, load = stored_rows_cog(provider)
+        rows = await RallyCalendar.fetch_rows(cog, 'results', 'rally1', provider.get_results, save, load)
+        assert database == {'rally1': rows}
+
+        database['rally1'] = stored = rows[:10]
+        await server.stop()
+        try:
+            assert await RallyCalendar.fetch_rows(cog, 'results', 'rally1', provider.get_results, save, load) is stored
+        finally:
+            await server.start()
+
+    run_with_server(test, max_age=0)
+
+
+def test_unchanged_rows_are_stored_once():
+    async def test(server, provider):
+        cog, database, save, load = stored_rows_cog(provider)
+        saved = []
+
+        async def counting_save(key, rows):
+            saved.append(key)
+            await save(key, rows)
+
+        for _ in range(2):
+            await RallyCalendar.fetch_rows(cog, 'results', 'rally1', provider.get_results, counting_save, load)
+        assert saved == ['rally1']
+
+    run_with_server(test, max_age=0)
+
+
+def test_providers_implement_results_and_standings():
+    class ResultsOnly(ResultsProvider):
+        async def get_results(self, event_key=CURRENT):
+            return []
+
+    with pytest.raises(TypeError):
+        ResultsOnly()
@@ -0,0 +1,187 @@
+import asyncio
+import types
+
+from bubla import scheduler
+
+DAY = 24 * 3600
+
+
+def event(event_id, start_ts, end_ts):
+    return types.SimpleNamespace(id=event_id, start_ts=start_ts, end_ts=end_ts)
+
+
+class FakeStore:
+    def __init__(self, events=()):
+        self.events = list(events)
+        self.listeners = []
+
+    def raw_events(self):
+        return list(self.events)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def change(self, events):
+        self.events = list(events)
+        for listener in self.listeners:
+            listener()
+
+
+class FakeClock:
+    """Time moves only when the test advances it, sleepers wake up accordingly"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+        self._changed = asyncio.Condition()
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, delay):
+        target = self.now + delay
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.now >= target)
+
+    async def advance(self, seconds):
+        self.now += seconds
+        async with self._changed:
+            self._changed.notify_all()
+        await settle()
+
+
+async def settle():
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+def run(test):
+    asyncio.run(test())
+
+
+def make_scheduler(store, clock, callback):
+    return scheduler.BoundaryScheduler(store, callback, end_soon_days=1, clock=clock, sleep=clock.sleep)
+
+
+def test_deadline_order():
+    store = FakeStore([event('b', 10 * DAY, 13 * DAY), event('a', 5 * DAY, 8 * DAY)])
+    boundary = make_scheduler(store, FakeClock(), None)
+    boundary._heap = boundary.compute_deadlines(0)
+    ordered = [(deadline.when, deadline.kind, deadline.event_id) for deadline in boundary.pop_due(20 * DAY)]
+    assert ordered == [
+        (5 * DAY, scheduler.START, 'a'),
+        (7 * DAY, scheduler.ENDS_SOON, 'a'),
+        (8 * DAY, scheduler.END, 'a'),
+        (10 * DAY, scheduler.START, 'b'),
+        (12 * DAY, scheduler.ENDS_SOON, 'b'),
+        (13 * DAY, scheduler.END, 'b'),
+    ]
+
+
+def test_past_deadlines_skipped():
+    store = FakeStore([event('a', 5 * DAY, 8 * DAY)])
+    boundary = make_scheduler(store, FakeClock(), None)
+    assert [deadline.kind for deadline in boundary.compute_deadlines(6 * DAY)] == [scheduler.ENDS_SOON, scheduler.END]
+
+
+def test_delivers_when_due():
+    async def test():
+        clock = FakeClock()
+        store = FakeStore([event('a', 5 * DAY, 8 * DAY)])
+        delivered = []
+
+        async def callback(deadlines):
+            delivered.append((clock.now, [deadline.kind for deadline in deadlines]))
+
+        boundary = make_scheduler(store, clock, callback)
+        boundary.start()
+        await settle()
+        await clock.advance(5 * DAY - 1)
+        assert delivered == []
+        await clock.advance(1)
+        assert delivered == [(5 * DAY, [scheduler.START])]
+        await clock.advance(3 * DAY)
+        assert delivered[1:] == [(8 * DAY, [scheduler.ENDS_SOON, scheduler.END])]
+        boundary.stop()
+
+    run(test)
+
+
+def test_coincident_deadlines_in_one_call():
+    async def test():
+        clock = FakeClock()
+        # back to back: a ends when b starts
+        store = FakeStore([event('a', 1 * DAY, 4 * DAY), event('b', 4 * DAY, 7 * DAY)])
+        delivered = []
+
+        async def callback(deadlines):
+            delivered.append(sorted((deadline.kind, deadline.event_id) for deadline in deadlines))
+
+        boundary = make_scheduler(store, clock, callback)
+        boundary.start()
+        await settle()
+        await clock.advance(3 * DAY)  # a starts (day 1), a ends soon (day 3)
+        await clock.advance(1 * DAY)
+        assert delivered[-1] == [(scheduler.END, 'a'), (scheduler.START, 'b')]
+        boundary.stop()
+
+    run(test)
+
+
+def test_reschedule_on_store_change():
+    async def test():
+        clock = FakeClock()
+        store = FakeStore([event('a', 10 * DAY, 13 * DAY)])
+        delivered = []
+
+        async def callback(deadlines):
+            delivered.append([(deadline.kind, deadline.event_id) for deadline in deadlines])
+
+        boundary = make_scheduler(store, clock, callback)
+        boundary.start()
+        await settle()
+        assert boundary.next_deadline.event_id == 'a'
+        # an earlier rally is added while waiting for a
+        store.change([event('early', 2 * DAY, 5 * DAY), event('a', 10 * DAY, 13 * DAY)])
+        await settle()
+        assert boundary.next_deadline == scheduler.Deadline(2 * DAY, scheduler.START, 'early')
+        await clock.advance(2 * DAY)
+        assert delivered == [[(scheduler.START, 'early')]]
+        # and removed again: its remaining deadlines are dropped
+        store.change([event('a', 10 * DAY, 13 * DAY)])
+        await settle()
+        assert boundary.next_deadline.event_id == 'a'
+        boundary.stop()
+
+    run(test)
+
+
+def test_deadline_due_during_callback_not_lost():
+    async def test():
+        clock = FakeClock()
+        store = FakeStore([event('a', 1 * DAY, 10 * DAY), event('b', 2 * DAY, 10 * DAY)])
+        delivered = []
+        release = asyncio.Event()
+
+        async def callback(deadlines):
+            delivered.append([(deadline.kind, deadline.event_id) for deadline in deadlines])
+            if len(delivered) == 1:
+                await release.wait()
+
+        boundary = make_scheduler(store, clock, callback)
+        boundary.start()
+        await settle()
+        await clock.advance(1 * DAY)
+        assert delivered == [[(scheduler.START, 'a')]]
+        # b starts while the callback of a still runs, then the store refreshes
+        await clock.advance(1 * DAY)
+        store.change(store.events)
+        await settle()
+        release.set()
+        await settle()
+        assert delivered == [[(scheduler.START, 'a')], [(scheduler.START, 'b')]]
+        boundary.stop()
+
+    run(test)
@@ -0,0 +1,76 @@
+from bubla.stage_times import MISSING, ResultSet, format_times, parse_times
+
+HEADERS = ['rank', 'name', 'stageTime', 'stageDiff', 'totalTime', 'totalDiff', 'interval']
+
+
+def test_valid_times():
+    assert parse_times(['01:02.345', '00:00.000', '59:59.999', '01:00:00.000', '12:34:56.789']).tolist() == [
+        62_345, 0, 3_599_999, 3_600_000, 45_296_789]
+
+
+def test_signed_times():
+    assert parse_times(['+01:02.345', '-01:02.345', '-01:00:00.001', '+00:00.000']).tolist() == [
+        62_345, -62_345, -3_600_001, 0]
+
+
+def test_over_length_rejected():
+    # numpy would cut these to 13 characters, which still look like times
+    assert parse_times(['-00:01:02.3456', '+00:01:02.3450', '123:00:00.000']).tolist() == [MISSING] * 3
+
+
+def test_out_of_range_rejected():
+    assert parse_times(['99:99.999', '01:60.000', '60:00.000', '01:61:00.000']).tolist() == [MISSING] * 4
+
+
+def test_malformed_rejected():
+    assert parse_times(['1:02.345', '01-02.345', '01:02,345', 'ab:cd.efg', '01:02:03.45', 'čas']).tolist() == [
+        MISSING] * 6
+
+
+def test_missing_values():
+    assert parse_times(['--', None, '']).tolist() == [MISSING] * 3
+    assert parse_times([]).tolist() == []
+
+
+def test_format_round_trip():
+    times = [62_345, 3_600_000, 45_296_789, -62_345]
+    assert format_times(times) == ['01:02.345', '01:00:00.000', '12:34:56.789', '01:02.345']
+    assert format_times(times, sign=True)[-1] == '-01:02.345'
+    assert parse_times(format_times(times, sign=True)).tolist() == times
+
+
+def row(name, stage, total, dnf=False):
+    return {'name': name, 'stageTime': stage, 'totalTime': total, 'isDnfEntry': dnf}
+
+
+def test_result_set_orders_by_total_with_dnf_last():
+    results = ResultSet([
+        row('dnf', '', '', dnf=True),
+        row('second', '05:01.000', '10:01.500'),
+        row('bad total', '05:00.000', '99:99.999'),
+        row('first', '05:02.000', '10:00.000'),
+        row('third', '--', '10:03.000'),
+    ])
+    assert [results.rows[index]['name'] for index in results.order.tolist()] == [
+        'first', 'second', 'third', 'dnf', 'bad total']
+    assert results.finishers == 3
+    assert results.total_diff[:3].tolist() == [0, 1_500, 3_000]
+    assert results.interval[:3].tolist() == [0, 1_500, 1_500]
+    # best stage of a finisher is 05:01.000
+    assert results.stage_diff[:2].tolist() == [1_000, 0]
+
+
+def test_display_rows():
+    results = ResultSet([
+        row('second', '05:01.000', '10:01.500'),
+        row('first', '05:02.000', '10:00.000'),
+        row('out', '', '', dnf=True),
+    ])
+    lines = results.display_rows(HEADERS)
+    assert lines[0] == {'rank': 1, 'name': 'first', 'stageTime': '05:02.000', 'stageDiff': '+00:01.000',
+                        'totalTime': '10:00.000', 'totalDiff': '--', 'interval': '--'}
+    assert lines[1] == {'rank': 2, 'name': 'second', 'stageTime': '05:01.000', 'stageDiff': '--',
+                        'totalTime': '10:01.500', 'totalDiff': '+00:01.500', 'interval': '+00:01.500'}
+    assert lines[2] == {'rank': 'DNF', 'name': 'out', 'stageTime': '', 'stageDiff': '', 'totalTime': '',
+                        'totalDiff': '', 'interval': ''}
+    assert len(results.display_rows(HEADERS, limit=2)) == 2
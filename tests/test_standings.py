@@ -0,0 +1,64 @@
+from bubla.standings import WRC_POINTS, StandingsEngine
+
+
+def event(*names, dnf=()):
+    return [{'rank': rank, 'name': name, 'isDnfEntry': name in dnf} for rank, name in enumerate(names, start=1)]
+
+
+def summary(standings):
+    return list(zip(standings.ranks.tolist(), standings.names, standings.totals.tolist()))
+
+
+def test_points_and_rank_changes():
+    season = [event('A', 'B', 'C'), event('C', 'D', 'B', 'E', 'A')]
+
+    standings = StandingsEngine().compute(season)
+
+    # A and B are tied on 14, A's win ranks it ahead
+    assert summary(standings) == [(1, 'C', 16), (2, 'A', 14), (3, 'B', 14), (4, 'D', 8), (5, 'E', 5)]
+    assert standings.points.tolist() == [[6, 10], [10, 4], [8, 6], [0, 8], [0, 5]]
+    # D and E did not take part in the first event
+    assert standings.rank_changes.tolist() == [2, -1, -1, 0, 0]
+
+
+def test_full_ties_share_a_rank():
+    season = [event('A', 'B', 'C', 'D'), event('B', 'A', 'D', 'C'), event('E')]
+
+    standings = StandingsEngine().compute(season)
+
+    # E's win does not count back against more points
+    assert summary(standings) == [(1, 'A', 18), (1, 'B', 18), (3, 'C', 11), (3, 'D', 11), (5, 'E', 10)]
+
+
+def test_dnf_points():
+    season = [event('A', 'B', 'C', dnf=['A'])]
+
+    assert summary(StandingsEngine().compute(season)) == [(1, 'B', 8), (2, 'C', 6), (3, 'A', 0)]
+    # tied with C on points, C's finish counts back
+    assert summary(StandingsEngine(dnf_points=6).compute(season)) == [(1, 'B', 8), (2, 'C', 6), (3, 'A', 6)]
+
+
+def test_dnf_is_not_counted_back():
+    # B's retirement from the lead is no win
+    season = [event('B', 'A', dnf=['B']), event('A', 'B')]
+
+    assert summary(StandingsEngine(dnf_points=10).compute(season)) == [(1, 'A', 18), (2, 'B', 18)]
+
+
+def test_drop_worst():
+    season = [event('A', 'B'), event('A', 'B'), event('B')]
+
+    assert summary(StandingsEngine().compute(season)) == [(1, 'B', 26), (2, 'A', 20)]
+    # A's absence is its dropped result, B drops a 2nd place
+    assert summary(StandingsEngine(drop_worst=1).compute(season)) == [(1, 'A', 20), (2, 'B', 18)]
+    # the best result is always counted, countback still sees every result
+    assert summary(StandingsEngine(drop_worst=5).compute(season)) == [(1, 'A', 10), (2, 'B', 10)]
+
+
+def test_points_table():
+    season = [event(*[f"driver{index:02d}" for index in range(12)])]
+
+    standings = StandingsEngine(WRC_POINTS).compute(season)
+
+    assert standings.totals.tolist() == [25, 18, 15, 12, 10, 8, 6, 4, 2, 1, 0, 0]
+    assert standings.ranks.tolist() == [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 11]
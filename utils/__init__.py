@@ -1 +1 @@
-from . import config, logger_settings
+from . import config, logger_settings, loop_monitor, startup
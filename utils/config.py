@@ -29,24 +29,87 @@ def load_config(filename):
     return data
 
 
-config_data = load_config('credentials/config.json')
-
-DISCORD_BOT_GUILD_ID = config_data['discord_bot_guild_id']
-
-DISCORD_BOT_SECRET_FILENAME = config_data['discord_bot_secret_filename']
-
-DISCORD_REMINDER_CHANNEL_ID = config_data['discord_reminder_channel_id']
-DISCORD_REMINDER_CHANNEL_NAME = config_data['discord_reminder_channel_name']
-
-DISCORD_COMMAND_PREFIX = config_data['discord_command_prefix']
-
-CALENDAR_ID = config_data['calendar_id']
-CALENDAR_SECRET_FILENAME = config_data['calendar_secret_filename']
-CALENDAR_TOKEN_FILENAME = config_data['calendar_token_filename']
-CALENDAR_API_KEY_FILENAME = config_data['calendar_api_key_filename']
-CALENDAR_REFRESH_HOUR = config_data['calendar_refresh_hour']
-
-DISCORD_EVENT_END_SOON_DAYS = config_data['discord_event_end_soon_days']
-DISCORD_EVENT_START_SOON_DAYS = config_data['discord_event_start_soon_days']
-
-DISCORD_REMINDER_HOUR = config_data['discord_reminder_hour']
+CONFIG_FILENAME = 'credentials/config.json'
+
+
+def load(filename=CONFIG_FILENAME):
+    """Read the config file and define the module settings
+
+    Called on the first access of a setting, or explicitly to choose when the file is read.
+    """
+    config_data = load_config(filename)
+
+    DISCORD_BOT_GUILD_ID = config_data['discord_bot_guild_id']
+
+    DISCORD_BOT_SECRET_FILENAME = config_data['discord_bot_secret_filename']
+
+    DISCORD_REMINDER_CHANNEL_ID = config_data['discord_reminder_channel_id']
+    DISCORD_REMINDER_CHANNEL_NAME = config_data['discord_reminder_channel_name']
+
+    DISCORD_COMMAND_PREFIX = config_data['discord_command_prefix']
+
+    DATABASE_FILENAME = config_data.get('database_filename', 'data/bubla.sqlite3')
+
+    CALENDAR_ID = config_data['calendar_id']
+    CALENDAR_SECRET_FILENAME = config_data['calendar_secret_filename']
+    CALENDAR_TOKEN_FILENAME = config_data['calendar_token_filename']
+    CALENDAR_API_KEY_FILENAME = config_data['calendar_api_key_filename']
+    CALENDAR_REFRESH_HOUR = config_data.get('calendar_refresh_hour')
+    CALENDAR_REFRESH_INTERVAL = config_data.get('calendar_refresh_interval', 600)
+    CALENDAR_FETCH_LIMIT = config_data.get('calendar_fetch_limit', 50)
+    CALENDAR_INCREMENTAL_SYNC = config_data.get('calendar_incremental_sync', True)
+    CALENDAR_SNAPSHOT_FILENAME = config_data.get('calendar_snapshot_filename', 'data/calendar.snapshot')
+    CALENDAR_UPCOMING_LIMIT = config_data.get('calendar_upcoming_limit', 5)
+
+    DISCORD_EVENT_END_SOON_DAYS = config_data['discord_event_end_soon_days']
+    DISCORD_EVENT_START_SOON_DAYS = config_data['discord_event_start_soon_days']
+
+    DISCORD_REMINDER_HOUR = config_data.get('discord_reminder_hour')
+    DISCORD_STATUS_INTERVAL = config_data.get('discord_status_interval', 30)
+    DISCORD_BROADCAST_CONCURRENCY = config_data.get('discord_broadcast_concurrency', 5)
+    DISCORD_EVENT_GUILD_IDS = config_data.get('discord_event_guild_ids', [DISCORD_BOT_GUILD_ID])
+    DISCORD_EVENT_CONCURRENCY = config_data.get('discord_event_concurrency', 3)
+
+    # results provider, 'mock' or 'http' (club leaderboard source at RESULTS_URL)
+    RESULTS_PROVIDER = config_data.get('results_provider', 'mock')
+    RESULTS_URL = config_data.get('results_url')
+    RESULTS_CONCURRENCY = config_data.get('results_concurrency', 4)
+    RESULTS_PAGE_SIZE = config_data.get('results_page_size', 100)
+    RESULTS_MAX_AGE = config_data.get('results_max_age', 60)
+
+    # championship standings computed from the results of STANDINGS_EVENT_KEYS, when set
+    STANDINGS_EVENT_KEYS = config_data.get('standings_event_keys', [])
+    STANDINGS_POINTS = config_data.get('standings_points', [10, 8, 6, 5, 4, 3, 2, 1])
+    STANDINGS_DROP_WORST = config_data.get('standings_drop_worst', 0)
+    STANDINGS_DNF_POINTS = config_data.get('standings_dnf_points', 0)
+
+    # per season columnar archive of ended rallies, see bubla.archive
+    ARCHIVE_DIRECTORY = config_data.get('archive_directory', 'data/archive')
+
+    # pinned messages edited in place, see bubla.live_board
+    LIVE_BOARD_INTERVAL = config_data.get('live_board_interval', 60)
+    LIVE_BOARD_DEBOUNCE = config_data.get('live_board_debounce', 5)
+    LIVE_BOARD_MIN_INTERVAL = config_data.get('live_board_min_interval', 30)
+
+    # queue based logging, see utils.logger_settings.config_queue_logger
+    LOG_JSON = config_data.get('log_json', False)
+    LOG_QUEUE_SIZE = config_data.get('log_queue_size', 10000)
+    LOG_RATE_LIMIT = config_data.get('log_rate_limit', 20)
+    LOG_RATE_PERIOD = config_data.get('log_rate_period', 10.0)
+
+    # local Prometheus endpoint, a null port disables it
+    METRICS_HOST = config_data.get('metrics_host', '127.0.0.1')
+    METRICS_PORT = config_data.get('metrics_port', 9108)
+
+    settings = {name: value for name, value in locals().items() if name.isupper()}
+    globals().update(settings, config_data=config_data)
+
+
+def __getattr__(name):
+    """Settings are loaded lazily, importing the module does not touch the file system"""
+    if name == 'config_data' or name.isupper():
+        if 'config_data' not in globals():
+            load()
+            if name in globals():
+                return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,48 @@
+import bisect
+
+
+class IntervalIndex:
+    """Static index of half-open intervals [start, end)
+
+    Intervals are sorted by start and carry a running maximum of their ends, which
+    answers "does [start, end) overlap anything" with one bisect, O(log n).
+    Works with anything comparable (datetimes, epoch ints, ...).
+    """
+
+    def __init__(self, items=(), key=None):
+        """
+        :param items: indexed objects
+        :param key: function returning (start, end) of an item, default the item itself
+        """
+        key = key or (lambda item: item)
+        entries = sorted(((*key(item), item) for item in items), key=lambda entry: entry[0])
+        self._starts = [start for start, _, _ in entries]
+        self._ends = [end for _, end, _ in entries]
+        self._items = [item for _, _, item in entries]
+        self._max_ends = []
+        for end in self._ends:
+            self._max_ends.append(end if not self._max_ends else max(self._max_ends[-1], end))
+
+    def __len__(self):
+        return len(self._items)
+
+    def overlaps(self, start, end) -> bool:
+        """True when any indexed interval overlaps [start, end)"""
+        idx = bisect.bisect_left(self._starts, end)
+        return idx > 0 and self._max_ends[idx - 1] > start
+
+    def overlapping(self, start, end) -> list:
+        """All indexed items overlapping [start, end), in start order"""
+        idx = bisect.bisect_left(self._starts, end)
+        if idx == 0 or self._max_ends[idx - 1] <= start:
+            return []
+        return [self._items[i] for i in range(idx) if self._ends[i] > start]
+
+    def overlaps_many(self, intervals) -> list[bool]:
+        """Bulk variant of :meth:`overlaps` for a batch of (start, end) pairs"""
+        return [self.overlaps(start, end) for start, end in intervals]
+
+
+def scheduled_event_interval(discord_event):
+    """(start, end) of a discord.ScheduledEvent, events without end are treated as instant"""
+    return discord_event.start_time, discord_event.end_time or discord_event.start_time
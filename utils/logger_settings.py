@@ -12,8 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
 import sys
+import threading
+import time
 
 FORMAT_CONSOLE = '[%(asctime)s] [%(levelname)s] %(name)s :: %(message)s'
 FORMAT_CONSOLE_COLOR = '[%(asctime)s] [%(log_color)s%(levelname)s%(reset)s]' \
@@ -23,32 +29,35 @@ DATE_FORMAT_ISO = '%Y-%m-%d %H:%M:%S'
 DATE_FORMAT_TIME = '%H:%M:%S'
 
 
-def config_console_logger(filename=None, level=None, fmt=None, fmt_color=None,
-                          datefmt=None):
-    """ configure console logger, if colorlog is installed it will use colorlog
+def make_console_handler(filename=None, level=None, fmt=None, fmt_color=None,
+                         datefmt=None, json_format=False):
+    """ console handler, if colorlog is installed it will use colorlog
     :param filename: stream to log into, default sys.stdout
     :param level: console log level
     :param fmt: console log format
     :param fmt_color: console color log format (only with colorlog)
     :param datefmt: formatter date format, default like ISO8601
+    :param json_format: one JSON object per line instead of text
+    :return: (handler, list of messages to log once logging is set up)
     """
     import_error_msg = []
-    # Windows compatibility section for colorama
-    try:
-        # noinspection PyUnresolvedReferences
-        import colorama
-        colorama.init()
-    except ImportError:
+    if not json_format:
+        # Windows compatibility section for colorama
         try:
             # noinspection PyUnresolvedReferences
-            import colorlog
+            import colorama
+            colorama.init()
         except ImportError:
-            import platform
-            if platform.system() == 'Windows':
-                import_error_msg.append(
-                    'Colorlog without colorama used, expect escape codes,'
-                    ' please install colorama'
-                )
+            try:
+                # noinspection PyUnresolvedReferences
+                import colorlog
+            except ImportError:
+                import platform
+                if platform.system() == 'Windows':
+                    import_error_msg.append(
+                        'Colorlog without colorama used, expect escape codes,'
+                        ' please install colorama'
+                    )
 
     filename = filename or sys.stdout
     level = level or logging.DEBUG
@@ -57,11 +66,14 @@ def config_console_logger(filename=None, level=None, fmt=None, fmt_color=None,
     datefmt = datefmt or DATE_FORMAT_ISO
 
     # console handler
-    console_handler = logging.StreamHandler(stream=filename)  # Python 2.7
-    # console_handler = logging.StreamHandler()  # Python 2.6
+    console_handler = logging.StreamHandler(stream=filename)
     console_handler.setLevel(level)
     console_formatter = logging.Formatter(fmt, datefmt=datefmt)
 
+    if json_format:
+        console_handler.setFormatter(JsonFormatter())
+        return console_handler, import_error_msg
+
     try:
         # noinspection PyUnresolvedReferences
         import colorlog  # noqa: F811
@@ -86,6 +98,19 @@ def config_console_logger(filename=None, level=None, fmt=None, fmt_color=None,
         )
         pass
     console_handler.setFormatter(console_formatter)
+    return console_handler, import_error_msg
+
+
+def config_console_logger(filename=None, level=None, fmt=None, fmt_color=None,
+                          datefmt=None):
+    """ configure console logger, if colorlog is installed it will use colorlog
+    :param filename: stream to log into, default sys.stdout
+    :param level: console log level
+    :param fmt: console log format
+    :param fmt_color: console color log format (only with colorlog)
+    :param datefmt: formatter date format, default like ISO8601
+    """
+    console_handler, import_error_msg = make_console_handler(filename, level, fmt, fmt_color, datefmt)
     logging.getLogger().addHandler(console_handler)
     # log all above error messages
     if import_error_msg:
@@ -93,6 +118,137 @@ def config_console_logger(filename=None, level=None, fmt=None, fmt_color=None,
             logging.info(log_err)
 
 
+def config_queue_logger(filename=None, level=None, fmt=None, fmt_color=None,
+                        datefmt=None, json_format=False, queue_size=10000,
+                        rate_limit=20, rate_period=10.0):
+    """ configure non-blocking console logging
+
+    Records are put on a bounded queue and written by a background thread, so
+    logging never blocks the event loop; when the queue is full records are
+    dropped and counted. Chatty call sites are rate limited below WARNING.
+
+    :param filename: stream to log into, default sys.stdout
+    :param level: console log level
+    :param fmt: console log format
+    :param fmt_color: console color log format (only with colorlog)
+    :param datefmt: formatter date format, default like ISO8601
+    :param json_format: one JSON object per line instead of text
+    :param queue_size: records waiting to be written before new ones are dropped
+    :param rate_limit: records per call site and `rate_period`, None disables it
+    :param rate_period: rate limit window in seconds
+    :return: logging.handlers.QueueListener, already started
+    """
+    console_handler, import_error_msg = make_console_handler(filename, level, fmt, fmt_color,
+                                                             datefmt, json_format)
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    if rate_limit:
+        queue_handler.addFilter(RateLimitFilter(rate_limit, rate_period))
+    listener = logging.handlers.QueueListener(queue_handler.queue, console_handler,
+                                              respect_handler_level=True)
+    listener.start()
+    atexit.register(stop_queue_logger, listener)
+    logging.getLogger().addHandler(queue_handler)
+    # log all above error messages
+    if import_error_msg:
+        for log_err in import_error_msg:
+            logging.info(log_err)
+    return listener
+
+
+def stop_queue_logger(listener):
+    """ flush and stop the listener returned by config_queue_logger, safe to call twice """
+    if listener._thread is not None:
+        listener.stop()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """ QueueHandler which drops records instead of blocking when the queue is full
+
+    Losses are reported by a warning once the queue drained, at most every `report_interval` seconds.
+    """
+
+    def __init__(self, queue, report_interval=10.0):
+        super().__init__(queue)
+        self.report_interval = report_interval
+        self.dropped = 0
+        self._reported = 0
+        self._reported_at = 0.0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if (self.dropped != self._reported and self.queue.qsize() < self.queue.maxsize // 2
+                and time.monotonic() - self._reported_at >= self.report_interval):
+            # queue drained, tell how much was lost
+            lost, self._reported = self.dropped - self._reported, self.dropped
+            self._reported_at = time.monotonic()
+            self.enqueue(logging.makeLogRecord({
+                'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': f"log queue full, {lost} record(s) dropped",
+            }))
+
+
+class RateLimitFilter(logging.Filter):
+    """ lets through at most `rate` records per call site and `period` seconds
+
+    Records above `max_level` are never limited. The first record let
+    through after suppression tells how many were suppressed.
+    """
+
+    def __init__(self, rate=20, period=10.0, max_level=logging.INFO):
+        super().__init__()
+        self.rate = rate
+        self.period = period
+        self.max_level = max_level
+        self.suppressed = 0
+        # call site -> [window start, records in window, suppressed in window]
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        site = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            state = self._sites.get(site)
+            if state is None or now - state[0] >= self.period:
+                suppressed = state[2] if state else 0
+                state = self._sites[site] = [now, 0, 0]
+                if suppressed:
+                    record.msg = f"{record.getMessage()} ({suppressed} similar suppressed)"
+                    record.args = None
+            if state[1] >= self.rate:
+                state[2] += 1
+                self.suppressed += 1
+                return False
+            state[1] += 1
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """ one JSON object per record """
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record, DATE_FORMAT_ISO),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'thread': record.threadName,
+        }
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+
 # default logger level INFO
 logging.getLogger().setLevel(logging.NOTSET)
 logging.root.setLevel(logging.NOTSET)
@@ -0,0 +1,112 @@
+import asyncio
+import collections
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a sleeping coroutine
+
+    Anything blocking the loop (synchronous HTTP, heavy computation) shows up as lag.
+    """
+
+    def __init__(self, interval=0.5, warn_threshold=0.25):
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name='loop-lag-monitor')
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def reset(self):
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+
+    @property
+    def avg_lag(self):
+        return self.total_lag / self.samples if self.samples else 0.0
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - expected)
+            self.samples += 1
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+            self.last_lag = lag
+            if lag > self.warn_threshold:
+                log.warning(f"event loop lagged {lag * 1000:.0f}ms")
+
+    def report(self):
+        return (f"loop lag: last {self.last_lag * 1000:.1f}ms, avg {self.avg_lag * 1000:.1f}ms, "
+                f"max {self.max_lag * 1000:.1f}ms over {self.samples} samples")
+
+
+SlowCallback = collections.namedtuple('SlowCallback', ['at', 'duration', 'handle'])
+
+
+class SlowCallbackDetector(logging.Handler):
+    """Records callbacks and task steps that block the event loop longer than `threshold`
+
+    Relies on asyncio debug mode, which times every callback and logs the slow ones
+    through the 'asyncio' logger; this handler keeps the last `capacity` of them.
+    Debug mode adds overhead, so detection is meant to be switched on on demand.
+    """
+
+    def __init__(self, threshold=0.1, capacity=100):
+        super().__init__(level=logging.WARNING)
+        self.threshold = threshold
+        self.records = collections.deque(maxlen=capacity)
+        self.total = 0
+        self._loop = None
+        self._saved = None
+
+    @property
+    def running(self):
+        return self._loop is not None
+
+    def emit(self, record):
+        if not isinstance(record.msg, str) or not record.msg.startswith('Executing %s took'):
+            return
+        handle, duration = record.args
+        self.records.append(SlowCallback(record.created, duration, handle))
+        self.total += 1
+
+    def start(self, loop=None):
+        if self.running:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._saved = (self._loop.get_debug(), self._loop.slow_callback_duration)
+        self._loop.slow_callback_duration = self.threshold
+        self._loop.set_debug(True)
+        logging.getLogger('asyncio').addHandler(self)
+
+    def stop(self):
+        if not self.running:
+            return
+        logging.getLogger('asyncio').removeHandler(self)
+        debug, self._loop.slow_callback_duration = self._saved
+        self._loop.set_debug(debug)
+        self._loop = None
+
+    def report(self, top=10):
+        lines = [f"slow callbacks (>{self.threshold * 1000:.0f}ms): {self.total} detected"]
+        worst = sorted(self.records, key=lambda record: record.duration, reverse=True)[:top]
+        for record in worst:
+            at = time.strftime('%H:%M:%S', time.localtime(record.at))
+            lines.append(f"  {at} {record.duration * 1000:7.0f}ms {record.handle}")
+        return '\n'.join(lines)
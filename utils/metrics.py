@@ -0,0 +1,227 @@
+import abc
+import asyncio
+import bisect
+import logging
+import math
+
+log = logging.getLogger(__name__)
+
+# seconds, suits both command handling and API round-trips
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(abc.ABC):
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abc.abstractmethod
+    def samples(self):
+        """(suffix, label values, extra labels, value) of every sample"""
+
+    def exposition(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, values, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, values, extra)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self.values.get(self._key(labels), 0)
+
+    def samples(self):
+        for values, value in sorted(self.values.items()):
+            yield '', values, (), value
+
+
+class Gauge(Metric):
+    """Gauge set directly, or read from `func` at collection time
+
+    `func()` returns the value, or a dict of label values tuple -> value for labelled gauges.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), func=None):
+        super().__init__(name, documentation, labelnames)
+        self.func = func
+        self.values = {}
+
+    def set(self, value, **labels):
+        self.values[self._key(labels)] = value
+
+    def samples(self):
+        values = self.values
+        if self.func is not None:
+            values = self.func()
+            if not isinstance(values, dict):
+                values = {(): values}
+        for label_values, value in sorted(values.items()):
+            yield '', label_values, (), value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per bucket counts (last one is +Inf), sum, count]
+        self.values = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        data = self.values.get(key)
+        if data is None:
+            data = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        data[0][bisect.bisect_left(self.buckets, value)] += 1
+        data[1] += value
+        data[2] += 1
+
+    def stats(self, **labels):
+        """(count, sum) observed for the labels"""
+        data = self.values.get(self._key(labels))
+        return (data[2], data[1]) if data else (0, 0.0)
+
+    def quantile(self, q, label_values):
+        """Upper bucket bound containing the `q` quantile, as Prometheus' histogram_quantile approximates"""
+        counts, _, count = self.values[label_values]
+        rank = q * count
+        cumulative = 0
+        for bound, bucket in zip((*self.buckets, math.inf), counts):
+            cumulative += bucket
+            if cumulative >= rank:
+                return bound
+        return math.inf
+
+    def samples(self):
+        for values, (counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket
+                yield '_bucket', values, (('le', _format_value(float(bound))),), cumulative
+            yield '_sum', values, (), total
+            yield '_count', values, (), count
+
+
+class Registry:
+    """Named metrics of the process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def _register(self, cls, name, *args, **kwargs):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = cls(name, *args, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"metric {name} already registered as {metric.kind}")
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=(), func=None):
+        return self._register(Gauge, name, documentation, labelnames, func=func)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def exposition(self):
+        lines = []
+        for metric in self.metrics.values():
+            try:
+                lines += metric.exposition()
+            except Exception as e:
+                log.error(f"metric {metric.name} not collected: {type(e).__name__}: {e}")
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """Short human readable digest: counters, gauges and histogram count/avg/p95"""
+        lines = []
+        for metric in self.metrics.values():
+            if isinstance(metric, Histogram):
+                for values, (_, total, count) in sorted(metric.values.items()):
+                    p95 = metric.quantile(0.95, values)
+                    lines.append(f"{metric.name}{_format_labels(metric.labelnames, values)}: {count}x"
+                                 f" avg {total / count * 1000:.1f}ms p95 <={p95 * 1000:.0f}ms")
+            else:
+                for _, values, _, value in metric.samples():
+                    value = f"{value:.3f}" if isinstance(value, float) else value
+                    lines.append(f"{metric.name}{_format_labels(metric.labelnames, values)}: {value}")
+        return '\n'.join(lines)
+
+
+class MetricsServer:
+    """Minimal HTTP endpoint serving the registry at /metrics"""
+
+    def __init__(self, registry, host='127.0.0.1', port=9108):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        log.info(f"metrics served on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # headers are not needed, drain them
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request_line.decode('latin-1').split()
+            if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] == '/metrics':
+                status, body = '200 OK', self.registry.exposition().encode()
+            else:
+                status, body = '404 Not Found', b'not found\n'
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+# process-wide registry, metrics are registered by the modules they instrument
+metrics = Registry()
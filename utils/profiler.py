@@ -0,0 +1,120 @@
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+log = logging.getLogger(__name__)
+
+
+def _frame_key(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_firstlineno}({code.co_name})"
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling thread stacks from a background thread
+
+    Every `interval` seconds the stacks of the profiled threads are read with
+    sys._current_frames(); the innermost function is counted as "self" and every
+    function on the stack as "total". Cheap enough to run on the live bot.
+    """
+
+    def __init__(self, interval=0.005, thread_ids=None):
+        """
+        :param thread_ids: threads to sample, all but the sampler when None
+        """
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.samples = 0
+        self.self_counts = collections.Counter()
+        self.total_counts = collections.Counter()
+        self.thread_counts = collections.Counter()
+        self.started = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.elapsed += time.perf_counter() - self.started
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_ids is not None and thread_id not in self.thread_ids):
+                    continue
+                self.thread_counts[names.get(thread_id, thread_id)] += 1
+                self.self_counts[_frame_key(frame)] += 1
+                seen = set()
+                while frame is not None:
+                    key = _frame_key(frame)
+                    if key not in seen:
+                        seen.add(key)
+                        self.total_counts[key] += 1
+                    frame = frame.f_back
+            self.samples += 1
+
+    def report(self, top=30):
+        stack_samples = sum(self.thread_counts.values()) or 1
+        lines = [f"{self.samples} samples every {self.interval * 1000:g}ms over {self.elapsed:.1f}s", "",
+                 "threads:"]
+        lines += [f"  {count:7d} {name}" for name, count in self.thread_counts.most_common()]
+        for title, counts in (("self", self.self_counts), ("total", self.total_counts)):
+            lines += ["", f"top {top} by {title} samples:"]
+            lines += [f"  {count:7d} {count / stack_samples:6.1%}  {key}" for key, count in counts.most_common(top)]
+        return '\n'.join(lines)
+
+
+class AllocationTracer:
+    """tracemalloc session reporting the allocation sites grown since it started"""
+
+    def __init__(self, frames=1):
+        self.frames = frames
+        self._baseline = None
+
+    @property
+    def running(self):
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        if not self.running:
+            tracemalloc.start(self.frames)
+        self._baseline = tracemalloc.take_snapshot()
+
+    def stop(self, top=30):
+        """Stop tracing, :return: report of the top allocation sites"""
+        if not self.running:
+            return "tracemalloc is not running"
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        lines = [f"traced memory: current {current / 1024:.0f}KiB, peak {peak / 1024:.0f}KiB", "",
+                 f"top {top} allocation sites:"]
+        lines += [f"  {stat}" for stat in snapshot.statistics('lineno')[:top]]
+        if self._baseline is not None:
+            lines += ["", f"top {top} growth since start:"]
+            lines += [f"  {stat}" for stat in snapshot.compare_to(self._baseline, 'lineno')[:top]]
+        self._baseline = None
+        return '\n'.join(lines)
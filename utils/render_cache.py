@@ -0,0 +1,50 @@
+import hashlib
+import logging
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+
+class RenderCache:
+    """LRU cache of rendered messages keyed on the content they were rendered from"""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    @staticmethod
+    def content_key(namespace, *parts):
+        """Stable digest of the render input, `parts` must have a deterministic repr"""
+        return namespace, hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+    def get_or_render(self, key, render):
+        """Cached output for `key`, calling `render()` on a miss"""
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            value = render()
+            self._data[key] = value
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return value
+        self.hits += 1
+        self._data.move_to_end(key)
+        return value
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# process-wide cache shared by all renderers
+render_cache = RenderCache()
@@ -0,0 +1,48 @@
+import contextlib
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Wall-clock breakdown of the bot cold start
+
+    Phases are timed with :meth:`phase` or, when they span callbacks, between
+    :meth:`begin` and :meth:`end`. The clock starts when this module is imported.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.phases = {}
+        self._running = {}
+
+    def begin(self, name):
+        self._running[name] = self.clock()
+
+    def end(self, name):
+        started = self._running.pop(name, None)
+        if started is None:
+            return None
+        self.phases[name] = self.clock() - started
+        return self.phases[name]
+
+    def running(self, name):
+        return name in self._running
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def report(self):
+        total = self.clock() - self.started
+        phases = ', '.join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.phases.items())
+        return f"startup {total:.2f}s: {phases or 'no phases'}"
+
+
+startup_timer = StartupTimer()